@@ -1,7 +1,12 @@
 import datetime
-import requests
-import xmltodict
 import json
+from lxml import etree
+
+import http_cache
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+# Bytes read from the response per parser feed
+CHUNK_SIZE = 64 * 1024
 
 def fetch_arxiv_papers(query, start_date=None, end_date=None, max_results=5):
     """
@@ -56,59 +61,61 @@ def fetch_arxiv_papers(query, start_date=None, end_date=None, max_results=5):
         "max_results": max_results
     }
 
-    resp = requests.get(base_url, params=params)
-    if resp.status_code == 200:
-        data = xmltodict.parse(resp.text)
-        entries = data['feed'].get('entry', [])
-        if isinstance(entries, dict):
-            # If there's only one entry, it might not be a list
-            entries = [entries]
-        for entry in entries:
-            title = entry.get('title', 'No Title')
-            summary = entry.get('summary', 'No Abstract').strip()
-            authors_raw = entry.get('author', [])
-            # If there's only one author, it might not be a list
-            if isinstance(authors_raw, dict):
-                authors_raw = [authors_raw]
-            authors = [auth.get('name', 'Unknown') for auth in authors_raw]
-
-            links = entry.get('link', [])
-            if isinstance(links, dict):
-                links = [links]
-
-            pdf_link = None
-            for link in links:
-                if link.get('@type') == 'application/pdf':
-                    pdf_link = link.get('@href')
-
-            # arXiv categories
-            categories = []
-            if 'category' in entry:
-                category_data = entry['category']
-                # Could be a list or a dict
-                if isinstance(category_data, list):
-                    categories = [cat['@term'] for cat in category_data]
-                elif isinstance(category_data, dict) and '@term' in category_data:
-                    categories = [category_data['@term']]
-
-            # Publication date
-            published_str = entry.get('published', None)
-            pub_date_obj = _safe_parse_arxiv_date(published_str)
-
-            paper = {
-                "title": title,
-                "abstract": summary,
-                "authors": authors,
-                "source": "arXiv",
-                "url": entry.get('id', ''),
-                "pdf_url": pdf_link,
-                "categories": categories,
-                "publication_date": pub_date_obj.isoformat() if pub_date_obj else None
-            }
-            results.append(paper)
+    # Stream the response into an incremental parser so entries are converted
+    # while the feed downloads (or is read back from the response cache) and
+    # memory holds about one entry at a time
+    with http_cache.get(base_url, params=params) as resp:
+        if resp.status_code != 200:
+            return results
+        parser = etree.XMLPullParser(events=("end",), tag=ATOM + "entry", resolve_entities=False, no_network=True)
+        for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+            parser.feed(chunk)
+            results.extend(_read_entries(parser))
+        parser.close()
+        results.extend(_read_entries(parser))
 
     return results
 
+def _read_entries(parser):
+    papers = []
+    for _, entry in parser.read_events():
+        papers.append(_parse_entry(entry))
+        # Free the handled entry and the ones before it
+        entry.clear(keep_tail=True)
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+    return papers
+
+def _text(element, default=""):
+    if element is None or element.text is None:
+        return default
+    return " ".join(element.text.split())
+
+def _parse_entry(entry):
+    authors = [_text(author.find(ATOM + "name"), "Unknown") for author in entry.iterfind(ATOM + "author")]
+
+    pdf_link = None
+    for link in entry.iterfind(ATOM + "link"):
+        if link.get("type") == "application/pdf":
+            pdf_link = link.get("href")
+
+    # arXiv categories
+    categories = [cat.get("term") for cat in entry.iterfind(ATOM + "category") if cat.get("term")]
+
+    # Publication date
+    pub_date_obj = _safe_parse_arxiv_date(_text(entry.find(ATOM + "published"), None))
+
+    return {
+        "title": _text(entry.find(ATOM + "title"), "No Title"),
+        "abstract": _text(entry.find(ATOM + "summary"), "No Abstract"),
+        "authors": authors,
+        "source": "arXiv",
+        "url": _text(entry.find(ATOM + "id")),
+        "pdf_url": pdf_link,
+        "categories": categories,
+        "publication_date": pub_date_obj.isoformat() if pub_date_obj else None
+    }
+
 def _safe_parse_arxiv_date(date_str):
     try:
         return datetime.datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ").date()
@@ -0,0 +1,252 @@
+"""
+Shared HTTP fetching for the scrapers: one pooled requests session and an
+on-disk response cache.
+
+Derived from Server/ReSearch/scraping/http_cache.py for the scripts here,
+which run without Django: configuration comes from environment variables
+instead of settings. Keep the key, file layout and header line in step with
+that module so both can share one HTTP_CACHE_DIR.
+
+A successful GET is stored in one file per URL (a JSON header line, then the
+body) under HTTP_CACHE_DIR, keyed without credential query parameters
+(CREDENTIAL_PARAMS) so API keys are never written to disk. The file's
+modification time is when the response was last confirmed. While younger
+than the TTL of its host (TTLS, else DEFAULT_TTL) an entry is returned
+without touching the network; an older one is revalidated with
+If-None-Match / If-Modified-Since and a 304 only refreshes its time. With
+HTTP_CACHE_OFFLINE=1 every request is answered from the cache and a miss
+raises CacheMiss, so tests can replay responses recorded by an earlier
+online run.
+
+Entries are never evicted on read; run ``python http_cache.py`` (or the
+server's ``manage.py prune_http_cache`` on a shared directory) to drop those
+older than HTTP_CACHE_MAX_AGE and then the oldest until the cache fits in
+HTTP_CACHE_MAX_BYTES.
+
+    with http_cache.get(url, params=params) as resp:
+        if resp.status_code == 200:
+            for chunk in resp.iter_content(chunk_size=65536):
+                ...
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "http_cache"))
+OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "0") == "1"
+DEFAULT_TTL = int(os.getenv("HTTP_CACHE_DEFAULT_TTL", 24 * 3600))
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 30 * 24 * 3600))
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+# Temporary files older than this belong to writers that died
+STALE_TMP_AGE = 3600
+# Seconds a cached response is used without revalidation, per host
+TTLS = {
+    "export.arxiv.org": 6 * 3600,
+    "arxiv.org": 30 * 24 * 3600,
+    "www.sciencedirect.com": 24 * 3600,
+    "api.elsevier.com": 24 * 3600,
+    "ieeexploreapi.ieee.org": 24 * 3600,
+}
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+# Query parameters (compared case-insensitively) left out of cache keys
+CREDENTIAL_PARAMS = frozenset({"apikey", "api_key", "access_token", "insttoken"})
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 60)
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+
+class CacheMiss(Exception):
+    """Offline mode and the URL is not cached."""
+
+
+def _is_credential(name):
+    return name.lower() in CREDENTIAL_PARAMS
+
+
+def _key(url, params):
+    # Credentials are left out: the key is stored in plain text in the header line
+    parts = urlsplit(url)
+    if parts.query:
+        pairs = parse_qsl(parts.query, keep_blank_values=True)
+        if any(_is_credential(name) for name, _ in pairs):
+            url = urlunsplit(parts._replace(query=urlencode([(k, v) for k, v in pairs if not _is_credential(k)])))
+    if params:
+        params = {k: v for k, v in dict(params).items() if not _is_credential(str(k))}
+    if not params:
+        return url
+    query = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    return f"{url}{'&' if urlsplit(url).query else '?'}{query}"
+
+
+def _path(key):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, digest[:2], digest)
+
+
+class CachedResponse:
+    """A response read back from the cache; mirrors the parts of requests.Response the scrapers use."""
+
+    status_code = 200
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            header = handle.readline()
+        meta = json.loads(header)
+        self.url = meta["url"]
+        self.headers = meta["headers"]
+        self._offset = len(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        with open(self.path, "rb") as handle:
+            handle.seek(self._offset)
+            while chunk := handle.read(chunk_size):
+                yield chunk
+
+    @property
+    def content(self):
+        return b"".join(self.iter_content())
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class RecordingResponse(CachedResponse):
+    """A live response that is written to the cache as its body is read."""
+
+    def __init__(self, response, key):
+        self._response = response
+        self.status_code = response.status_code
+        self.url = key
+        self.headers = {name: response.headers[name] for name in STORED_HEADERS if response.headers.get(name)}
+        self.path = _path(key)
+        self._recorded = False
+
+    def __exit__(self, *exc_info):
+        self._response.close()
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        if self._recorded:
+            yield from super().iter_content(chunk_size)
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                header = json.dumps({"url": self.url, "headers": self.headers}).encode("utf-8") + b"\n"
+                handle.write(header)
+                for chunk in self._response.iter_content(chunk_size):
+                    handle.write(chunk)
+                    yield chunk
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        # Read again from the cache file rather than keeping the body in memory
+        self._offset = len(header)
+        self._recorded = True
+
+    @property
+    def content(self):
+        if not self._recorded:
+            for _ in self.iter_content():
+                pass
+        return super().content
+
+
+def get(url, params=None, headers=None):
+    """
+    GET ``url`` through the cache. Returns a CachedResponse when the cached
+    copy is fresh or confirmed by a 304, a RecordingResponse for a new 200
+    and the plain requests.Response for anything else. Use as a context
+    manager when reading the body incrementally.
+    """
+    key = _key(url, params)
+    path = _path(key)
+    cached = CachedResponse(path) if os.path.exists(path) else None
+    if cached is not None:
+        age = time.time() - os.path.getmtime(path)
+        if OFFLINE or age < TTLS.get(urlsplit(url).hostname or "", DEFAULT_TTL):
+            return cached
+    if OFFLINE:
+        raise CacheMiss(key)
+
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cached.headers.get("etag"):
+            request_headers["If-None-Match"] = cached.headers["etag"]
+        if cached.headers.get("last-modified"):
+            request_headers["If-Modified-Since"] = cached.headers["last-modified"]
+    response = session.get(url, params=params, headers=request_headers, stream=True, timeout=TIMEOUT)
+    if response.status_code == 304 and cached is not None:
+        response.close()
+        os.utime(path)
+        return cached
+    if response.status_code != 200:
+        return response
+    return RecordingResponse(response, key)
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0
+    return 1
+
+
+def prune(max_age=MAX_AGE, max_bytes=MAX_BYTES):
+    """
+    Delete entries last confirmed more than ``max_age`` seconds ago, then the
+    oldest remaining ones until at most ``max_bytes`` are left, and abandoned
+    temporary files. Returns ``(removed, remaining_bytes)``.
+    """
+    now = time.time()
+    entries = []
+    removed = 0
+    for directory, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            age = now - stat.st_mtime
+            if age > max_age or (name.endswith(".tmp") and age > STALE_TMP_AGE):
+                removed += _unlink(path)
+            elif not name.endswith(".tmp"):
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        removed += _unlink(path)
+        total -= size
+    return removed, total
+
+
+if __name__ == "__main__":
+    removed, remaining = prune()
+    print(f"Removed {removed} cache files from {CACHE_DIR}; {remaining} bytes left")
@@ -1,59 +1,44 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import time
+from urllib.parse import quote_plus
 
-def scrape_ieee(query, max_results=5):
-    base_url = "https://ieeexplore.ieee.org"
-    search_url = f"{base_url}/search/searchresult.jsp?newsearch=true&queryText={query}"
+from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
 
-    results = []
+BASE_URL = "https://ieeexplore.ieee.org"
+SEARCH_URL = "{base_url}/search/searchresult.jsp?newsearch=true&queryText={query}"
+# Rendered by JavaScript; its presence means the result list is ready
+RESULTS_SELECTOR = "div.List-results-items"
+# Resource types that are not needed to read the result list
+BLOCKED_RESOURCES = {"image", "font", "stylesheet", "media"}
+POOL_SIZE = 3
+TIMEOUT_MS = 30000
 
-    with sync_playwright() as p:
-        # Launch a headless browser
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
-        # Go to the search results page
-        page.goto(search_url, timeout=60000)
-
-        # Wait a bit for JavaScript to load results
-        # Increase this if your internet is slow or the site is busy
-        time.sleep(3)
-        
-        # Optionally, wait for a specific selector (e.g., the search results container)
-        page.wait_for_selector("div.List-results-items")
-        
-        # Now get the rendered HTML
-        html_content = page.content()
-        browser.close()
-
-    # Parse with BeautifulSoup
+
+def parse_results(html_content, base_url=BASE_URL, max_results=5):
+    """Paper dicts from a rendered IEEE Xplore search results page."""
     soup = BeautifulSoup(html_content, "html.parser")
-    print(soup)
 
-    # Each result might appear as a <div class="List-results-items"> or 
+    # Each result might appear as a <div class="List-results-items"> or
     # <div class="List-results-items"> containing multiple <div class="List-results-item">
-    page.wait_for_selector("div.List-results-items", timeout=30000)
-
     items = soup.select("div.List-results-items > div.List-results-item")
 
-    for idx, item in enumerate(items, start=1):
-        if idx > max_results:
-            break
-        
+    results = []
+    for item in items[:max_results]:
         # Extract Title
         title_tag = item.select_one("h2.result-item-title > a")
         title = title_tag.get_text(strip=True) if title_tag else "No Title"
         link = title_tag["href"] if title_tag else ""
         full_link = base_url + link  # Combine with base URL
-        
+
         # Extract authors, if present (authors can appear in multiple ways on IEEE Xplore)
         authors = []
         authors_block = item.select_one("p.author")
         if authors_block:
             # E.g.: "G. Brown; E. Moore; T. Davis"
             authors_text = authors_block.get_text(strip=True)
-            # If you want a list:
             authors = [auth.strip() for auth in authors_text.split(";")]
 
         # Extract abstract snippet or publication info, if available
@@ -61,25 +46,136 @@ def scrape_ieee(query, max_results=5):
         abstract_block = item.select_one("div.description")
         if abstract_block:
             abstract_snippet = abstract_block.get_text(strip=True)
-        
-        # Build a data dictionary
-        paper_data = {
+
+        results.append({
             "title": title,
             "url": full_link,
             "authors": authors,
             "abstract_snippet": abstract_snippet,
             "source": "IEEE Xplore (Scraped)"
-        }
-        results.append(paper_data)
-
+        })
     return results
 
-# Usage Example
+
+class IEEEScraperPool:
+    """
+    One headless Chromium with ``size`` long-lived browser contexts, each with
+    a warm page. Queries run concurrently, one per free page; images, fonts,
+    CSS and media are never downloaded, and each query waits for the result
+    list to render instead of sleeping.
+
+        async with IEEEScraperPool(size=4) as pool:
+            results = await pool.scrape_many(["cardiology", "echocardiogram"])
+
+    ``search_url`` (with ``{base_url}`` and ``{query}`` placeholders) and
+    ``base_url`` can point the pool at locally served HTML fixtures.
+    """
+
+    def __init__(self, size=POOL_SIZE, base_url=BASE_URL, search_url=SEARCH_URL,
+                 headless=True, timeout=TIMEOUT_MS, blocked_resources=BLOCKED_RESOURCES):
+        self.size = size
+        self.base_url = base_url
+        self.search_url = search_url
+        self.headless = headless
+        self.timeout = timeout
+        self.blocked_resources = set(blocked_resources)
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._pages = None
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._pages = asyncio.Queue()
+            for _ in range(self.size):
+                context = await self._browser.new_context()
+                context.set_default_timeout(self.timeout)
+                await context.route("**/*", self._filter_request)
+                self._contexts.append(context)
+                await self._pages.put(await context.new_page())
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _filter_request(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def scrape(self, query, max_results=5):
+        """Results for one query; an empty list when no result list renders in time."""
+        url = self.search_url.format(base_url=self.base_url, query=quote_plus(query))
+        page = await self._pages.get()
+        try:
+            await page.goto(url, wait_until="domcontentloaded")
+            try:
+                await page.wait_for_selector(RESULTS_SELECTOR)
+            except PlaywrightTimeoutError:
+                print(f"No results rendered for {query!r} within {self.timeout} ms")
+                return []
+            html_content = await page.content()
+        finally:
+            await self._pages.put(page)
+        return parse_results(html_content, self.base_url, max_results)
+
+    async def scrape_many(self, queries, max_results=5):
+        """``{query: results}`` for all ``queries``, run ``size`` at a time."""
+        results = await asyncio.gather(*(self.scrape(query, max_results) for query in queries))
+        return dict(zip(queries, results))
+
+
+def scrape_ieee(query, max_results=5):
+    """Scrape one query with a single-context pool; prefer IEEEScraperPool for several."""
+    async def run():
+        async with IEEEScraperPool(size=1) as pool:
+            return await pool.scrape(query, max_results)
+    return asyncio.run(run())
+
+
+async def _main(args):
+    async with IEEEScraperPool(size=args.concurrency, base_url=args.base_url, search_url=args.search_url) as pool:
+        started = time.perf_counter()
+        results = await pool.scrape_many(args.queries, max_results=args.max_results)
+        elapsed = time.perf_counter() - started
+
+    for query, papers in results.items():
+        print(f"== {query}")
+        for idx, item in enumerate(papers, start=1):
+            print(f"{idx}. {item['title']}")
+            print(f"   Link: {item['url']}")
+            print(f"   Authors: {item['authors']}")
+            print(f"   Abstract snippet: {item['abstract_snippet'][:80]}...")
+            print("------------------------------------------------------")
+    print(f"{len(args.queries)} queries in {elapsed:.2f}s "
+          f"({len(args.queries) / elapsed:.2f} queries/s, concurrency {args.concurrency})")
+
+
+# Usage Example; to measure throughput against fixtures, serve a saved results page
+# with `python -m http.server` and pass
+#   --base-url http://127.0.0.1:8000 --search-url "{base_url}/results.html?q={query}"
 if __name__ == "__main__":
-    scraped_data = scrape_ieee("cardiology", max_results=5)
-    for idx, item in enumerate(scraped_data, start=1):
-        print(f"{idx}. {item['title']}")
-        print(f"   Link: {item['url']}")
-        print(f"   Authors: {item['authors']}")
-        print(f"   Abstract snippet: {item['abstract_snippet'][:80]}...")
-        print("------------------------------------------------------")
+    parser = argparse.ArgumentParser(description="Scrape IEEE Xplore search results with a browser pool")
+    parser.add_argument("queries", nargs="*", default=["cardiology"])
+    parser.add_argument("--concurrency", type=int, default=POOL_SIZE)
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--search-url", default=SEARCH_URL)
+    asyncio.run(_main(parser.parse_args()))
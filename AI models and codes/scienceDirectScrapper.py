@@ -1,4 +1,4 @@
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from datetime import date
 
@@ -17,7 +17,7 @@ def scrape_science_direct(query, max_results=5):
                       "(KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36"
     }
 
-    resp = requests.get(search_url, params=params, headers=headers)
+    resp = http_cache.get(search_url, params=params, headers=headers)
 
     print(resp.status_code)
     if resp.status_code != 200:
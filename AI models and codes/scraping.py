@@ -1,4 +1,4 @@
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
@@ -15,21 +15,21 @@ vector_store = FAISS.load_local("vector_store_index")  # Load or create an index
 def search_ieee(query, api_key):
     """Search IEEE Xplore API"""
     url = f"https://ieeexploreapi.ieee.org/api/v1/search/articles?querytext={query}&apikey={api_key}"
-    response = requests.get(url)
+    response = http_cache.get(url)
     return response.json().get("articles", [])
 
 
 def search_sciencedirect(query, api_key):
     """Search ScienceDirect API"""
     url = f"https://api.elsevier.com/content/search/scidir?query={query}&apiKey={api_key}"
-    response = requests.get(url)
+    response = http_cache.get(url)
     return response.json().get("search-results", {}).get("entry", [])
 
 
 def search_arxiv(query):
     """Scrape Arxiv for research papers"""
     url = f"https://export.arxiv.org/api/query?search_query={query}"
-    response = requests.get(url)
+    response = http_cache.get(url)
     soup = BeautifulSoup(response.content, "html.parser")
     papers = []
     for entry in soup.find_all("entry"):
@@ -0,0 +1,88 @@
+"""
+Tests for ieeescrapping against a locally served results page, so no request
+reaches IEEE Xplore. Run from this directory with ``python -m unittest``;
+they are skipped unless playwright (with Chromium installed) and bs4 are.
+"""
+import asyncio
+import functools
+import http.server
+import importlib.util
+import os
+import tempfile
+import threading
+import unittest
+
+MISSING = [name for name in ("bs4", "playwright") if importlib.util.find_spec(name) is None]
+
+RESULTS_PAGE = """<!DOCTYPE html>
+<html><head><link rel="stylesheet" href="/style.css"></head><body>
+<div id="app"></div>
+<script>
+  // The result list is rendered by JavaScript, like the real page
+  setTimeout(function () {
+    document.getElementById("app").innerHTML =
+      '<div class="List-results-items">' +
+      '<div class="List-results-item"><h2 class="result-item-title"><a href="/document/1">Echocardiogram segmentation</a></h2>' +
+      '<p class="author">G. Brown; E. Moore</p><div class="description">Left ventricle segmentation.</div></div>' +
+      '<div class="List-results-item"><h2 class="result-item-title"><a href="/document/2">Cardiac MRI</a></h2>' +
+      '<p class="author">T. Davis</p></div>' +
+      '</div>';
+  }, 50);
+</script>
+</body></html>
+"""
+
+
+@unittest.skipIf(MISSING, f"needs {', '.join(MISSING)}")
+class ParseResultsTests(unittest.TestCase):
+    def test_reads_title_link_authors_and_snippet(self):
+        from ieeescrapping import parse_results
+
+        html = (
+            '<div class="List-results-items"><div class="List-results-item">'
+            '<h2 class="result-item-title"><a href="/document/1">Echocardiogram segmentation</a></h2>'
+            '<p class="author">G. Brown; E. Moore</p><div class="description">Left ventricle.</div>'
+            '</div></div>'
+        )
+
+        self.assertEqual(parse_results(html, "http://fixture"), [{
+            "title": "Echocardiogram segmentation",
+            "url": "http://fixture/document/1",
+            "authors": ["G. Brown", "E. Moore"],
+            "abstract_snippet": "Left ventricle.",
+            "source": "IEEE Xplore (Scraped)",
+        }])
+
+
+@unittest.skipIf(MISSING, f"needs {', '.join(MISSING)}")
+class ScraperPoolTests(unittest.TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        with open(os.path.join(root, "results.html"), "w", encoding="utf-8") as handle:
+            handle.write(RESULTS_PAGE)
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=root)
+        handler.log_message = lambda *args: None
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def test_concurrent_queries_wait_for_the_rendered_results(self):
+        from ieeescrapping import IEEEScraperPool
+
+        async def run():
+            async with IEEEScraperPool(size=2, base_url=self.base_url,
+                                       search_url="{base_url}/results.html?q={query}") as pool:
+                return await pool.scrape_many(["cardiology", "echocardiogram", "mri"], max_results=5)
+
+        results = asyncio.run(run())
+
+        self.assertEqual(sorted(results), ["cardiology", "echocardiogram", "mri"])
+        for papers in results.values():
+            self.assertEqual([paper["title"] for paper in papers], ["Echocardiogram segmentation", "Cardiac MRI"])
+            self.assertEqual(papers[0]["url"], f"{self.base_url}/document/1")
+
+
+if __name__ == "__main__":
+    unittest.main()
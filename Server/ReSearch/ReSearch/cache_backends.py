@@ -0,0 +1,280 @@
+"""
+Two-tier Django cache backend.
+
+A bounded in-process LRU sits in front of a shared cache (Redis in
+production, any Django backend such as LocMemCache in tests). Repeated reads
+of hot keys are served from memory; the short local TTL bounds how long a
+process can see a value that another process has already replaced.
+
+``get_or_set`` additionally protects expensive computations:
+
+* single-flight: concurrent misses for one key run ``default`` once per
+  process (thread lock) and once across processes (an ``add``-based lock in
+  the shared tier); everyone else waits for, or keeps serving, the result.
+* probabilistic early refresh (XFetch): as an entry approaches expiry, a
+  request occasionally recomputes it ahead of time, weighted by how long the
+  last computation took, so hot keys never expire under load.
+
+The shared tier must implement ``add`` and ``incr`` atomically: the refresh
+lock, the task locks and debounce flags in scraping.tasks and the namespace
+generations in scraping.cache_utils all rely on it. Redis, Memcached and
+LocMemCache (within one process) do; FileBasedCache does not, since it
+checks for and writes the key file in separate steps, so two processes can
+both take a lock or lose an increment. Don't use it as the shared tier.
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+# Shared-tier envelope written by get_or_set so readers can schedule early refreshes
+_Entry = namedtuple('_Entry', ['value', 'expires_at', 'delta'])
+
+
+def _unwrap(stored):
+    if isinstance(stored, _Entry):
+        return stored.value, stored.expires_at, stored.delta
+    return stored, None, 0
+
+
+class _LocalTier:
+    """Per-process LRU of pickled values plus the per-key single-flight locks."""
+
+    def __init__(self, max_entries, max_value_size):
+        self.max_entries = max_entries
+        self.max_value_size = max_value_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            pickled, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+        # Values are stored pickled so callers can never mutate the cached copy
+        return True, pickle.loads(pickled)
+
+    def set(self, key, value, expires_at):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if len(pickled) > self.max_value_size:
+                self._data.pop(key, None)
+                return
+            self._data[key] = (pickled, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @contextmanager
+    def single_flight(self, key):
+        with self._lock:
+            lock, waiters = self._flights.get(key, (None, 0))
+            self._flights[key] = (lock or threading.Lock(), waiters + 1)
+            lock = self._flights[key][0]
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiters = self._flights[key]
+                if waiters == 1:
+                    del self._flights[key]
+                else:
+                    self._flights[key] = (lock, waiters - 1)
+
+
+# Cache backends are instantiated per thread; the local tier must be per process
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    ``LOCATION`` is the alias of the shared cache in ``settings.CACHES``.
+
+    OPTIONS:
+        LOCAL_MAX_ENTRIES      LRU capacity (default 1000)
+        LOCAL_MAX_VALUE_SIZE   larger pickled values skip the local tier (default 1 MiB)
+        LOCAL_TIMEOUT          max seconds a value lives locally (default 5)
+        LOCK_TIMEOUT           seconds a refresh lock is held / waited for (default 30)
+        LOCK_POLL_INTERVAL     seconds between polls while waiting (default 0.05)
+        EARLY_REFRESH_BETA     XFetch eagerness, 0 disables early refresh (default 1.0)
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        self.local_timeout = float(options.pop('LOCAL_TIMEOUT', 5))
+        self.lock_timeout = float(options.pop('LOCK_TIMEOUT', 30))
+        self.lock_poll_interval = float(options.pop('LOCK_POLL_INTERVAL', 0.05))
+        self.early_refresh_beta = float(options.pop('EARLY_REFRESH_BETA', 1.0))
+        max_entries = int(options.pop('LOCAL_MAX_ENTRIES', 1000))
+        max_value_size = int(options.pop('LOCAL_MAX_VALUE_SIZE', 1024 * 1024))
+        super().__init__({**params, 'OPTIONS': options})
+
+        self._shared_alias = location
+        with _local_tiers_lock:
+            if location not in _local_tiers:
+                _local_tiers[location] = _LocalTier(max_entries, max_value_size)
+            self._local = _local_tiers[location]
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_key(self, key, version):
+        return self.shared.make_key(key, version=version)
+
+    def _resolve_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _remember(self, local_key, value, expires_at):
+        local_expiry = time.time() + self.local_timeout
+        if expires_at is not None:
+            local_expiry = min(local_expiry, expires_at)
+        self._local.set(local_key, value, local_expiry)
+
+    def _expires_at(self, timeout):
+        return None if timeout is None else time.time() + timeout
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added and timeout:
+            self._remember(self._local_key(key, version), value, self._expires_at(timeout))
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        hit, value = self._local.get(local_key)
+        if hit:
+            return value
+        stored = self.shared.get(key, _MISSING, version=version)
+        if stored is _MISSING:
+            return default
+        value, expires_at, _ = _unwrap(stored)
+        self._remember(local_key, value, expires_at)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        local_key = self._local_key(key, version)
+        self.shared.set(key, value, timeout, version=version)
+        if timeout is not None and timeout <= 0:
+            self._local.delete(local_key)
+        else:
+            self._remember(local_key, value, self._expires_at(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.touch(key, self._resolve_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        hit, _ = self._local.get(self._local_key(key, version))
+        return hit or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters must stay atomic, so they always go to the shared tier
+        self._local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        return self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        local_key = self._local_key(key, version)
+        hit, value = self._local.get(local_key)
+        if hit:
+            return value
+
+        stale = _MISSING
+        stored = self.shared.get(key, _MISSING, version=version)
+        if stored is not _MISSING:
+            value, expires_at, delta = _unwrap(stored)
+            if not self._should_refresh_early(expires_at, delta):
+                self._remember(local_key, value, expires_at)
+                return value
+            stale = value
+
+        with self._local.single_flight(local_key):
+            # Another thread in this process may have refreshed it while we waited
+            hit, value = self._local.get(local_key)
+            if hit:
+                return value
+
+            lock_key = f'{key}:refresh-lock'
+            if self.shared.add(lock_key, 1, self.lock_timeout, version=version):
+                try:
+                    return self._compute(key, local_key, default, timeout, version)
+                finally:
+                    self.shared.delete(lock_key, version=version)
+
+            if stale is not _MISSING:
+                # Someone else is already refreshing; keep serving the current value
+                return stale
+            return self._wait_for(key, local_key, lock_key, default, timeout, version)
+
+    def _should_refresh_early(self, expires_at, delta):
+        if expires_at is None or delta <= 0 or self.early_refresh_beta <= 0:
+            return False
+        # 1 - random() is in (0, 1], so the log is always defined
+        jitter = -delta * self.early_refresh_beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= expires_at
+
+    def _compute(self, key, local_key, default, timeout, version):
+        started = time.monotonic()
+        value = default() if callable(default) else default
+        delta = time.monotonic() - started
+        if timeout is not None and timeout <= 0:
+            return value
+        expires_at = self._expires_at(timeout)
+        self.shared.set(key, _Entry(value, expires_at, delta), timeout, version=version)
+        self._remember(local_key, value, expires_at)
+        return value
+
+    def _wait_for(self, key, local_key, lock_key, default, timeout, version):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            stored = self.shared.get(key, _MISSING, version=version)
+            if stored is not _MISSING:
+                value, expires_at, _ = _unwrap(stored)
+                self._remember(local_key, value, expires_at)
+                return value
+            if not self.shared.has_key(lock_key, version=version):
+                break
+        # The holder failed or timed out; compute it ourselves rather than fail
+        return self._compute(key, local_key, default, timeout, version)
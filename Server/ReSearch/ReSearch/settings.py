@@ -4,6 +4,7 @@ Django settings for ReSearch project.
 
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 import os
 # from dotenv import load_dotenv
 
@@ -19,6 +20,36 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Add upload directory path
 UPLOAD_DIR = os.path.join(BASE_DIR, 'uploads')
 FissIndex = os.path.join(BASE_DIR, 'fissIndex')
+# Versioned recommendation paper index (scraping.paper_index)
+PAPER_INDEX_DIR = os.getenv('PAPER_INDEX_DIR', os.path.join(BASE_DIR, 'fissIndex', 'paper_index'))
+# Sentence embedding store shared by recommendations and semantic search (scraping.embeddings)
+PAPER_EMBEDDINGS_DIR = os.getenv('PAPER_EMBEDDINGS_DIR', os.path.join(BASE_DIR, 'fissIndex', 'embeddings'))
+# 'hashing' (stateless, streamed) or 'tfidf' (vocabulary fitted in memory) for the paper index
+PAPER_INDEX_VECTORIZER = os.getenv('PAPER_INDEX_VECTORIZER', 'hashing')
+# Sentence-transformers model for the shared paper embedding store; changing it re-embeds everything
+PAPER_EMBEDDING_MODEL = os.getenv('PAPER_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+# Paper harvesters; point ARXIV_API_URL at a local fixture server to test without arXiv
+ARXIV_API_URL = os.getenv('ARXIV_API_URL', 'https://export.arxiv.org/api/query')
+HARVESTER_USER_AGENT = os.getenv('HARVESTER_USER_AGENT', 'ReSearch-harvester/1.0')
+ARXIV_OAI_URL = os.getenv('ARXIV_OAI_URL', 'https://oaipmh.arxiv.org/oai')
+# OAI-PMH sets pulled by the daily incremental harvest, e.g. "cs,stat"
+ARXIV_OAI_SETS = [s for s in os.getenv('ARXIV_OAI_SETS', 'cs').split(',') if s]
+# On-disk HTTP response cache for harvesters, scrapers and PDF downloads (scraping.http_cache).
+# Entries are served for their host's TTL in seconds, then revalidated; HTTP_CACHE_OFFLINE=True
+# answers everything from the cache (tests replaying recorded responses)
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', os.path.join(BASE_DIR, 'http_cache'))
+HTTP_CACHE_DEFAULT_TTL = int(os.getenv('HTTP_CACHE_DEFAULT_TTL', 24 * 3600))
+HTTP_CACHE_TTLS = {
+    'export.arxiv.org': 6 * 3600,
+    'oaipmh.arxiv.org': 6 * 3600,
+    # Versioned arXiv PDFs and abstract pages rarely change
+    'arxiv.org': 30 * 24 * 3600,
+}
+HTTP_CACHE_OFFLINE = os.getenv('HTTP_CACHE_OFFLINE', 'False') == 'True'
+# Nightly pruning drops entries not confirmed for HTTP_CACHE_MAX_AGE seconds, then the
+# least recently confirmed ones until the cache fits in HTTP_CACHE_MAX_BYTES
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 30 * 24 * 3600))
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', 2 * 1024 ** 3))
 # SECURITY WARNING: keep the secret key used in production secret!
 # SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'your-development-key')
 
@@ -90,17 +121,55 @@ CHANNEL_LAYERS = {
 }
 
 
+# In-process LRU in front of a shared cache; 'shared' is what other processes see
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-        'LOCATION': BASE_DIR / 'django_cache',
-    }
+        'BACKEND': 'ReSearch.cache_backends.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'LOCK_TIMEOUT': 30,
+        },
+    },
+    # add/incr must be atomic (locks, debounce flags, generation counters), which
+    # FileBasedCache's are not. LocMemCache only shares them within one process, so
+    # in DEBUG a separate Celery worker does not see the web process's flags.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'research-shared',
+    } if DEBUG else {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    },
 }
 # Celery configuration
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"  # Redis as the message broker
 CELERY_ACCEPT_CONTENT = ['json']  # Content type for tasks
 CELERY_TASK_SERIALIZER = 'json'  # Serialization format
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL  # Use Redis for task results
+CELERY_BEAT_SCHEDULE = {
+    'rebuild-paper-index': {
+        'task': 'scraping.tasks.rebuild_paper_index',
+        'schedule': crontab(hour=3, minute=0),  # Nightly full refit: folds in the sync delta and refreshes IDF weights
+    },
+    'refresh-user-recommendations': {
+        'task': 'scraping.tasks.refresh_user_recommendations',
+        'schedule': crontab(minute='*/15'),  # Picks up lists that are dirty or older than a day
+    },
+    'update-paper-embeddings': {
+        'task': 'scraping.tasks.update_paper_embeddings',
+        'schedule': crontab(hour=2, minute=30),  # Catches deletions and writes that bypassed signals
+    },
+    'harvest-arxiv-oai': {
+        'task': 'scraping.tasks.harvest_arxiv_oai',
+        'schedule': crontab(hour=1, minute=0),  # Daily incremental pull of new and updated arXiv records
+    },
+    'prune-http-cache': {
+        'task': 'scraping.tasks.prune_http_cache',
+        'schedule': crontab(hour=4, minute=0),  # Keeps cached downloads within their age and size limits
+    },
+}
 CELERY_TIMEZONE = 'UTC'  # Match the Django timezone
 
 
@@ -27,6 +27,7 @@ import base64
 import json
 from django.conf import settings
 from dotenv import load_dotenv
+from scraping import http_cache
 
 load_dotenv()
 
@@ -64,15 +65,15 @@ class PDFProcessor:
             str: Path to temporary file
         """
         try:
-            response = requests.get(self.pdf_source, stream=True)
-            response.raise_for_status()
-            
+            # Served from the shared response cache when this PDF was fetched before
+            response = http_cache.fetch(self.pdf_source)
+
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-            temp_file.write(response.content)
+            response.copy_to(temp_file)
             temp_file.close()
             
             return temp_file.name
-        except requests.RequestException as e:
+        except (requests.RequestException, http_cache.CacheMiss) as e:
             raise ValueError(f"Failed to download PDF from URL: {str(e)}")
 
     def extract_text(self) -> str:
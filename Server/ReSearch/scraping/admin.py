@@ -3,7 +3,8 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Count, Q
 from django import forms
-from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from django.db import transaction
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper, adjust_active_bookmarks
 import json
 
 class ResearchPaperForm(forms.ModelForm):
@@ -62,7 +63,7 @@ class ResearchPaperAdmin(admin.ModelAdmin):
     list_filter = ['source', 'publication_date', 'created_at']
     search_fields = ['title', 'abstract']
     date_hierarchy = 'publication_date'
-    readonly_fields = ['created_at', 'bookmarks_preview']
+    readonly_fields = ['created_at', 'bookmarks_preview', 'active_bookmarks_count']
 
     fieldsets = (
         ('Basic Information', {
@@ -78,22 +79,13 @@ class ResearchPaperAdmin(admin.ModelAdmin):
             'fields': ('categories_text',)
         }),
         ('Statistics', {
-            'fields': ('citation_count', 'average_reading_time')
+            'fields': ('citation_count', 'average_reading_time', 'active_bookmarks_count')
         }),
         ('Bookmarks', {
             'fields': ('bookmarks_preview',)
         })
     )
     
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(
-            active_bookmarks_count=Count(
-                'paper_bookmarks',
-                filter=Q(paper_bookmarks__is_active=True)
-            )
-        )
-
     def formatted_authors(self, obj):
         if isinstance(obj.authors, str):
             try:
@@ -167,6 +159,41 @@ class BookmarkedPaperAdmin(admin.ModelAdmin):
         return '-'
     notes_preview.short_description = 'Notes Preview'
 
+    actions = ['mark_active', 'mark_inactive']
+
+    def _set_active(self, queryset, is_active):
+        # Only touch rows that actually change state so the paper counters stay exact
+        with transaction.atomic():
+            changed = queryset.select_for_update().exclude(is_active=is_active)
+            per_paper = dict(
+                changed.order_by().values_list('paper_id').annotate(total=Count('id'))
+            )
+            updated = BookmarkedPaper.objects.filter(
+                pk__in=list(changed.values_list('pk', flat=True))
+            ).update(is_active=is_active)
+            for paper_id, total in per_paper.items():
+                adjust_active_bookmarks(paper_id, total if is_active else -total)
+        return updated
+
+    def mark_active(self, request, queryset):
+        updated = self._set_active(queryset, True)
+        self.message_user(request, f'{updated} bookmarks marked as active.')
+    mark_active.short_description = "Mark selected bookmarks as active"
+
+    def mark_inactive(self, request, queryset):
+        updated = self._set_active(queryset, False)
+        self.message_user(request, f'{updated} bookmarks marked as inactive.')
+    mark_inactive.short_description = "Mark selected bookmarks as inactive"
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            per_paper = dict(
+                queryset.filter(is_active=True).order_by().values_list('paper_id').annotate(total=Count('id'))
+            )
+            queryset.delete()
+            for paper_id, total in per_paper.items():
+                adjust_active_bookmarks(paper_id, -total)
+
 class ResearchPaperCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'icon', 'created_by_email', 'active_likes_count', 'created_at']
     list_filter = ['created_at', 'updated_at']
@@ -0,0 +1,197 @@
+"""
+Parsing of arXiv API (Atom) and OAI-PMH (``metadataPrefix=arXiv``)
+responses into paper dicts accepted by scraping.ingest.
+
+The parsers are incremental: bytes are fed in as they download and every
+completed ``<entry>``/``<record>`` is converted and then cleared, together
+with the siblings already handled, so memory stays at about one entry
+however large the response is.
+"""
+from datetime import datetime
+
+from lxml import etree
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+OAI = '{http://www.openarchives.org/OAI/2.0/}'
+OAI_ARXIV = '{http://arxiv.org/OAI/arXiv/}'
+
+SOURCE = 'arXiv'
+
+
+class ArxivApiError(Exception):
+    """The API answered with an error feed instead of results."""
+
+
+class OaiError(Exception):
+    """An OAI-PMH ``<error>`` response other than an empty result."""
+
+    def __init__(self, code, message):
+        super().__init__(f'{code}: {message}')
+        self.code = code
+
+
+def _text(element):
+    return ' '.join((element.text or '').split()) if element is not None else ''
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_entry(entry):
+    """Paper dict for one Atom ``<entry>`` element."""
+    entry_id = _text(entry.find(f'{ATOM}id'))
+    if '/api/errors' in entry_id:
+        raise ArxivApiError(_text(entry.find(f'{ATOM}summary')) or entry_id)
+
+    pdf_url = None
+    for link in entry.iterfind(f'{ATOM}link'):
+        if link.get('type') == 'application/pdf' or link.get('title') == 'pdf':
+            pdf_url = link.get('href')
+            break
+
+    return {
+        'title': _text(entry.find(f'{ATOM}title')),
+        'abstract': _text(entry.find(f'{ATOM}summary')),
+        'authors': [_text(author.find(f'{ATOM}name')) for author in entry.iterfind(f'{ATOM}author')],
+        'source': SOURCE,
+        'url': entry_id,
+        'pdf_url': pdf_url,
+        'categories': [category.get('term') for category in entry.iterfind(f'{ATOM}category') if category.get('term')],
+        'publication_date': _date(_text(entry.find(f'{ATOM}published'))),
+    }
+
+
+def _release(element):
+    """Free a handled element and the already handled siblings before it."""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+class _StreamParser:
+    """Feeds bytes to an lxml pull parser and converts each completed element of interest."""
+
+    tags = ()
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=('end',), tag=self.tags, resolve_entities=False, no_network=True
+        )
+
+    def feed(self, data):
+        """Items completed by ``data``."""
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self):
+        """Items completed by the end of the document."""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        items = []
+        for _, element in self._parser.read_events():
+            item = self.handle(element)
+            if item is not None:
+                items.append(item)
+            _release(element)
+        return items
+
+    def handle(self, element):
+        raise NotImplementedError
+
+
+class AtomFeedParser(_StreamParser):
+    """API responses: yields paper dicts and records ``total_results``."""
+
+    tags = (f'{ATOM}entry', f'{OPENSEARCH}totalResults')
+
+    def __init__(self):
+        super().__init__()
+        self.total_results = None
+
+    def handle(self, element):
+        if element.tag == f'{ATOM}entry':
+            return parse_entry(element)
+        if element.text:
+            self.total_results = int(element.text)
+        return None
+
+
+def parse_feed(content):
+    """``(total_results, papers)`` for a complete API response body."""
+    parser = AtomFeedParser()
+    papers = parser.feed(content) + parser.close()
+    return parser.total_results, papers
+
+
+def parse_oai_record(record):
+    """
+    ``(datestamp, paper)`` for one OAI ``<record>``; ``paper`` is None for
+    deleted records.
+    """
+    header = record.find(f'{OAI}header')
+    datestamp = _text(header.find(f'{OAI}datestamp'))
+    metadata = record.find(f'{OAI}metadata/{OAI_ARXIV}arXiv')
+    if header.get('status') == 'deleted' or metadata is None:
+        return datestamp, None
+
+    arxiv_id = _text(metadata.find(f'{OAI_ARXIV}id'))
+    authors = []
+    for author in metadata.iterfind(f'{OAI_ARXIV}authors/{OAI_ARXIV}author'):
+        name = ' '.join(filter(None, (
+            _text(author.find(f'{OAI_ARXIV}forenames')),
+            _text(author.find(f'{OAI_ARXIV}keyname')),
+            _text(author.find(f'{OAI_ARXIV}suffix')),
+        )))
+        if name:
+            authors.append(name)
+
+    return datestamp, {
+        'title': _text(metadata.find(f'{OAI_ARXIV}title')),
+        'abstract': _text(metadata.find(f'{OAI_ARXIV}abstract')),
+        'authors': authors,
+        'source': SOURCE,
+        'url': f'https://arxiv.org/abs/{arxiv_id}',
+        'pdf_url': f'https://arxiv.org/pdf/{arxiv_id}',
+        'categories': _text(metadata.find(f'{OAI_ARXIV}categories')).split(),
+        'publication_date': _text(metadata.find(f'{OAI_ARXIV}created')) or None,
+    }
+
+
+class OaiListParser(_StreamParser):
+    """
+    ListRecords responses: yields ``(datestamp, paper)`` pairs and records the
+    ``resumption_token`` (empty on the last page). ``noRecordsMatch`` is an
+    empty list; other OAI errors raise OaiError.
+    """
+
+    tags = (f'{OAI}record', f'{OAI}resumptionToken', f'{OAI}error')
+
+    def __init__(self):
+        super().__init__()
+        self.resumption_token = ''
+
+    def handle(self, element):
+        if element.tag == f'{OAI}record':
+            return parse_oai_record(element)
+        if element.tag == f'{OAI}resumptionToken':
+            self.resumption_token = _text(element)
+        elif element.get('code') != 'noRecordsMatch':
+            raise OaiError(element.get('code'), _text(element))
+        return None
+
+
+def parse_oai_response(content):
+    """``(records, resumption_token)`` for a complete ListRecords response."""
+    parser = OaiListParser()
+    records = parser.feed(content) + parser.close()
+    return records, parser.resumption_token
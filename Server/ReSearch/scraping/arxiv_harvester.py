@@ -0,0 +1,178 @@
+"""
+Concurrent, resumable harvesting of arXiv API search results into
+ResearchPaper.
+
+A date range is split into submission-date windows that are harvested in
+order. Inside a window, up to ``concurrency`` result pages are downloaded at
+once (the per-host rate limit in scraping.fetching still spaces the request
+starts) and each page is upserted through scraping.ingest as soon as every
+page before it has been. After each page the HarvestCheckpoint records the
+window and the next offset, so an interrupted run resumes at the first page
+that was not stored.
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .arxiv_feed import AtomFeedParser
+from .fetching import PoliteClient
+from .ingest import IngestError, ingest_papers
+from .models import HarvestCheckpoint
+
+logger = logging.getLogger(__name__)
+
+SOURCE = 'arxiv-api'
+PAGE_SIZE = 500
+CONCURRENCY = 4
+WINDOW_DAYS = 7
+# arXiv's terms of use ask for no more than one request every three seconds
+REQUEST_INTERVAL = 3.0
+# The API sometimes returns an empty page inside a result set; ask again this many times
+EMPTY_PAGE_RETRIES = 3
+
+
+def api_url():
+    return getattr(settings, 'ARXIV_API_URL', 'https://export.arxiv.org/api/query')
+
+
+def date_windows(start, end, days):
+    """Consecutive ``(first, last)`` date windows covering ``start``..``end`` inclusive."""
+    while start <= end:
+        last = min(start + timedelta(days=days - 1), end)
+        yield start, last
+        start = last + timedelta(days=1)
+
+
+def window_query(query, first, last):
+    return f"({query}) AND submittedDate:[{first:%Y%m%d}0000 TO {last:%Y%m%d}2359]"
+
+
+def ingest_page(papers):
+    """Upsert a page of papers, dropping (and logging) entries that fail validation."""
+    if not papers:
+        return 0
+    try:
+        ingest_papers(papers)
+        return len(papers)
+    except IngestError as e:
+        invalid = {position for position in e.errors if isinstance(position, int)}
+        if not invalid:
+            raise
+        logger.warning(f"Skipping {len(invalid)} invalid arXiv entries: {e.errors}")
+        valid = [paper for position, paper in enumerate(papers) if position not in invalid]
+        if valid:
+            ingest_papers(valid)
+        return len(valid)
+
+
+class ArxivHarvester:
+    def __init__(self, client, page_size=PAGE_SIZE, concurrency=CONCURRENCY):
+        self.client = client
+        self.page_size = page_size
+        self.concurrency = concurrency
+
+    async def fetch_page(self, search_query, offset):
+        """``(total_results, papers)`` for one result page."""
+        params = {
+            'search_query': search_query,
+            'start': offset,
+            'max_results': self.page_size,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'ascending',
+        }
+        for attempt in range(EMPTY_PAGE_RETRIES + 1):
+            # A retry must not be answered by the cached empty page
+            parser, papers = await self.client.parse(api_url(), params, AtomFeedParser, revalidate=attempt > 0)
+            total = parser.total_results
+            if papers or total is None or offset >= total or attempt == EMPTY_PAGE_RETRIES:
+                return total, papers
+            logger.info(f"Empty arXiv page at offset {offset} of {total}; retrying")
+
+    async def pages(self, search_query, offset):
+        """``(offset, total, papers)`` for every page from ``offset`` on, in order."""
+        total, papers = await self.fetch_page(search_query, offset)
+        yield offset, total, papers
+        next_offset = offset + self.page_size
+        pending = deque()
+        while pending or (total is not None and next_offset < total):
+            while len(pending) < self.concurrency and total is not None and next_offset < total:
+                pending.append((next_offset, asyncio.ensure_future(self.fetch_page(search_query, next_offset))))
+                next_offset += self.page_size
+            page_offset, task = pending.popleft()
+            try:
+                _, papers = await task
+            except BaseException:
+                for _, other in pending:
+                    other.cancel()
+                raise
+            yield page_offset, total, papers
+
+
+@sync_to_async
+def _load_checkpoint(query, restart):
+    checkpoint, _ = HarvestCheckpoint.objects.get_or_create(source=SOURCE, query=query)
+    if restart:
+        checkpoint.window_start = checkpoint.window_end = None
+        checkpoint.next_offset = checkpoint.harvested_count = 0
+        checkpoint.total_results = checkpoint.completed_at = None
+        checkpoint.save()
+    return checkpoint
+
+
+@sync_to_async
+def _store_page(checkpoint, papers, window, next_offset, total):
+    stored = ingest_page(papers)
+    checkpoint.window_start, checkpoint.window_end = window
+    checkpoint.next_offset = next_offset
+    checkpoint.total_results = total
+    checkpoint.harvested_count += stored
+    checkpoint.completed_at = None
+    checkpoint.save()
+    return stored
+
+
+@sync_to_async
+def _finish(checkpoint, end):
+    # Later runs over a longer range continue from the day after this one
+    checkpoint.window_start = checkpoint.window_end = end + timedelta(days=1)
+    checkpoint.next_offset = 0
+    checkpoint.total_results = None
+    checkpoint.completed_at = timezone.now()
+    checkpoint.save()
+
+
+async def harvest_arxiv(query, start: date, end: date, window_days=WINDOW_DAYS, page_size=PAGE_SIZE,
+                        concurrency=CONCURRENCY, restart=False, interval=REQUEST_INTERVAL):
+    """
+    Harvest every paper matching ``query`` submitted between ``start`` and
+    ``end`` (inclusive), resuming from the checkpoint for ``query`` unless
+    ``restart``. Returns the number of papers stored by this run.
+    """
+    checkpoint = await _load_checkpoint(query, restart)
+    resume_from, offset = start, 0
+    if checkpoint.window_start and start <= checkpoint.window_start:
+        resume_from, offset = checkpoint.window_start, checkpoint.next_offset
+        if resume_from > end:
+            logger.info(f"arXiv harvest for {query!r} already covers {start}..{end}")
+            return 0
+        logger.info(f"Resuming arXiv harvest for {query!r} at {resume_from} offset {offset}")
+
+    stored = 0
+    async with PoliteClient(interval=interval) as client:
+        harvester = ArxivHarvester(client, page_size=page_size, concurrency=concurrency)
+        for window in date_windows(resume_from, end, window_days):
+            if window[0] != resume_from:
+                offset = 0
+            search_query = window_query(query, *window)
+            async for page_offset, total, papers in harvester.pages(search_query, offset):
+                stored += await _store_page(
+                    checkpoint, papers, window, page_offset + page_size, total
+                )
+            logger.info(f"Harvested arXiv window {window[0]}..{window[1]} for {query!r}")
+    await _finish(checkpoint, end)
+    return stored
@@ -0,0 +1,52 @@
+"""
+Generation-numbered cache namespaces.
+
+Every key in a namespace embeds the namespace's current generation, so
+invalidating the whole namespace is a single counter bump: entries of older
+generations are simply never read again and expire on their own timeout.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+PAPER_LIST_NAMESPACE = 'research_papers'
+
+
+def _generation_key(namespace):
+    return f'cache_generation:{namespace}'
+
+
+def _fresh_generation():
+    # Seeded from the clock so a lost counter can never resurrect an old generation
+    return int(time.time() * 1000)
+
+
+def get_generation(namespace):
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(namespace):
+    """Invalidate every key in ``namespace`` in O(1)."""
+    key = _generation_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _fresh_generation(), timeout=None)
+        return cache.incr(key)
+
+
+def namespaced_key(namespace, *parts):
+    return ':'.join([namespace, str(get_generation(namespace)), *map(str, parts)])
+
+
+def query_params_digest(query_params):
+    """Stable digest of a QueryDict, independent of parameter order."""
+    encoded = urlencode(sorted(query_params.lists()), doseq=True)
+    return hashlib.md5(encoded.encode('utf-8')).hexdigest()
@@ -0,0 +1,136 @@
+"""
+Keeps the PaperCategory junction table and the CategoryPaperCount histogram
+in sync with ResearchPaper.categories, and provides the category filters
+used by the paper listing views.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import PaperCategory, CategoryPaperCount, ResearchPaper
+
+SYNC_FIELDS = {'categories', 'publication_date'}
+
+
+def normalize_category(name):
+    return ' '.join(str(name).split()).lower()
+
+
+def paper_categories(categories):
+    """Normalized, de-duplicated category names for a JSON categories value."""
+    if not categories:
+        return set()
+    if isinstance(categories, str):
+        categories = [categories]
+    normalized = (normalize_category(category) for category in categories)
+    return {category for category in normalized if category}
+
+
+def sync_paper_categories(papers):
+    """
+    Reconcile PaperCategory rows for ``papers`` with their JSON categories.
+
+    Works on any number of papers with a fixed number of queries so it can be
+    used from post_save as well as from bulk ingestion. The papers are locked
+    first, so concurrent syncs of one paper each see the links the other
+    left and the histogram deltas match the rows actually written.
+    """
+    papers = [paper for paper in papers if paper.pk]
+    if not papers:
+        return
+    paper_ids = [paper.pk for paper in papers]
+
+    with transaction.atomic():
+        list(ResearchPaper.objects.select_for_update().filter(pk__in=paper_ids).values_list('pk', flat=True))
+        existing = {}
+        links = PaperCategory.objects.filter(
+            paper_id__in=paper_ids
+        ).values_list('id', 'paper_id', 'category', 'publication_date')
+        for link_id, paper_id, category, publication_date in links:
+            existing.setdefault(paper_id, {})[category] = (link_id, publication_date)
+
+        to_create = []
+        to_delete = []
+        stale_dates = {}
+        deltas = Counter()
+        for paper in papers:
+            current = existing.get(paper.pk, {})
+            wanted = paper_categories(paper.categories)
+            for category in wanted - current.keys():
+                to_create.append(PaperCategory(
+                    paper_id=paper.pk,
+                    category=category,
+                    publication_date=paper.publication_date
+                ))
+                deltas[category] += 1
+            for category, (link_id, publication_date) in current.items():
+                if category not in wanted:
+                    to_delete.append(link_id)
+                    deltas[category] -= 1
+                elif publication_date != paper.publication_date:
+                    stale_dates.setdefault(paper.publication_date, []).append(link_id)
+
+        if to_delete:
+            PaperCategory.objects.filter(id__in=to_delete).delete()
+        for publication_date, link_ids in stale_dates.items():
+            PaperCategory.objects.filter(id__in=link_ids).update(publication_date=publication_date)
+        if to_create:
+            # No ignore_conflicts: a link this sync did not see must fail loudly, not skew the counts
+            PaperCategory.objects.bulk_create(to_create)
+        adjust_category_counts(deltas)
+
+
+def remove_paper_categories(papers):
+    """
+    Take papers that are being deleted out of the category histogram. Runs
+    before the delete, counting the links that are about to cascade away.
+    """
+    categories = PaperCategory.objects.select_for_update().filter(
+        paper_id__in=[paper.pk for paper in papers]
+    ).values_list('category', flat=True)
+    adjust_category_counts({category: -total for category, total in Counter(categories).items()})
+
+
+def rebuild_category_counts():
+    """Recompute CategoryPaperCount from the PaperCategory links."""
+    counts = PaperCategory.objects.order_by().values('category').annotate(total=Count('id'))
+    rows = [CategoryPaperCount(category=row['category'], paper_count=row['total']) for row in counts]
+    with transaction.atomic():
+        CategoryPaperCount.objects.all().delete()
+        CategoryPaperCount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def adjust_category_counts(deltas):
+    """Apply ``{category: delta}`` to CategoryPaperCount with one UPDATE per distinct delta."""
+    deltas = {category: delta for category, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    by_delta = defaultdict(list)
+    for category, delta in deltas.items():
+        by_delta[delta].append(category)
+
+    with transaction.atomic():
+        CategoryPaperCount.objects.bulk_create(
+            [CategoryPaperCount(category=category) for category in deltas],
+            ignore_conflicts=True
+        )
+        for delta, categories in by_delta.items():
+            CategoryPaperCount.objects.filter(category__in=categories).update(
+                paper_count=Greatest(F('paper_count') + delta, 0)
+            )
+
+
+def filter_by_categories(queryset, categories):
+    """Restrict a queryset to papers in any of ``categories`` using the junction table."""
+    wanted = paper_categories(categories)
+    if not wanted:
+        return queryset
+    if len(wanted) == 1:
+        # One category can match at most one link per paper, so a join is safe
+        return queryset.filter(category_links__category=wanted.pop())
+    return queryset.filter(
+        id__in=PaperCategory.objects.filter(category__in=wanted).values('paper_id')
+    )
@@ -0,0 +1,425 @@
+"""
+Dense sentence embeddings of paper titles and abstracts, shared by the
+recommendation engine and semantic search.
+
+Vectors live under ``settings.PAPER_EMBEDDINGS_DIR`` as one float16 matrix
+in a flat file that every process memory-maps, row-aligned with a
+``paper_ids.npy`` array and the content hash each row was encoded from.
+``update_embeddings`` streams the corpus, re-encodes (in large CPU batches)
+only papers whose title or abstract hash changed, overwrites or appends
+their rows, and tombstones rows of deleted papers. Id and hash files are
+replaced atomically after the vectors are written, so readers never see an
+id without its vector. Rows past the last id, left by a run that died
+before saving them, are cut off when the next run starts; otherwise the
+vector file only grows, except when compaction or a model change rewrites
+it under a new inode.
+
+Each update also refreshes an HNSW index over the store rows for
+approximate nearest-neighbour search. New rows are appended to it; it is
+rebuilt after compaction or once too many rows were re-encoded in place,
+since HNSW cannot replace a vector. Every generation writes a new index
+file named in ``meta.json``, so readers always pair it with matching rows.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+import faiss
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+# Papers fetched from the database and hashed per chunk
+CHUNK_SIZE = 2000
+# Sentences per forward pass; large batches amortize the per-call overhead on CPU
+ENCODE_BATCH_SIZE = 256
+# Rewrite the vector file once this share of rows belongs to deleted papers
+COMPACT_RATIO = 0.25
+CHECK_INTERVAL = 5.0
+
+# HNSW graph degree and build-time beam width; vectors are kept as fp16 like the store
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+# Rebuild the ANN index once this share of its rows holds outdated vectors
+ANN_STALE_RATIO = 0.1
+KEEP_ANN_FILES = 2
+
+VECTORS_FILE = 'vectors.f16'
+IDS_FILE = 'paper_ids.npy'
+HASHES_FILE = 'hashes.npy'
+META_FILE = 'meta.json'
+ANN_FILE_PREFIX = 'ann'
+
+EMBEDDING_PAPER_FIELDS = ('id', 'title', 'abstract')
+# A save touching any of these makes the paper's embedding stale
+EMBEDDING_SYNC_FIELDS = {'title', 'abstract'}
+# Rows of deleted papers keep their slot until the next compaction
+TOMBSTONE = ''
+
+
+def embedding_model_name():
+    return getattr(settings, 'PAPER_EMBEDDING_MODEL', DEFAULT_MODEL)
+
+
+def embeddings_root():
+    return getattr(settings, 'PAPER_EMBEDDINGS_DIR', os.path.join(settings.BASE_DIR, 'fissIndex', 'embeddings'))
+
+
+def embedding_text(paper: Dict) -> str:
+    title = ' '.join(str(paper.get('title') or '').split())
+    abstract = ' '.join(str(paper.get('abstract') or '').split())
+    return f"{title}. {abstract}" if abstract else title
+
+
+def content_hash(paper: Dict) -> bytes:
+    """Digest of the text a paper's embedding is computed from."""
+    # Hex rather than raw bytes: numpy's fixed-width bytes type strips trailing NULs
+    return hashlib.sha1(embedding_text(paper).encode('utf-8')).hexdigest().encode('ascii')
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    """The SentenceTransformer for ``PAPER_EMBEDDING_MODEL``, loaded once per process on CPU."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            # Imported lazily: torch is only needed by processes that encode
+            from sentence_transformers import SentenceTransformer
+            _encoder = SentenceTransformer(embedding_model_name(), device='cpu')
+        return _encoder
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Unit-length float16 embeddings for ``texts``."""
+    vectors = get_encoder().encode(
+        texts,
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(vectors, dtype=np.float16)
+
+
+def encode_papers(papers: List[Dict]) -> np.ndarray:
+    return encode_texts([embedding_text(p) for p in papers])
+
+
+def _write_array(path, array):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as handle:
+        np.save(handle, array)
+    os.replace(tmp, path)
+
+
+def _write_meta(root, meta):
+    tmp = os.path.join(root, f'.{META_FILE}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle)
+    os.replace(tmp, os.path.join(root, META_FILE))
+
+
+class EmbeddingStore:
+    """A read-only, memory-mapped snapshot of the embedding store."""
+
+    def __init__(self, vectors, paper_ids, hashes, model, generation=0, ann=None):
+        self.vectors = vectors
+        self.paper_ids = paper_ids
+        self.hashes = hashes
+        self.model = model
+        self.generation = generation
+        self.ann = ann
+        self._rows = None
+
+    @property
+    def dimensions(self):
+        return self.vectors.shape[1]
+
+    def __len__(self):
+        return len(self.paper_ids)
+
+    @classmethod
+    def open(cls, root=None, with_ann=False):
+        """
+        The store at ``root``, or None when nothing has been embedded yet.
+        ``with_ann`` also loads the HNSW index, if one has been built.
+        """
+        root = root or embeddings_root()
+        try:
+            with open(os.path.join(root, META_FILE), encoding='utf-8') as handle:
+                meta = json.load(handle)
+            # Ids first: the vector file is always at least as long as they say
+            paper_ids = np.load(os.path.join(root, IDS_FILE))
+            hashes = np.load(os.path.join(root, HASHES_FILE))
+            vectors = np.memmap(
+                os.path.join(root, VECTORS_FILE), dtype=np.float16, mode='r',
+                shape=(len(paper_ids), meta['dimensions'])
+            ) if len(paper_ids) else np.zeros((0, meta['dimensions']), dtype=np.float16)
+        except FileNotFoundError:
+            return None
+        ann = None
+        if with_ann and meta.get('ann_file'):
+            try:
+                ann = faiss.read_index(os.path.join(root, meta['ann_file']))
+            except RuntimeError as e:
+                logger.error(f"Failed to load embedding ANN index: {e}")
+        return cls(vectors, paper_ids, hashes, meta['model'], meta.get('generation', 0), ann)
+
+    def row(self, paper_id):
+        """Row of ``paper_id``, or None."""
+        if self._rows is None:
+            self._rows = {pid: i for i, pid in enumerate(self.paper_ids.tolist()) if pid != TOMBSTONE}
+        return self._rows.get(str(paper_id))
+
+    def rows(self, paper_ids):
+        """Rows for ``paper_ids``; -1 where a paper has no embedding."""
+        return np.array(
+            [-1 if (row := self.row(pid)) is None else row for pid in paper_ids], dtype='int64'
+        )
+
+    def get(self, paper_ids):
+        """
+        float32 vectors for ``paper_ids`` and a mask of which ones were found;
+        rows for missing papers are zero.
+        """
+        rows = self.rows(paper_ids)
+        found = rows >= 0
+        vectors = np.zeros((len(rows), self.dimensions), dtype=np.float32)
+        if found.any():
+            vectors[found] = self.vectors[rows[found]]
+        return vectors, found
+
+    def live_rows(self):
+        """Rows that belong to existing papers."""
+        return np.flatnonzero(self.paper_ids != TOMBSTONE)
+
+    def similarities(self, rows, vector):
+        """Exact inner products of the stored vectors at ``rows`` with a float32 query."""
+        if not len(rows):
+            return np.empty(0, dtype=np.float32)
+        return np.asarray(self.vectors[rows], dtype=np.float32) @ vector
+
+
+def _new_ann_index(dimensions):
+    index = faiss.IndexHNSWSQ(
+        dimensions, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    return index
+
+
+def _update_ann_index(root, meta, total_rows, rebuild):
+    """Add rows ``[ntotal, total_rows)`` to the ANN index (all rows when rebuilding) and save it."""
+    dimensions = meta['dimensions']
+    index = None
+    if not rebuild and meta.get('ann_file'):
+        try:
+            index = faiss.read_index(os.path.join(root, meta['ann_file']))
+        except RuntimeError:
+            index = None
+    if index is None or index.ntotal > total_rows:
+        index = _new_ann_index(dimensions)
+        meta['ann_stale'] = 0
+
+    if index.ntotal < total_rows:
+        vectors = np.memmap(
+            os.path.join(root, VECTORS_FILE), dtype=np.float16, mode='r',
+            shape=(total_rows, dimensions)
+        )
+        for start in range(index.ntotal, total_rows, CHUNK_SIZE):
+            index.add(np.asarray(vectors[start:min(start + CHUNK_SIZE, total_rows)], dtype=np.float32))
+        del vectors
+
+    name = f"{ANN_FILE_PREFIX}.{meta['generation']}.faiss"
+    tmp = os.path.join(root, f'.{name}.tmp')
+    faiss.write_index(index, tmp)
+    os.replace(tmp, os.path.join(root, name))
+    meta['ann_file'] = name
+
+    # Keep the previous file for readers that have not reloaded yet
+    names = sorted(
+        (n for n in os.listdir(root) if n.startswith(f'{ANN_FILE_PREFIX}.') and n.endswith('.faiss')),
+        key=lambda n: int(n.split('.')[1])
+    )
+    for old in names[:-KEEP_ANN_FILES]:
+        os.remove(os.path.join(root, old))
+
+
+def _reset_store(root, model, dimensions, generation):
+    """Start an empty store for ``model``, replacing any store built with another one."""
+    os.makedirs(root, exist_ok=True)
+    vectors_tmp = os.path.join(root, f'.{VECTORS_FILE}.tmp')
+    open(vectors_tmp, 'wb').close()
+    os.replace(vectors_tmp, os.path.join(root, VECTORS_FILE))
+    _write_array(os.path.join(root, IDS_FILE), np.zeros(0, dtype='U36'))
+    _write_array(os.path.join(root, HASHES_FILE), np.zeros(0, dtype='S40'))
+    # Generations keep counting so readers notice the swap
+    meta = {
+        'model': model, 'dimensions': dimensions, 'generation': generation,
+        'ann_file': None, 'ann_stale': 0,
+    }
+    _write_meta(root, meta)
+    return meta
+
+
+def _compact(root, paper_ids, hashes, dimensions):
+    """Rewrite the vector file without tombstoned rows."""
+    keep = np.flatnonzero(paper_ids != TOMBSTONE)
+    source = np.memmap(
+        os.path.join(root, VECTORS_FILE), dtype=np.float16, mode='r',
+        shape=(len(paper_ids), dimensions)
+    )
+    vectors_tmp = os.path.join(root, f'.{VECTORS_FILE}.tmp')
+    with open(vectors_tmp, 'wb') as handle:
+        for start in range(0, len(keep), CHUNK_SIZE):
+            handle.write(np.ascontiguousarray(source[keep[start:start + CHUNK_SIZE]]).tobytes())
+    del source
+    # Readers still mapping the old file keep its inode until they reload
+    os.replace(vectors_tmp, os.path.join(root, VECTORS_FILE))
+    return paper_ids[keep], hashes[keep]
+
+
+def update_embeddings(force=False):
+    """
+    Encode every paper whose title or abstract changed since it was last
+    embedded (all of them with ``force`` or after a model change) and drop
+    deleted papers. Returns ``(encoded, removed)``; callers serialize runs.
+    """
+    from .models import ResearchPaper
+
+    root = embeddings_root()
+    model = embedding_model_name()
+    store = EmbeddingStore.open(root)
+    if store is None or store.model != model or force:
+        dimensions = get_encoder().get_sentence_embedding_dimension()
+        meta = _reset_store(root, model, dimensions, store.generation if store else 0)
+        paper_ids, hashes = np.zeros(0, dtype='U36'), np.zeros(0, dtype='S40')
+    else:
+        with open(os.path.join(root, META_FILE), encoding='utf-8') as handle:
+            meta = json.load(handle)
+        paper_ids, hashes = store.paper_ids.copy(), store.hashes.copy()
+        del store
+    dimensions = meta['dimensions']
+
+    rows = {pid: i for i, pid in enumerate(paper_ids.tolist()) if pid != TOMBSTONE}
+    seen = set()
+    new_ids, new_hashes = [], []
+    encoded = 0
+
+    papers = ResearchPaper.objects.order_by('pk').values(*EMBEDDING_PAPER_FIELDS)
+    vectors_path = os.path.join(root, VECTORS_FILE)
+    with open(vectors_path, 'r+b') as handle:
+        # Drop rows a run that died before saving the ids left past the end
+        handle.truncate(len(paper_ids) * dimensions * np.dtype(np.float16).itemsize)
+        chunk = []
+        for paper in papers.iterator(chunk_size=CHUNK_SIZE):
+            chunk.append(paper)
+            if len(chunk) < CHUNK_SIZE:
+                continue
+            encoded += _embed_chunk(handle, chunk, rows, hashes, seen, new_ids, new_hashes, dimensions)
+            chunk = []
+        if chunk:
+            encoded += _embed_chunk(handle, chunk, rows, hashes, seen, new_ids, new_hashes, dimensions)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    removed = [row for pid, row in rows.items() if pid not in seen]
+    paper_ids = np.concatenate([paper_ids, np.array(new_ids, dtype='U36')])
+    hashes = np.concatenate([hashes, np.array(new_hashes, dtype='S40')])
+    paper_ids[removed] = TOMBSTONE
+
+    if not encoded and not removed:
+        return 0, 0
+    compacted = len(paper_ids) and (paper_ids == TOMBSTONE).mean() >= COMPACT_RATIO
+    if compacted:
+        paper_ids, hashes = _compact(root, paper_ids, hashes, dimensions)
+
+    meta['generation'] = meta.get('generation', 0) + 1
+    meta['ann_stale'] = meta.get('ann_stale', 0) + encoded - len(new_ids)
+    _update_ann_index(
+        root, meta, len(paper_ids),
+        rebuild=compacted or meta['ann_stale'] > ANN_STALE_RATIO * len(paper_ids)
+    )
+    # Hashes before ids: a reader pairing new ids with old hashes only re-reads a row
+    _write_array(os.path.join(root, HASHES_FILE), hashes)
+    _write_array(os.path.join(root, IDS_FILE), paper_ids)
+    meta['papers'] = int((paper_ids != TOMBSTONE).sum())
+    _write_meta(root, meta)
+    logger.info(f"Embedded {encoded} papers, removed {len(removed)}; {meta['papers']} in store")
+    return encoded, len(removed)
+
+
+def _embed_chunk(handle, papers, rows, hashes, seen, new_ids, new_hashes, dimensions):
+    """Encode the stale papers of one chunk and write their rows in place or at the end."""
+    stale, digests = [], []
+    for paper in papers:
+        pid = str(paper['id'])
+        seen.add(pid)
+        digest = content_hash(paper)
+        row = rows.get(pid)
+        if row is not None and hashes[row] == digest:
+            continue
+        stale.append(paper)
+        digests.append(digest)
+    if not stale:
+        return 0
+
+    vectors = encode_papers(stale)
+    if vectors.shape[1] != dimensions:
+        raise ValueError(f'Encoder returned {vectors.shape[1]} dimensions, store has {dimensions}')
+    row_bytes = dimensions * np.dtype(np.float16).itemsize
+    # Appended rows start right after the last row with an id, not at EOF
+    end = (len(hashes) + len(new_ids)) * row_bytes
+    appended = []
+    for paper, digest, vector in zip(stale, digests, vectors):
+        pid = str(paper['id'])
+        row = rows.get(pid)
+        if row is None:
+            appended.append(vector)
+            rows[pid] = len(hashes) + len(new_ids)
+            new_ids.append(pid)
+            new_hashes.append(digest)
+        else:
+            handle.seek(row * row_bytes)
+            handle.write(vector.tobytes())
+            hashes[row] = digest
+    if appended:
+        handle.seek(end)
+        handle.write(np.ascontiguousarray(appended, dtype=np.float16).tobytes())
+    return len(stale)
+
+
+_current = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """This process's view of the store, reopened when a writer publishes a new generation."""
+    global _current, _checked_at
+    store = _current
+    if store is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return store
+
+    with _lock:
+        _checked_at = time.monotonic()
+        try:
+            with open(os.path.join(embeddings_root(), META_FILE), encoding='utf-8') as handle:
+                generation = json.load(handle).get('generation', 0)
+        except (FileNotFoundError, ValueError):
+            return _current
+        if _current is None or _current.generation != generation:
+            try:
+                _current = EmbeddingStore.open(with_ann=True) or _current
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to open embedding store: {e}")
+        return _current
@@ -0,0 +1,88 @@
+"""
+Streaming bulk export of research papers.
+
+Rows are read from a ``.values()`` projection and encoded one batch at a
+time, so memory stays flat no matter how many papers match and clients
+start receiving data as soon as the first batch is ready.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .user_state import load_user_state
+
+EXPORT_FIELDS = (
+    'id',
+    'title',
+    'abstract',
+    'authors',
+    'source',
+    'url',
+    'pdf_url',
+    'categories',
+    'publication_date',
+    'created_at',
+    'updated_at',
+    'citation_count',
+    'average_reading_time',
+    'active_bookmarks_count',
+)
+EXPORT_BATCH_SIZE = 1000
+
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def iter_paper_batches(queryset, batch_size=EXPORT_BATCH_SIZE, user=None):
+    """Yield lists of at most ``batch_size`` paper dicts, with the user's bookmark/read flags."""
+    fields = list(EXPORT_FIELDS)
+    if 'search_rank' in queryset.query.extra:
+        # Keep the relevance column selected so ordering by it still works
+        fields.append('search_rank')
+
+    batch = []
+    for row in queryset.values(*fields).iterator(chunk_size=batch_size):
+        row.pop('search_rank', None)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _with_user_state(batch, user)
+            batch = []
+    if batch:
+        yield _with_user_state(batch, user)
+
+
+def _with_user_state(batch, user):
+    bookmarks, reads = load_user_state(user, [row['id'] for row in batch])
+    for row in batch:
+        bookmark_id = bookmarks.get(row['id'])
+        row['is_bookmarked'] = bookmark_id is not None
+        row['bookmark_id'] = str(bookmark_id) if bookmark_id else None
+        row['is_paper_read'] = row['id'] in reads
+    return batch
+
+
+def _encode(row):
+    return json.dumps(row, cls=DjangoJSONEncoder)
+
+
+def stream_ndjson(queryset, batch_size=EXPORT_BATCH_SIZE, user=None):
+    for batch in iter_paper_batches(queryset, batch_size, user):
+        yield ''.join(_encode(row) + '\n' for row in batch)
+
+
+def stream_json_array(queryset, batch_size=EXPORT_BATCH_SIZE, user=None):
+    yield '['
+    first = True
+    for batch in iter_paper_batches(queryset, batch_size, user):
+        chunk = ','.join(_encode(row) for row in batch)
+        yield chunk if first else ',' + chunk
+        first = False
+    yield ']'
+
+
+STREAMERS = {
+    'ndjson': stream_ndjson,
+    'json': stream_json_array,
+}
@@ -0,0 +1,160 @@
+"""
+Polite asynchronous HTTP fetching for the paper harvesters.
+
+Requests to one host start at most once per ``interval`` seconds, however
+many run concurrently, and transient failures (timeouts, connection errors,
+429 and 5xx responses) are retried with exponential backoff that honours
+``Retry-After``. Bodies can be fed to an incremental parser while they
+download instead of being buffered first, and go through the on-disk
+response cache of scraping.http_cache, so a page fetched again within its
+TTL costs no request and a stale one a conditional request.
+"""
+import asyncio
+import logging
+import random
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+from .http_cache import CacheMiss, get_response_cache, request_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 3.0
+MAX_RETRIES = 5
+BACKOFF_BASE = 2.0
+MAX_BACKOFF = 120.0
+TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def user_agent():
+    return getattr(settings, 'HARVESTER_USER_AGENT', 'ReSearch-harvester/1.0')
+
+
+class RateLimiter:
+    """Spaces out the start of calls to ``wait`` by at least ``interval`` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class PoliteClient:
+    """An httpx.AsyncClient with a rate limiter per host, retries and the shared response cache."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_retries=MAX_RETRIES, client=None, cache=None):
+        self.interval = interval
+        self.max_retries = max_retries
+        self.cache = cache or get_response_cache()
+        self._limiters = {}
+        self._client = client or httpx.AsyncClient(
+            timeout=TIMEOUT,
+            follow_redirects=True,
+            headers={'User-Agent': user_agent()},
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+
+    def _limiter(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = RateLimiter(self.interval)
+        return self._limiters[host]
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        return min(BACKOFF_BASE * 2 ** attempt, MAX_BACKOFF) * (0.5 + random.random() / 2)
+
+    async def _request(self, url, params, consume, revalidate=False):
+        """
+        Return ``await consume(chunks)`` for the body of ``url``: from the
+        response cache while fresh, otherwise downloaded (or revalidated)
+        with retries for transient failures and stored in the cache.
+        """
+        entry = self.cache.lookup(url, params)
+        if entry is not None and (self.cache.offline or (self.cache.is_fresh(entry) and not revalidate)):
+            return await consume(_cached_chunks(entry))
+        if self.cache.offline:
+            raise CacheMiss(request_key(url, params))
+
+        headers = self.cache.conditional_headers(entry)
+        limiter = self._limiter(url)
+        for attempt in range(self.max_retries + 1):
+            await limiter.wait()
+            response = None
+            try:
+                async with self._client.stream('GET', url, params=params, headers=headers) as response:
+                    if response.status_code == 304 and entry is not None:
+                        self.cache.refresh(entry)
+                        return await consume(_cached_chunks(entry))
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        writer = self.cache.writer(url, params, response.headers)
+                        try:
+                            result = await consume(_recorded(response.aiter_bytes(), writer))
+                        except BaseException:
+                            writer.abort()
+                            raise
+                        writer.commit()
+                        return result
+                    error = httpx.HTTPStatusError(
+                        f'{response.status_code} from {url}', request=response.request, response=response
+                    )
+            except httpx.TransportError as e:
+                # Includes connections dropped mid-body; the whole body is fetched again
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = self._backoff(attempt, response)
+            logger.warning(f"Retrying {url} in {delay:.1f}s after: {error}")
+            await asyncio.sleep(delay)
+
+    async def get(self, url, params=None, revalidate=False):
+        """The body of ``url``; raises httpx errors once retries run out."""
+        async def read(chunks):
+            return b''.join([chunk async for chunk in chunks])
+        return await self._request(url, params, read, revalidate)
+
+    async def parse(self, url, params, make_parser, revalidate=False):
+        """
+        Stream the body of ``url`` into a fresh ``make_parser()`` as it
+        downloads and return ``(parser, items)``. A retried request starts
+        over with a new parser. A body the parser rejects is not cached.
+        """
+        async def consume(chunks):
+            parser = make_parser()
+            items = []
+            async for chunk in chunks:
+                items.extend(parser.feed(chunk))
+            items.extend(parser.close())
+            return parser, items
+        return await self._request(url, params, consume, revalidate)
+
+
+async def _cached_chunks(entry):
+    for chunk in entry.iter_content():
+        yield chunk
+
+
+async def _recorded(chunks, writer):
+    async for chunk in chunks:
+        writer.write(chunk)
+        yield chunk
@@ -0,0 +1,291 @@
+"""
+On-disk HTTP response cache shared by the scrapers, harvesters and PDF
+downloads.
+
+A successful GET is stored in one file per URL (a JSON header line followed
+by the body) under ``settings.HTTP_CACHE_DIR``. The URL is keyed and stored
+without credential query parameters (CREDENTIAL_PARAMS such as ``apikey``),
+so API keys never reach the cache directory. The file's modification time
+is when the response was last confirmed. While younger than the TTL of its
+host (``settings.HTTP_CACHE_TTLS``, else ``HTTP_CACHE_DEFAULT_TTL``) an entry
+is served without touching the network. An older entry is revalidated with
+``If-None-Match``/``If-Modified-Since`` and a 304 only refreshes its time,
+so a repeated fetch of the same URL costs at most one revalidation
+round-trip. With ``settings.HTTP_CACHE_OFFLINE`` every request is answered
+from the cache, whatever its age, and a miss raises CacheMiss, which
+replays recorded responses in tests without network access.
+
+Nothing is evicted on read: ``ResponseCache.prune`` (the nightly
+``prune_http_cache`` task, or ``manage.py prune_http_cache``) removes entries
+not confirmed within ``HTTP_CACHE_MAX_AGE`` and then the least recently
+confirmed ones until the cache fits in ``HTTP_CACHE_MAX_BYTES``.
+
+"AI models and codes/http_cache.py" is a standalone copy of this module for
+the scripts outside Django; it writes the same file format, so both can
+share one directory.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Temporary files older than this belong to writers that died
+STALE_TMP_AGE = 3600
+# Response headers kept with the body
+STORED_HEADERS = ('content-type', 'etag', 'last-modified')
+# Query parameters (compared case-insensitively) left out of cache keys
+CREDENTIAL_PARAMS = frozenset({'apikey', 'api_key', 'access_token', 'insttoken'})
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 60)
+
+
+class CacheMiss(Exception):
+    """Offline mode and the URL is not cached."""
+
+
+def _is_credential(name):
+    return name.lower() in CREDENTIAL_PARAMS
+
+
+def request_key(url, params=None):
+    """
+    The URL with its query parameters in a stable order and without
+    credentials, which would otherwise be stored in plain text in the
+    entry's header line.
+    """
+    parts = urlsplit(url)
+    if parts.query:
+        pairs = parse_qsl(parts.query, keep_blank_values=True)
+        if any(_is_credential(name) for name, _ in pairs):
+            url = urlunsplit(parts._replace(query=urlencode([(k, v) for k, v in pairs if not _is_credential(k)])))
+    if params:
+        params = {k: v for k, v in dict(params).items() if not _is_credential(str(k))}
+    if not params:
+        return url
+    query = urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+    return f"{url}{'&' if urlsplit(url).query else '?'}{query}"
+
+
+class CachedResponse:
+    """A stored response: ``headers``, the age of the entry and the body on disk at ``path``."""
+
+    status_code = 200
+
+    def __init__(self, path, url, headers, offset):
+        self.path = path
+        self.url = url
+        self.headers = headers
+        self._offset = offset
+
+    @property
+    def age(self):
+        return time.time() - os.path.getmtime(self.path)
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        with open(self.path, 'rb') as handle:
+            handle.seek(self._offset)
+            while chunk := handle.read(chunk_size):
+                yield chunk
+
+    @property
+    def content(self):
+        return b''.join(self.iter_content())
+
+    def copy_to(self, target):
+        """Write the body to the open binary file ``target``."""
+        with open(self.path, 'rb') as handle:
+            handle.seek(self._offset)
+            shutil.copyfileobj(handle, target)
+
+
+class CacheWriter:
+    """Collects a body chunk by chunk and publishes the entry atomically on ``commit``."""
+
+    def __init__(self, cache, key, headers):
+        self.cache = cache
+        self.key = key
+        self.path = cache.path(key)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        stored = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+        self._file.write(json.dumps({'url': key, 'headers': stored}).encode('utf-8') + b'\n')
+
+    def write(self, chunk):
+        self._file.write(chunk)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        return self.cache.lookup_key(self.key)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
+
+
+class ResponseCache:
+    def __init__(self, root, ttls=None, default_ttl=DEFAULT_TTL, offline=False):
+        self.root = root
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.offline = offline
+
+    def path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def ttl(self, url):
+        return self.ttls.get(urlsplit(url).hostname or '', self.default_ttl)
+
+    def lookup_key(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as handle:
+                header = handle.readline()
+        except FileNotFoundError:
+            return None
+        meta = json.loads(header)
+        return CachedResponse(path, meta['url'], meta['headers'], len(header))
+
+    def lookup(self, url, params=None):
+        return self.lookup_key(request_key(url, params))
+
+    def is_fresh(self, entry):
+        return self.offline or entry.age < self.ttl(entry.url)
+
+    def conditional_headers(self, entry):
+        """Validators to revalidate ``entry`` with; empty when it has none."""
+        headers = {}
+        if entry is not None:
+            if entry.headers.get('etag'):
+                headers['If-None-Match'] = entry.headers['etag']
+            if entry.headers.get('last-modified'):
+                headers['If-Modified-Since'] = entry.headers['last-modified']
+        return headers
+
+    def refresh(self, entry):
+        """Record that the origin confirmed ``entry`` (a 304) now."""
+        os.utime(entry.path)
+        return entry
+
+    def writer(self, url, params, headers):
+        return CacheWriter(self, request_key(url, params), {k.lower(): v for k, v in headers.items()})
+
+    def prune(self, max_age=DEFAULT_MAX_AGE, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Delete entries last confirmed more than ``max_age`` seconds ago, then
+        the oldest remaining ones until at most ``max_bytes`` are left, and
+        abandoned temporary files. Returns ``(removed, remaining_bytes)``.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                age = now - stat.st_mtime
+                if age > max_age or (name.endswith('.tmp') and age > STALE_TMP_AGE):
+                    removed += _unlink(path)
+                elif not name.endswith('.tmp'):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            removed += _unlink(path)
+            total -= size
+        return removed, total
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0
+    return 1
+
+
+_cache = None
+_session = None
+_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The process-wide cache configured from settings."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            getattr(settings, 'HTTP_CACHE_DIR', os.path.join(settings.BASE_DIR, 'http_cache')),
+            ttls=getattr(settings, 'HTTP_CACHE_TTLS', {}),
+            default_ttl=getattr(settings, 'HTTP_CACHE_DEFAULT_TTL', DEFAULT_TTL),
+            offline=getattr(settings, 'HTTP_CACHE_OFFLINE', False),
+        )
+    return _cache
+
+
+def prune_response_cache(max_age=None, max_bytes=None):
+    """Prune the process-wide cache to the given limits, else those in settings."""
+    return get_response_cache().prune(
+        max_age if max_age is not None else getattr(settings, 'HTTP_CACHE_MAX_AGE', DEFAULT_MAX_AGE),
+        max_bytes if max_bytes is not None else getattr(settings, 'HTTP_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+    )
+
+
+def get_session():
+    """A pooled requests session shared by the synchronous fetchers of this process."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session.headers['User-Agent'] = getattr(settings, 'HARVESTER_USER_AGENT', 'ReSearch-harvester/1.0')
+        return _session
+
+
+def fetch(url, params=None, headers=None, cache=None):
+    """
+    A CachedResponse for GET ``url``, revalidating or downloading it only
+    when the cached copy is missing or stale. Raises ``requests`` errors
+    for failed downloads.
+    """
+    cache = cache or get_response_cache()
+    entry = cache.lookup(url, params)
+    if entry is not None and cache.is_fresh(entry):
+        return entry
+    if cache.offline:
+        raise CacheMiss(request_key(url, params))
+
+    request_headers = {**(headers or {}), **cache.conditional_headers(entry)}
+    with get_session().get(url, params=params, headers=request_headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 304 and entry is not None:
+            return cache.refresh(entry)
+        response.raise_for_status()
+        writer = cache.writer(url, params, response.headers)
+        try:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
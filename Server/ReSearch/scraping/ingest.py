@@ -0,0 +1,156 @@
+"""
+Bulk paper ingestion for scrapers.
+
+A batch is validated with ResearchPaperSerializer, deduplicated on the
+normalized paper URL (see scraping.paper_urls) and written with one
+``bulk_create(update_conflicts=True)`` per INSERT batch inside a single
+transaction: new papers are inserted, papers already stored under the same
+key are updated in place, and new papers that are near-duplicates of a
+stored or earlier paper are merged into it. ``bulk_create`` sends no
+post_save signals, so the work the ResearchPaper receivers do per row runs
+once for the whole batch.
+"""
+import json
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import near_duplicates
+from .models import ResearchPaper
+from .paper_urls import paper_url_key
+from .serializers import ResearchPaperSerializer
+from .signals import papers_saved
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement (keeps SQLite under its bound-parameter limit)
+INSERT_BATCH_SIZE = 500
+# Papers accepted by one API call or command chunk
+MAX_BATCH_SIZE = 10000
+# Fields an upsert may overwrite when every paper in the batch provides them
+UPSERT_FIELDS = (
+    'title', 'abstract', 'authors', 'source', 'url', 'pdf_url', 'categories',
+    'publication_date', 'citation_count', 'average_reading_time'
+)
+JSONL_CONTENT_TYPES = {'application/jsonl', 'application/x-ndjson', 'application/x-jsonlines'}
+LOOKUP_CHUNK_SIZE = 2000
+
+
+class IngestError(Exception):
+    """The batch was rejected; ``errors`` maps item positions to their validation errors."""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid papers')
+        self.errors = errors
+
+
+def parse_jsonl(lines):
+    """Papers from JSON Lines (str, bytes or an iterable of lines); blank lines are skipped."""
+    if isinstance(lines, bytes):
+        lines = lines.decode('utf-8')
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    items = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise IngestError({'line': f'Invalid JSON on line {number}: {e.msg}'})
+    return items
+
+
+def validate_papers(items):
+    """Validated data for every item, or IngestError listing each invalid one."""
+    if not isinstance(items, list):
+        raise IngestError({'non_field_errors': 'Expected a JSON array or JSON Lines of papers'})
+    if len(items) > MAX_BATCH_SIZE:
+        raise IngestError({'non_field_errors': f'At most {MAX_BATCH_SIZE} papers per batch'})
+    serializer = ResearchPaperSerializer(data=items, many=True, context={'upsert': True})
+    if not serializer.is_valid():
+        raise IngestError({i: errors for i, errors in enumerate(serializer.errors) if errors})
+    return serializer.validated_data
+
+
+def _existing_keys(keys):
+    existing = set()
+    keys = list(keys)
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        existing.update(ResearchPaper.objects.filter(
+            normalized_url__in=keys[start:start + LOOKUP_CHUNK_SIZE]
+        ).values_list('normalized_url', flat=True))
+    return existing
+
+
+def upsert_papers(validated):
+    """
+    Insert or update validated papers in one transaction.
+
+    Returns ``{'created', 'updated', 'duplicates', 'merged'}`` where
+    duplicates counts papers repeated within the batch (the last copy wins)
+    and merged counts new papers folded into a near-duplicate (see
+    scraping.near_duplicates).
+    """
+    by_key = {}
+    unkeyed = []
+    for data in validated:
+        key = paper_url_key(data.get('url'), data.get('pdf_url'))
+        if key:
+            by_key[key] = data
+        else:
+            unkeyed.append(data)
+    duplicates = len(validated) - len(by_key) - len(unkeyed)
+
+    # Fields missing from some papers keep their stored value on update
+    provided = set(UPSERT_FIELDS)
+    for data in validated:
+        provided &= data.keys()
+    update_fields = [field for field in UPSERT_FIELDS if field in provided] + ['updated_at']
+
+    papers = [ResearchPaper(normalized_url=key, **data) for key, data in by_key.items()]
+    papers += [ResearchPaper(**data) for data in unkeyed]
+
+    with transaction.atomic():
+        existing = _existing_keys(by_key)
+        # Papers new to the corpus may still be near-duplicates of stored ones
+        new, absorbed, absorbed_fields, merged = near_duplicates.merge_new_papers(
+            [paper for paper in papers if paper.normalized_url not in existing]
+        )
+        if absorbed and absorbed_fields:
+            now = timezone.now()
+            for paper in absorbed:
+                paper.updated_at = now
+            ResearchPaper.objects.bulk_update(
+                absorbed, absorbed_fields + ['updated_at'], batch_size=INSERT_BATCH_SIZE
+            )
+        papers = [paper for paper in papers if paper.normalized_url in existing] + new
+        ResearchPaper.objects.bulk_create(
+            papers,
+            batch_size=INSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['normalized_url'],
+            update_fields=update_fields,
+        )
+        # Updated rows keep their stored primary key, so reload them by key
+        saved = []
+        keys = [paper.normalized_url for paper in papers if paper.normalized_url]
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            saved.extend(ResearchPaper.objects.filter(normalized_url__in=keys[start:start + LOOKUP_CHUNK_SIZE]))
+        saved.extend(paper for paper in papers if not paper.normalized_url)
+        # A stored paper can both absorb a duplicate and be upserted by key
+        papers_saved(list({paper.pk: paper for paper in absorbed + saved}.values()))
+
+    created = len(papers) - len(existing)
+    logger.info(
+        f"Ingested {len(papers)} papers: {created} created, {len(existing)} updated, "
+        f"{merged} merged into near-duplicates"
+    )
+    return {'created': created, 'updated': len(existing), 'duplicates': duplicates, 'merged': merged}
+
+
+def ingest_papers(items):
+    """Validate and upsert a batch of raw paper dicts."""
+    return upsert_papers(validate_papers(items))
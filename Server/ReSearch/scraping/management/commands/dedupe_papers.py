@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from scraping.models import ResearchPaper
+from scraping.near_duplicates import index_papers, merge_papers, stored_duplicate_groups
+
+
+class Command(BaseCommand):
+    help = 'Index MinHash signatures of stored papers and merge near-duplicates into one canonical paper'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the near-duplicate groups, do not merge them'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Papers signed per batch when indexing papers without a signature'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        unsigned = ResearchPaper.objects.filter(minhash_signature__isnull=True).only('pk', 'title', 'abstract')
+        indexed, last = 0, None
+        while True:
+            # Keyset pagination: papers without any text never get a signature
+            page = unsigned.filter(pk__gt=last) if last else unsigned
+            batch = list(page.order_by('pk')[:batch_size])
+            if not batch:
+                break
+            index_papers(batch)
+            indexed += len(batch)
+            last = batch[-1].pk
+        self.stdout.write(f'Indexed {indexed} papers without a signature')
+
+        merged = 0
+        groups = stored_duplicate_groups()
+        for group in groups:
+            # The paper stored first stays; the others are folded into it
+            papers = list(ResearchPaper.objects.filter(pk__in=group).order_by('created_at'))
+            canonical, duplicates = papers[0], papers[1:]
+            self.stdout.write(f'{canonical.title!r}: {len(duplicates)} near-duplicates')
+            if not options['dry_run']:
+                merge_papers(canonical, duplicates)
+                merged += len(duplicates)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(groups)} near-duplicate groups; merged {merged} papers'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from scraping.embeddings import get_embedding_store, update_embeddings
+
+
+class Command(BaseCommand):
+    help = 'Encode papers whose title or abstract changed into the shared embedding store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-encode every paper, discarding the existing store'
+        )
+
+    def handle(self, *args, **options):
+        encoded, removed = update_embeddings(force=options['force'])
+        store = get_embedding_store()
+        total = len(store.live_rows()) if store is not None else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Encoded {encoded} papers, removed {removed}; {total} papers in the embedding store'
+        ))
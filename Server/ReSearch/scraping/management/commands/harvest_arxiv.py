@@ -0,0 +1,33 @@
+import asyncio
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scraping.arxiv_harvester import CONCURRENCY, PAGE_SIZE, WINDOW_DAYS, harvest_arxiv
+
+
+class Command(BaseCommand):
+    help = 'Harvest arXiv API search results for a date range into the paper table, resuming interrupted runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('query', help='arXiv search query, e.g. "cat:cs.LG" or "all:transformer"')
+        parser.add_argument('--from', dest='start', type=date.fromisoformat, help='First submission date (default: 7 days ago)')
+        parser.add_argument('--until', dest='end', type=date.fromisoformat, help='Last submission date (default: today)')
+        parser.add_argument('--window-days', type=int, default=WINDOW_DAYS, help='Days per query window')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Results per API request')
+        parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Pages downloaded at once')
+        parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint for this query')
+
+    def handle(self, *args, **options):
+        end = options['end'] or date.today()
+        start = options['start'] or end - timedelta(days=7)
+        if start > end:
+            raise CommandError('--from must not be after --until')
+        stored = asyncio.run(harvest_arxiv(
+            options['query'], start, end,
+            window_days=max(options['window_days'], 1),
+            page_size=max(options['page_size'], 1),
+            concurrency=max(options['concurrency'], 1),
+            restart=options['restart'],
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} papers for {options["query"]!r}'))
@@ -0,0 +1,81 @@
+import itertools
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scraping.ingest import MAX_BATCH_SIZE, IngestError, ingest_papers
+
+
+def read_batches(handle, batch_size):
+    """``(offset, papers)`` batches from a JSON array or a JSON Lines file."""
+    lines = enumerate(handle, start=1)
+    for number, line in lines:
+        if line.strip():
+            break
+    else:
+        return
+
+    if line.lstrip().startswith('['):
+        try:
+            items = json.loads(line + ''.join(rest for _, rest in lines))
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Invalid JSON array: {e}')
+        for start in range(0, len(items), batch_size):
+            yield start, items[start:start + batch_size]
+        return
+
+    batch, start = [], 0
+    for number, line in itertools.chain([(number, line)], lines):
+        if not line.strip():
+            continue
+        try:
+            batch.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Invalid JSON on line {number}: {e.msg}')
+        if len(batch) >= batch_size:
+            yield start, batch
+            start += len(batch)
+            batch = []
+    if batch:
+        yield start, batch
+
+
+class Command(BaseCommand):
+    help = 'Upsert papers from a JSON array or JSON Lines file ("-" for stdin), deduplicated by URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help=f'Papers validated and written per transaction (at most {MAX_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = min(max(options['batch_size'], 1), MAX_BATCH_SIZE)
+        handle = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        totals = {'created': 0, 'updated': 0, 'duplicates': 0, 'merged': 0}
+        try:
+            for start, batch in read_batches(handle, batch_size):
+                try:
+                    result = ingest_papers(batch)
+                except IngestError as e:
+                    # Report positions in the whole input, not the batch
+                    errors = {
+                        start + key if isinstance(key, int) else key: value
+                        for key, value in e.errors.items()
+                    }
+                    raise CommandError(f'Batch starting at paper {start} rejected: {errors}')
+                for key in totals:
+                    totals[key] += result[key]
+                self.stdout.write(f"Papers {start}-{start + len(batch) - 1}: {result}")
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {totals['created']}, updated {totals['updated']}, "
+            f"skipped {totals['duplicates']} in-batch duplicates, "
+            f"merged {totals['merged']} near-duplicates"
+        ))
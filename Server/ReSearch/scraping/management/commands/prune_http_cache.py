@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scraping.http_cache import prune_response_cache
+
+
+class Command(BaseCommand):
+    help = 'Delete HTTP cache entries older than the maximum age and the oldest ones beyond the size limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            help='Seconds since an entry was last confirmed (default: HTTP_CACHE_MAX_AGE)'
+        )
+        parser.add_argument(
+            '--max-bytes',
+            type=int,
+            help='Size the cache is pruned to (default: HTTP_CACHE_MAX_BYTES)'
+        )
+
+    def handle(self, *args, **options):
+        removed, remaining = prune_response_cache(options['max_age'], options['max_bytes'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} cache files; {remaining} bytes left'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from scraping.categories import rebuild_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-category paper counts from PaperCategory'
+
+    def handle(self, *args, **options):
+        rows = rebuild_category_counts()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt paper counts for {rows} categories'))
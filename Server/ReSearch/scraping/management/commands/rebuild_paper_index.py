@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scraping.paper_index import rebuild_paper_index, sync_paper_index
+
+
+class Command(BaseCommand):
+    help = 'Build a new version of the recommendation paper index and publish it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only add a delta for papers changed or deleted since the current version was built'
+        )
+
+    def handle(self, *args, **options):
+        manager = sync_paper_index() if options['incremental'] else rebuild_paper_index()
+        if manager.version is None:
+            self.stdout.write(self.style.WARNING('No papers to index; nothing published.'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Current index {manager.version} (generation {manager.generation}) with {len(manager)} papers'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from scraping.reading_stats import rebuild_monthly_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly reading stats rollup from ReadPaper'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='users',
+            help='Only rebuild the given user id (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_monthly_stats(user_ids=options['users'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} monthly reading stats rows'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from scraping import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for research papers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search.REBUILD_BATCH_SIZE,
+            help='Number of papers indexed per batch'
+        )
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write(self.style.WARNING('Full-text index is only available on SQLite; nothing to do.'))
+            return
+        indexed = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} papers'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from scraping.models import BookmarkedPaper, ResearchPaper
+
+
+class Command(BaseCommand):
+    help = 'Recompute ResearchPaper.active_bookmarks_count from the bookmark table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many papers have a drifted counter'
+        )
+
+    def handle(self, *args, **options):
+        active_counts = (
+            BookmarkedPaper.objects
+            .filter(paper=OuterRef('pk'), is_active=True)
+            .order_by()
+            .values('paper')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        actual = Coalesce(Subquery(active_counts), 0)
+        drifted = (
+            ResearchPaper.objects
+            .annotate(actual_count=actual)
+            .exclude(active_bookmarks_count=F('actual_count'))
+        )
+        drifted_ids = list(drifted.values_list('pk', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted_ids)} papers have a drifted bookmark counter')
+            return
+
+        updated = 0
+        for start in range(0, len(drifted_ids), 1000):
+            batch = drifted_ids[start:start + 1000]
+            updated += ResearchPaper.objects.filter(pk__in=batch).update(active_bookmarks_count=actual)
+        self.stdout.write(self.style.SUCCESS(f'Reconciled bookmark counters for {updated} papers'))
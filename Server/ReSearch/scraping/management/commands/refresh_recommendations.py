@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scraping.user_recommendations import BATCH_SIZE, refresh_due_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute every due per-user recommendation list without going through Celery'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of users recomputed per batch'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        more_due = True
+        while more_due:
+            refreshed, more_due, _ = refresh_due_recommendations(batch_size=options['batch_size'])
+            total += refreshed
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {total} recommendation lists'))
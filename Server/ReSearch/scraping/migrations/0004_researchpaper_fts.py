@@ -0,0 +1,56 @@
+from django.db import migrations
+
+
+FTS_TABLE = 'scraping_researchpaper_fts'
+BATCH_SIZE = 2000
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "paper_id UNINDEXED, title, abstract, authors, "
+        "tokenize='porter unicode61 remove_diacritics 2')"
+    )
+
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    papers = ResearchPaper.objects.only('id', 'title', 'abstract', 'authors').order_by()
+    rows = []
+    for paper in papers.iterator(chunk_size=BATCH_SIZE):
+        authors = paper.authors
+        if isinstance(authors, list):
+            authors = ' '.join(str(author) for author in authors)
+        rows.append((paper.id.int >> 65, paper.id.hex, paper.title, paper.abstract, str(authors or '')))
+        if len(rows) >= BATCH_SIZE:
+            _insert_rows(schema_editor, rows)
+            rows = []
+    _insert_rows(schema_editor, rows)
+
+
+def _insert_rows(schema_editor, rows):
+    if not rows:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, paper_id, title, abstract, authors) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0003_rename_averagereadingtime_researchpaper_average_reading_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
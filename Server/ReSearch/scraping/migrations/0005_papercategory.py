@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def populate_paper_categories(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    PaperCategory = apps.get_model('scraping', 'PaperCategory')
+    links = []
+    papers = ResearchPaper.objects.only('id', 'categories', 'publication_date').order_by()
+    for paper in papers.iterator(chunk_size=2000):
+        categories = paper.categories or []
+        if isinstance(categories, str):
+            categories = [categories]
+        names = {' '.join(str(category).split()).lower() for category in categories}
+        links.extend(
+            PaperCategory(paper_id=paper.id, category=name, publication_date=paper.publication_date)
+            for name in names if name
+        )
+        if len(links) >= 2000:
+            PaperCategory.objects.bulk_create(links)
+            links = []
+    PaperCategory.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0004_researchpaper_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperCategory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=255)),
+                ('publication_date', models.DateField()),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_links', to='scraping.researchpaper')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-publication_date'], name='scraping_pa_categor_ffd236_idx')],
+                'unique_together': {('paper', 'category')},
+            },
+        ),
+        migrations.RunPython(populate_paper_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_active_bookmarks_count(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    BookmarkedPaper = apps.get_model('scraping', 'BookmarkedPaper')
+    active_counts = (
+        BookmarkedPaper.objects
+        .filter(paper=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('paper')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    ResearchPaper.objects.update(active_bookmarks_count=Coalesce(Subquery(active_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0005_papercategory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='researchpaper',
+            name='active_bookmarks_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_active_bookmarks_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_monthly_reading_stats(apps, schema_editor):
+    ReadPaper = apps.get_model('scraping', 'ReadPaper')
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    MonthlyReadingStats = apps.get_model('scraping', 'MonthlyReadingStats')
+    paper = ResearchPaper.objects.filter(pk=OuterRef('paper_id'))
+    ReadPaper.objects.update(
+        counted_citations=Subquery(paper.values('citation_count')[:1]),
+        counted_reading_time=Subquery(paper.values('average_reading_time')[:1]),
+    )
+    monthly = (
+        ReadPaper.objects
+        .filter(is_active=True, user__isnull=False)
+        .annotate(month=TruncMonth('read_at'))
+        .order_by()
+        .values('user_id', 'month')
+        .annotate(
+            papers_read=Count('id'),
+            total_citations=Sum('counted_citations'),
+            total_reading_time=Sum('counted_reading_time'),
+            reading_time_count=Count('counted_reading_time'),
+        )
+    )
+    MonthlyReadingStats.objects.bulk_create([
+        MonthlyReadingStats(
+            user_id=row['user_id'],
+            month=row['month'].date(),
+            papers_read=row['papers_read'],
+            total_citations=row['total_citations'] or 0,
+            total_reading_time=row['total_reading_time'] or 0,
+            reading_time_count=row['reading_time_count'],
+        )
+        for row in monthly
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0006_researchpaper_active_bookmarks_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readpaper',
+            name='counted_citations',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='readpaper',
+            name='counted_reading_time',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='MonthlyReadingStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('papers_read', models.PositiveIntegerField(default=0)),
+                ('total_citations', models.PositiveBigIntegerField(default=0)),
+                ('total_reading_time', models.PositiveBigIntegerField(default=0)),
+                ('reading_time_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_reading_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Monthly reading stats',
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_monthly_reading_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:17
+
+import uuid
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_category_counts(apps, schema_editor):
+    PaperCategory = apps.get_model('scraping', 'PaperCategory')
+    CategoryPaperCount = apps.get_model('scraping', 'CategoryPaperCount')
+    counts = PaperCategory.objects.order_by().values('category').annotate(total=Count('id'))
+    CategoryPaperCount.objects.bulk_create([
+        CategoryPaperCount(category=row['category'], paper_count=row['total'])
+        for row in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0007_monthlyreadingstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPaperCount',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=255, unique=True)),
+                ('paper_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-paper_count'],
+                'indexes': [models.Index(fields=['-paper_count'], name='scraping_ca_paper_c_ea4c2a_idx')],
+            },
+        ),
+        migrations.RunPython(populate_category_counts, migrations.RunPython.noop),
+    ]
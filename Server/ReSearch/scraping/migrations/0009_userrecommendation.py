@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:29
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_dirty_recommendations(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserRecommendation = apps.get_model('scraping', 'UserRecommendation')
+    UserRecommendation.objects.bulk_create([
+        UserRecommendation(user_id=user_id)
+        for user_id in User.objects.values_list('pk', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0008_categorypapercount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('paper_scores', models.JSONField(blank=True, default=list)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('is_dirty', models.BooleanField(default=True)),
+                ('dirtied_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='paper_recommendation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_dirty', 'dirtied_at'], name='scraping_us_is_dirt_b17a90_idx'), models.Index(fields=['computed_at'], name='scraping_us_compute_86e729_idx')],
+            },
+        ),
+        migrations.RunPython(create_dirty_recommendations, migrations.RunPython.noop),
+    ]
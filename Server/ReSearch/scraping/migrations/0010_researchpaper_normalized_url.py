@@ -0,0 +1,78 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:43
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.db import migrations, models
+
+# A frozen copy of scraping.paper_urls as of this migration, so later changes
+# to the live normalization cannot change what it computes
+ARXIV_HOSTS = {'arxiv.org', 'export.arxiv.org'}
+ARXIV_PATH_RE = re.compile(r'^/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$', re.IGNORECASE)
+TRACKING_PARAMS_RE = re.compile(r'^(utm_\w+|fbclid|gclid|ref|source)$', re.IGNORECASE)
+MAX_KEY_LENGTH = 500
+
+
+def normalize_url(url):
+    if not url:
+        return None
+    parts = urlsplit(str(url).strip())
+    if parts.scheme.lower() not in ('http', 'https', '') or not parts.netloc:
+        return None
+
+    host = parts.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+
+    if host in ARXIV_HOSTS:
+        match = ARXIV_PATH_RE.match(parts.path)
+        if match:
+            return f'arxiv.org/abs/{match.group(1).lower()}'
+
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS_RE.match(key)
+    ))
+    key = f'{host}{path}?{query}' if query else f'{host}{path}'
+    return key[:MAX_KEY_LENGTH]
+
+
+def paper_url_key(url, pdf_url=None):
+    return normalize_url(url) or normalize_url(pdf_url)
+
+
+def populate_normalized_url(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    seen = set()
+    batch = []
+    # Oldest copy of an already duplicated paper keeps the key; the rest stay NULL
+    papers = ResearchPaper.objects.order_by('created_at').only('id', 'url', 'pdf_url')
+    for paper in papers.iterator(chunk_size=2000):
+        key = paper_url_key(paper.url, paper.pdf_url)
+        if key and key not in seen:
+            seen.add(key)
+            paper.normalized_url = key
+            batch.append(paper)
+        if len(batch) >= 2000:
+            ResearchPaper.objects.bulk_update(batch, ['normalized_url'])
+            batch = []
+    ResearchPaper.objects.bulk_update(batch, ['normalized_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0009_userrecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='researchpaper',
+            name='normalized_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True, unique=True),
+        ),
+        migrations.RunPython(populate_normalized_url, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:45
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0010_researchpaper_normalized_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source', models.CharField(max_length=50)),
+                ('query', models.CharField(max_length=500)),
+                ('window_start', models.DateField(blank=True, null=True)),
+                ('window_end', models.DateField(blank=True, null=True)),
+                ('next_offset', models.PositiveIntegerField(default=0)),
+                ('total_results', models.PositiveIntegerField(blank=True, null=True)),
+                ('harvested_count', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'query'), name='unique_harvest_checkpoint')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0011_harvestcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestcheckpoint',
+            name='resumption_token',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='harvestcheckpoint',
+            name='watermark',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:51
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0012_harvestcheckpoint_watermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperSignature',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('signature', models.BinaryField()),
+                ('paper', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='minhash_signature', to='scraping.researchpaper')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaperSignatureBand',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='scraping.researchpaper')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='scraping_pa_bucket_b9a835_idx')],
+                'unique_together': {('paper', 'band')},
+            },
+        ),
+    ]
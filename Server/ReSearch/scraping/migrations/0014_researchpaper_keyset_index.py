@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0013_papersignature'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='researchpaper',
+            name='scraping_re_publica_47e26b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['-publication_date', '-created_at', '-id'], name='scraping_re_publica_5cc27f_idx'),
+        ),
+    ]
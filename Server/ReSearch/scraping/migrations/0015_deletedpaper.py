@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:25
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0014_researchpaper_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedPaper',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('paper_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.conf import settings
 import uuid
 
+from .paper_urls import paper_url_key
+
 class ResearchPaper(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=500)
@@ -10,10 +13,14 @@ class ResearchPaper(models.Model):
     source = models.CharField(max_length=50)
     url = models.URLField()
     pdf_url = models.URLField(null=True, blank=True)
+    # Deduplication key derived from url/pdf_url; see scraping.paper_urls
+    normalized_url = models.CharField(max_length=500, unique=True, null=True, blank=True, editable=False)
     categories = models.JSONField(default=list)
     publication_date = models.DateField()
     citation_count = models.PositiveIntegerField(default=0)
     average_reading_time = models.PositiveIntegerField(null=True, blank=True,default=0)
+    # Maintained by BookmarkedPaper; reconcile with `manage.py reconcile_bookmark_counts`
+    active_bookmarks_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -26,10 +33,24 @@ class ResearchPaper(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        key = paper_url_key(self.url, self.pdf_url)
+        if key and self.normalized_url is None and not self._state.adding and (
+                ResearchPaper.objects.filter(normalized_url=key).exclude(pk=self.pk).exists()):
+            # A duplicate that predates the key (see migration 0010) leaves it to the copy
+            # that holds it until `manage.py dedupe_papers` merges the two
+            key = None
+        self.normalized_url = key
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'url', 'pdf_url'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'normalized_url'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-publication_date']
         indexes = [
-            models.Index(fields=['-publication_date']),
+            # Serves the newest-first listing and its keyset cursors (scraping.pagination)
+            models.Index(fields=['-publication_date', '-created_at', '-id']),
             models.Index(fields=['source']),
         ]
 
@@ -49,6 +70,10 @@ class ReadPaper(models.Model):
     read_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # The paper's values when this read started counting in MonthlyReadingStats;
+    # exactly these are taken out again when it stops (see scraping.reading_stats)
+    counted_citations = models.PositiveIntegerField(default=0, editable=False)
+    counted_reading_time = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('user', 'paper')
@@ -97,12 +122,46 @@ class BookmarkedPaper(models.Model):
         user_email = self.user.email if self.user else 'Deleted User'
         return f"{user_email} - {self.paper.title}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                # Locked so a concurrent toggle waits and then sees the state this one leaves
+                previous = BookmarkedPaper.objects.select_for_update().filter(pk=self.pk).values(
+                    'paper_id', 'is_active'
+                ).first()
+            super().save(*args, **kwargs)
+            counted_before = previous['paper_id'] if previous and previous['is_active'] else None
+            counted_now = self.paper_id if self.is_active else None
+            if counted_before != counted_now:
+                if counted_before:
+                    adjust_active_bookmarks(counted_before, -1)
+                if counted_now:
+                    adjust_active_bookmarks(counted_now, 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Only the call that actually removes the active row takes it off the counter
+            removed = BookmarkedPaper.objects.filter(pk=self.pk, is_active=True).delete()
+            if not removed[0]:
+                return super().delete(*args, **kwargs)
+            adjust_active_bookmarks(self.paper_id, -1)
+            self.pk = None
+            return removed
+
     def soft_delete(self):
         self.is_active = False
         self.save()
         
     def hard_delete(self):
-        super().delete()
+        self.delete()
+
+
+def adjust_active_bookmarks(paper_id, delta):
+    """Atomically shift a paper's active bookmark counter without a read-modify-write"""
+    ResearchPaper.objects.filter(pk=paper_id).update(
+        active_bookmarks_count=Greatest(models.F('active_bookmarks_count') + delta, 0)
+    )
 
 class ResearchPaperCategory(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -194,4 +253,171 @@ class CategoryLike(models.Model):
             self.category.save(update_fields=['like_count'])
 
     def hard_delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        super().delete(*args, **kwargs)
+
+class PaperCategory(models.Model):
+    """Normalized paper/category membership mirrored from ResearchPaper.categories"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    paper = models.ForeignKey(
+        ResearchPaper,
+        on_delete=models.CASCADE,
+        related_name='category_links'
+    )
+    category = models.CharField(max_length=255)
+    # Denormalized from the paper so category browsing is a single index range scan
+    publication_date = models.DateField()
+
+    class Meta:
+        unique_together = ('paper', 'category')
+        indexes = [
+            models.Index(fields=['category', '-publication_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.category} - {self.paper_id}"
+
+
+class MonthlyReadingStats(models.Model):
+    """Per-user, per-month rollup of active ReadPaper rows, maintained from signals"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_reading_stats'
+    )
+    month = models.DateField(help_text="First day of the month")
+    papers_read = models.PositiveIntegerField(default=0)
+    total_citations = models.PositiveBigIntegerField(default=0)
+    total_reading_time = models.PositiveBigIntegerField(default=0)
+    # Number of reads whose paper has a reading time, i.e. the denominator of the average
+    reading_time_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'month')
+        ordering = ['-month']
+        verbose_name_plural = "Monthly reading stats"
+
+    def __str__(self):
+        user_email = self.user.email if self.user else 'Deleted User'
+        return f"{user_email} - {self.month:%Y-%m}"
+
+    @property
+    def average_reading_time(self):
+        if not self.reading_time_count:
+            return 0
+        return self.total_reading_time / self.reading_time_count
+
+
+class CategoryPaperCount(models.Model):
+    """Number of papers per normalized category, kept in step with PaperCategory; rebuild with `manage.py rebuild_category_counts`"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    category = models.CharField(max_length=255, unique=True)
+    paper_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-paper_count']
+        indexes = [
+            models.Index(fields=['-paper_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.category} ({self.paper_count})"
+
+
+class UserRecommendation(models.Model):
+    """Last computed recommendation list for a user, refreshed in the background"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='paper_recommendation'
+    )
+    # [[paper_id, score], ...], best first
+    paper_scores = models.JSONField(default=list, blank=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+    is_dirty = models.BooleanField(default=True)
+    # Last interaction that invalidated the list; refreshes wait for it to settle
+    dirtied_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_dirty', 'dirtied_at']),
+            models.Index(fields=['computed_at']),
+        ]
+
+    def __str__(self):
+        user_email = self.user.email if self.user else 'Deleted User'
+        return f"{user_email} - {len(self.paper_scores)} recommendations"
+
+
+class HarvestCheckpoint(models.Model):
+    """Progress of a paper harvest, so an interrupted run resumes where it stopped"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    source = models.CharField(max_length=50)
+    query = models.CharField(max_length=500)
+    # The date window being harvested and the next result offset inside it
+    window_start = models.DateField(null=True, blank=True)
+    window_end = models.DateField(null=True, blank=True)
+    next_offset = models.PositiveIntegerField(default=0)
+    total_results = models.PositiveIntegerField(null=True, blank=True)
+    harvested_count = models.PositiveIntegerField(default=0)
+    # Incremental (OAI-PMH) harvests: where the in-progress list continues,
+    # and the newest record datestamp of the last completed run
+    resumption_token = models.TextField(blank=True, default='')
+    watermark = models.DateField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'query'], name='unique_harvest_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.source}: {self.query} @ {self.window_start} +{self.next_offset}"
+
+
+class PaperSignature(models.Model):
+    """MinHash signature of a paper's title and abstract; see scraping.near_duplicates"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    paper = models.OneToOneField(
+        ResearchPaper,
+        on_delete=models.CASCADE,
+        related_name='minhash_signature'
+    )
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"MinHash of {self.paper_id}"
+
+
+class PaperSignatureBand(models.Model):
+    """One LSH band bucket of a PaperSignature; papers sharing a bucket are duplicate candidates"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    paper = models.ForeignKey(
+        ResearchPaper,
+        on_delete=models.CASCADE,
+        related_name='signature_bands'
+    )
+    band = models.PositiveSmallIntegerField()
+    # Hash of the band number and the signature rows in it
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ('paper', 'band')
+        indexes = [
+            models.Index(fields=['bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.paper_id} band {self.band}"
+
+
+class DeletedPaper(models.Model):
+    """Tombstone of a deleted ResearchPaper, so index syncs see deletions without scanning every id"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    paper_id = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.paper_id} deleted {self.deleted_at}"
@@ -0,0 +1,331 @@
+"""
+Near-duplicate detection of papers scraped from different sources.
+
+The same paper arrives from arXiv, IEEE and ScienceDirect with slightly
+different titles, abstracts and URLs, so the normalized URL key does not
+catch it. Each paper gets a MinHash signature over character shingles of its
+normalized title and abstract (PaperSignature), split into LSH bands whose
+bucket hashes are stored in PaperSignatureBand. Papers sharing a bucket with
+an incoming paper are its only candidates, so a lookup is one indexed query
+no matter how large the corpus is; candidates are confirmed by comparing
+full signatures.
+
+Ingestion folds an incoming near-duplicate into the stored (or earlier
+incoming) paper it duplicates instead of inserting it; ``merge_papers``
+does the same for duplicates already stored.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+
+from .categories import normalize_category
+from .models import BookmarkedPaper, PaperSignature, PaperSignatureBand, ReadPaper, ResearchPaper
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_FIELDS = {'title', 'abstract'}
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs with a Jaccard similarity of about 0.7 or more
+# share a bucket with high probability, much less similar pairs rarely do
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity above which two papers are the same paper
+DUPLICATE_THRESHOLD = 0.8
+# Texts with fewer shingles (about 50 characters) get no signature: short generic
+# records such as "Editorial" would otherwise look identical and be merged
+MIN_SHINGLES = 50
+LOOKUP_CHUNK_SIZE = 2000
+INSERT_BATCH_SIZE = 1000
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures stored by earlier runs must stay comparable. a < 2**32
+# keeps the product of a and a 32-bit shingle hash within uint64.
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text):
+    """Lowercase ASCII letters and digits separated by single spaces."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def shingles(title, abstract):
+    text = ' '.join(filter(None, (normalize_text(title), normalize_text(abstract))))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def paper_signature(title, abstract):
+    """
+    MinHash signature (uint32[NUM_PERM]) of a paper's text, or None when it
+    has fewer than MIN_SHINGLES shingles.
+    """
+    hashed = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little')
+         for shingle in shingles(title, abstract)),
+        dtype=np.uint64,
+    )
+    if hashed.size < MIN_SHINGLES:
+        return None
+    # Universal hashing (a * x + b) mod p emulates NUM_PERM random permutations;
+    # reducing a * x first keeps the sum below 2**62
+    permuted = (np.outer(hashed, _A) % _MERSENNE + _B) % _MERSENNE & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """The bucket hash of every band of ``signature``."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(signature == other))
+
+
+def _from_bytes(value):
+    return np.frombuffer(bytes(value), dtype=np.uint32)
+
+
+def index_papers(papers):
+    """Store signatures and band buckets for ``papers``, skipping unchanged ones."""
+    papers = [paper for paper in papers if paper.pk]
+    if not papers:
+        return
+    ids = [paper.pk for paper in papers]
+    stored = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        stored.update(PaperSignature.objects.filter(
+            paper_id__in=ids[start:start + LOOKUP_CHUNK_SIZE]
+        ).values_list('paper_id', 'signature'))
+
+    changed, signatures, bands = [], [], []
+    for paper in papers:
+        signature = paper_signature(paper.title, paper.abstract)
+        previous = stored.get(paper.pk)
+        if signature is None:
+            if previous is not None:
+                changed.append(paper.pk)
+            continue
+        if previous is not None and bytes(previous) == signature.tobytes():
+            continue
+        changed.append(paper.pk)
+        signatures.append(PaperSignature(paper_id=paper.pk, signature=signature.tobytes()))
+        bands.extend(
+            PaperSignatureBand(paper_id=paper.pk, band=band, bucket=bucket)
+            for band, bucket in enumerate(band_buckets(signature))
+        )
+
+    with transaction.atomic():
+        for start in range(0, len(changed), LOOKUP_CHUNK_SIZE):
+            chunk = changed[start:start + LOOKUP_CHUNK_SIZE]
+            PaperSignature.objects.filter(paper_id__in=chunk).delete()
+            PaperSignatureBand.objects.filter(paper_id__in=chunk).delete()
+        PaperSignature.objects.bulk_create(signatures, batch_size=INSERT_BATCH_SIZE)
+        PaperSignatureBand.objects.bulk_create(bands, batch_size=INSERT_BATCH_SIZE)
+
+
+def _stored_candidates(buckets):
+    """``{bucket: [paper_id, ...]}`` for the stored papers in any of ``buckets``."""
+    candidates = defaultdict(list)
+    buckets = list(buckets)
+    for start in range(0, len(buckets), LOOKUP_CHUNK_SIZE):
+        rows = PaperSignatureBand.objects.filter(
+            bucket__in=buckets[start:start + LOOKUP_CHUNK_SIZE]
+        ).values_list('bucket', 'paper_id')
+        for bucket, paper_id in rows:
+            candidates[bucket].append(paper_id)
+    return candidates
+
+
+def _stored_signatures(paper_ids):
+    signatures = {}
+    paper_ids = list(paper_ids)
+    for start in range(0, len(paper_ids), LOOKUP_CHUNK_SIZE):
+        rows = PaperSignature.objects.filter(
+            paper_id__in=paper_ids[start:start + LOOKUP_CHUNK_SIZE]
+        ).values_list('paper_id', 'signature')
+        signatures.update((paper_id, _from_bytes(signature)) for paper_id, signature in rows)
+    return signatures
+
+
+def _best_match(signature, candidates, signatures):
+    best, best_similarity = None, DUPLICATE_THRESHOLD
+    for candidate in candidates:
+        score = similarity(signature, signatures[candidate])
+        if score >= best_similarity:
+            best, best_similarity = candidate, score
+    return best
+
+
+def _category_list(categories):
+    if not categories:
+        return []
+    return [categories] if isinstance(categories, str) else list(categories)
+
+
+def absorb(canonical, duplicate):
+    """
+    Fill ``canonical`` in from ``duplicate``: missing text and links, the union
+    of categories, the higher citation count and the earlier publication date.
+    Returns the names of the fields that changed.
+    """
+    changed = []
+    for field in ('abstract', 'pdf_url', 'authors', 'average_reading_time'):
+        if not getattr(canonical, field) and getattr(duplicate, field):
+            setattr(canonical, field, getattr(duplicate, field))
+            changed.append(field)
+
+    categories = _category_list(canonical.categories)
+    before = len(categories)
+    known = {normalize_category(category) for category in categories}
+    for category in _category_list(duplicate.categories):
+        if normalize_category(category) not in known:
+            categories.append(category)
+            known.add(normalize_category(category))
+    if len(categories) != before:
+        canonical.categories = categories
+        changed.append('categories')
+
+    if (duplicate.citation_count or 0) > (canonical.citation_count or 0):
+        canonical.citation_count = duplicate.citation_count
+        changed.append('citation_count')
+    if duplicate.publication_date and (
+            not canonical.publication_date or duplicate.publication_date < canonical.publication_date):
+        canonical.publication_date = duplicate.publication_date
+        changed.append('publication_date')
+    return changed
+
+
+def merge_new_papers(papers):
+    """
+    Fold near-duplicates among unsaved ``papers`` into the stored paper, or
+    the earlier paper of the batch, that they duplicate.
+
+    Returns ``(papers, absorbed, fields, merged)``: the papers left to
+    insert, the stored papers that absorbed a duplicate, the fields changed
+    on them and the number of papers folded away.
+    """
+    signatures = [paper_signature(paper.title, paper.abstract) for paper in papers]
+    buckets = [band_buckets(signature) if signature is not None else [] for signature in signatures]
+    stored = _stored_candidates({bucket for paper_buckets in buckets for bucket in paper_buckets})
+    stored_signatures = _stored_signatures({pk for ids in stored.values() for pk in ids})
+
+    kept, kept_signatures = [], {}
+    batch = defaultdict(list)
+    matches = {}
+    for position, paper in enumerate(papers):
+        signature = signatures[position]
+        if signature is None:
+            kept.append(paper)
+            continue
+        stored_match = _best_match(
+            signature, {pk for bucket in buckets[position] for pk in stored[bucket]}, stored_signatures
+        )
+        if stored_match is not None:
+            matches[position] = stored_match
+            continue
+        batch_match = _best_match(
+            signature, {other for bucket in buckets[position] for other in batch[bucket]}, kept_signatures
+        )
+        if batch_match is not None:
+            absorb(papers[batch_match], paper)
+            continue
+        kept.append(paper)
+        kept_signatures[position] = signature
+        for bucket in buckets[position]:
+            batch[bucket].append(position)
+
+    absorbed = ResearchPaper.objects.in_bulk(set(matches.values()))
+    fields = set()
+    for position, pk in matches.items():
+        fields.update(absorb(absorbed[pk], papers[position]))
+    merged = len(papers) - len(kept)
+    if merged:
+        logger.info(f"Merged {merged} near-duplicate papers into {len(absorbed)} stored papers and the batch")
+    return kept, list(absorbed.values()), sorted(fields), merged
+
+
+def _move_rows(rows, canonical):
+    """Re-point user reads or bookmarks at ``canonical``, keeping one row per user."""
+    for row in rows:
+        existing = type(row).objects.filter(user_id=row.user_id, paper=canonical).first() if row.user_id else None
+        if existing is None:
+            row.paper = canonical
+            row.save()
+            continue
+        if row.is_active and not existing.is_active:
+            existing.is_active = True
+        if not existing.notes and row.notes:
+            existing.notes = row.notes
+        existing.save()
+        row.hard_delete()
+
+
+def merge_papers(canonical, duplicates):
+    """
+    Merge stored ``duplicates`` into ``canonical``: their data is absorbed,
+    their reads and bookmarks move over and they are deleted. Runs through
+    the model methods so counters, reading stats and indexes stay in step.
+    """
+    with transaction.atomic():
+        changed = set()
+        for duplicate in duplicates:
+            changed.update(absorb(canonical, duplicate))
+        if changed:
+            # Only the merged fields: moving bookmarks updates the stored counter
+            canonical.save(update_fields=[*changed, 'updated_at'])
+        for duplicate in duplicates:
+            _move_rows(ReadPaper.objects.filter(paper=duplicate), canonical)
+            _move_rows(BookmarkedPaper.objects.filter(paper=duplicate), canonical)
+            duplicate.delete()
+
+
+def stored_duplicate_groups():
+    """Groups of stored paper ids that are near-duplicates of each other."""
+    shared = (
+        PaperSignatureBand.objects.values('bucket')
+        .annotate(papers=Count('id')).filter(papers__gt=1).values_list('bucket', flat=True)
+    )
+    by_bucket = defaultdict(set)
+    for bucket, paper_id in PaperSignatureBand.objects.filter(bucket__in=shared).values_list('bucket', 'paper_id'):
+        by_bucket[bucket].add(paper_id)
+
+    pairs = {tuple(sorted(map(str, (a, b)))) for ids in by_bucket.values() for a in ids for b in ids if a != b}
+    signatures = _stored_signatures({pk for ids in by_bucket.values() for pk in ids})
+    signatures = {str(pk): signature for pk, signature in signatures.items()}
+
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for a, b in pairs:
+        if similarity(signatures[a], signatures[b]) >= DUPLICATE_THRESHOLD:
+            parent[find(a)] = find(b)
+
+    groups = defaultdict(list)
+    for node in parent:
+        groups[find(node)].append(node)
+    return [group for group in groups.values() if len(group) > 1]
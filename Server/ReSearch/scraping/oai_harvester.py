@@ -0,0 +1,149 @@
+"""
+Incremental harvesting of arXiv's OAI-PMH ``ListRecords`` feed.
+
+Each (source, set) pair has a HarvestCheckpoint whose ``watermark`` is the
+newest record datestamp of the last completed run. A run asks for records
+from that day on (OAI dates are inclusive, and re-seeing that day's
+records is harmless because ingestion upserts), follows resumption tokens
+to the end of the list and upserts each page as it arrives, while the next
+page downloads. The current token is checkpointed after every page so an
+interrupted run continues the same list; if the repository has expired the
+token, the list is requested again from the watermark.
+"""
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .arxiv_feed import OaiError, OaiListParser
+from .arxiv_harvester import ingest_page
+from .fetching import PoliteClient
+from .models import HarvestCheckpoint
+
+logger = logging.getLogger(__name__)
+
+SOURCE = 'arxiv-oai'
+METADATA_PREFIX = 'arXiv'
+# arXiv asks OAI clients to wait between list requests and sends Retry-After when busy
+REQUEST_INTERVAL = 3.0
+# How far back a harvest of a set that has never been harvested starts
+INITIAL_LOOKBACK_DAYS = 7
+
+
+def oai_url():
+    return getattr(settings, 'ARXIV_OAI_URL', 'https://oaipmh.arxiv.org/oai')
+
+
+def default_sets():
+    return getattr(settings, 'ARXIV_OAI_SETS', ['cs'])
+
+
+@sync_to_async
+def _load_checkpoint(set_spec, start, restart):
+    checkpoint, _ = HarvestCheckpoint.objects.get_or_create(source=SOURCE, query=set_spec)
+    if restart:
+        checkpoint.resumption_token = ''
+        checkpoint.watermark = None
+    if start is not None:
+        checkpoint.watermark = start
+        checkpoint.resumption_token = ''
+    if not checkpoint.resumption_token:
+        # A new list: remember where it starts and track the newest datestamp seen
+        checkpoint.window_start = checkpoint.watermark or date.today() - timedelta(days=INITIAL_LOOKBACK_DAYS)
+        checkpoint.window_end = None
+        checkpoint.harvested_count = 0
+    checkpoint.save()
+    return checkpoint
+
+
+@sync_to_async
+def _store_page(checkpoint, records, token):
+    papers = [paper for _, paper in records if paper is not None]
+    stored = ingest_page(papers)
+    datestamps = [date.fromisoformat(stamp) for stamp, _ in records if stamp]
+    if datestamps:
+        newest = max(datestamps)
+        checkpoint.window_end = max(checkpoint.window_end, newest) if checkpoint.window_end else newest
+    checkpoint.resumption_token = token
+    checkpoint.harvested_count += stored
+    checkpoint.save()
+    return stored
+
+
+@sync_to_async
+def _finish(checkpoint):
+    if checkpoint.window_end:
+        checkpoint.watermark = max(checkpoint.window_end, checkpoint.watermark or checkpoint.window_end)
+    elif not checkpoint.watermark:
+        checkpoint.watermark = checkpoint.window_start
+    checkpoint.resumption_token = ''
+    checkpoint.completed_at = timezone.now()
+    checkpoint.save()
+
+
+@sync_to_async
+def _forget_token(checkpoint):
+    checkpoint.resumption_token = ''
+    checkpoint.save()
+
+
+async def _fetch(client, params):
+    parser, records = await client.parse(oai_url(), params, OaiListParser)
+    return records, parser.resumption_token
+
+
+async def harvest_oai_set(client, set_spec, start=None, restart=False):
+    """Harvest one set incrementally; returns the number of papers stored."""
+    checkpoint = await _load_checkpoint(set_spec, start, restart)
+    if checkpoint.resumption_token:
+        logger.info(f"Resuming OAI harvest of {set_spec!r} from its resumption token")
+        params = {'verb': 'ListRecords', 'resumptionToken': checkpoint.resumption_token}
+    else:
+        logger.info(f"OAI harvest of {set_spec!r} from {checkpoint.window_start}")
+        params = {
+            'verb': 'ListRecords',
+            'metadataPrefix': METADATA_PREFIX,
+            'set': set_spec,
+            'from': checkpoint.window_start.isoformat(),
+        }
+
+    try:
+        records, token = await _fetch(client, params)
+    except OaiError as e:
+        if e.code != 'badResumptionToken':
+            raise
+        logger.warning(f"Resumption token for {set_spec!r} expired; restarting from the watermark")
+        await _forget_token(checkpoint)
+        return await harvest_oai_set(client, set_spec)
+
+    stored = 0
+    while True:
+        # Download the next page while this one is being stored
+        next_page = asyncio.ensure_future(
+            _fetch(client, {'verb': 'ListRecords', 'resumptionToken': token})
+        ) if token else None
+        try:
+            stored += await _store_page(checkpoint, records, token)
+        except BaseException:
+            if next_page:
+                next_page.cancel()
+            raise
+        if next_page is None:
+            break
+        records, token = await next_page
+
+    await _finish(checkpoint)
+    logger.info(f"OAI harvest of {set_spec!r} stored {stored} papers; watermark {checkpoint.watermark}")
+    return stored
+
+
+async def harvest_oai(sets=None, start=None, restart=False, interval=REQUEST_INTERVAL):
+    """Harvest every set in ``sets`` (default ``settings.ARXIV_OAI_SETS``) one after another."""
+    stored = 0
+    async with PoliteClient(interval=interval) as client:
+        for set_spec in sets or default_sets():
+            stored += await harvest_oai_set(client, set_spec, start=start, restart=restart)
+    return stored
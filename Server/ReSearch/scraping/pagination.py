@@ -0,0 +1,141 @@
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaperCursorPagination(BasePagination):
+    """
+    Keyset pagination over (publication_date, created_at, id), newest first.
+
+    Each page is a single indexed range query of ``limit + 1`` rows, so deep
+    pages cost the same as the first one and no COUNT(*) is issued. Cursors
+    are opaque tokens encoding the boundary row of the current page.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 10
+    max_limit = 5000
+    ordering = ('-publication_date', '-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), 'offset')
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+
+        reverse = cursor is not None and cursor['reverse']
+        if reverse:
+            queryset = queryset.order_by(*(field.lstrip('-') for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor['key'], reverse))
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def keyset_filter(self, key, reverse=False):
+        """
+        Rows past ``key`` in the page order. The leading ``publication_date``
+        bound lets SQLite range-scan the (publication_date, created_at, id)
+        index and stop after ``limit + 1`` rows; the disjunction alone is
+        planned as a multi-index OR followed by a sort of every match.
+        """
+        publication_date, created_at, paper_id = key
+        op = 'gt' if reverse else 'lt'
+        return Q(**{f'publication_date__{op}e': publication_date}) & (
+            Q(**{f'publication_date__{op}': publication_date}) |
+            Q(publication_date=publication_date, **{f'created_at__{op}': created_at}) |
+            Q(publication_date=publication_date, created_at=created_at, **{f'id__{op}': paper_id})
+        )
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            key = (
+                date.fromisoformat(data['d']),
+                datetime.fromisoformat(data['c']),
+                uuid.UUID(data['i']),
+            )
+            return {'key': key, 'reverse': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, paper, reverse=False):
+        data = {
+            'd': paper.publication_date.isoformat(),
+            'c': paper.created_at.isoformat(),
+            'i': paper.pk.hex,
+        }
+        if reverse:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        return encoded.decode('ascii').rstrip('=')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.page[0], reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,219 @@
+"""
+Per-paper feature matrices used to score recommendations for a whole corpus
+at once.
+
+They are computed when a paper index version is built and stored in the same
+version directory, so scoring a set of candidate papers is a handful of
+sparse matrix-vector products instead of a Python loop. Incremental index
+updates store the rows of changed papers separately, encoded with the
+version's vocabularies extended by any new terms, and readers append them;
+vocabularies only grow between full rebuilds.
+"""
+import os
+from datetime import date
+
+import numpy as np
+from scipy import sparse
+
+from .categories import paper_categories
+
+CATEGORY_MATRIX_FILE = 'categories.npz'
+KEYWORD_MATRIX_FILE = 'keywords.npz'
+AUTHOR_MATRIX_FILE = 'authors.npz'
+ARRAYS_FILE = 'features.npz'
+
+MIN_KEYWORD_LENGTH = 4
+
+
+def keyword_tokens(text):
+    """Distinct lowercased words of at least MIN_KEYWORD_LENGTH characters."""
+    return list({word for word in str(text).lower().split() if len(word) >= MIN_KEYWORD_LENGTH})
+
+
+def paper_keywords(paper):
+    return keyword_tokens(f"{paper.get('title') or ''} {paper.get('abstract') or ''}")
+
+
+def paper_authors(paper):
+    return list({str(author) for author in paper.get('authors') or []})
+
+
+def citation_score(citations):
+    """The citation impact term: log-scaled and capped at 1."""
+    return np.minimum(np.log1p(citations) / 10, 1.0)
+
+
+def recency_score(publication_days, today=None):
+    """Exponential decay over a year of age; undated or future papers score 0."""
+    today = (today or date.today()).toordinal()
+    days_old = today - publication_days
+    scores = np.exp(-np.maximum(days_old, 0) / 365.0)
+    return np.where((days_old >= 0) & (publication_days >= 0), scores, 0.0)
+
+
+def diversity_citation_weight(citations):
+    """Citation weight used by the diversity term (uncited papers still get 0.1)."""
+    return np.where(citations > 0, citation_score(citations), 0.1)
+
+
+def _encode(documents, vocabulary, columns):
+    """Binary CSR rows for pre-tokenized documents, adding unseen terms to the vocabulary."""
+    indptr = [0]
+    indices = []
+    for tokens in documents:
+        for token in tokens:
+            column = columns.get(token)
+            if column is None:
+                column = columns[token] = len(vocabulary)
+                vocabulary.append(token)
+            indices.append(column)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(documents), len(vocabulary)))
+
+
+def _append_rows(matrix, blocks, width):
+    """Stack ``blocks`` under ``matrix``, widening everything to ``width`` columns."""
+    widened = []
+    for block in [matrix, *blocks]:
+        if block.shape[1] < width:
+            block = block.copy()
+            block.resize((block.shape[0], width))
+        widened.append(block)
+    return sparse.vstack(widened, format='csr', dtype=np.float32)
+
+
+class PaperFeatures:
+    """Row-aligned feature matrices for the papers of one index version."""
+
+    def __init__(self, categories, keywords, authors, category_vocab, keyword_vocab,
+                 author_vocab, citations, publication_days):
+        self.categories = categories
+        self.keywords = keywords
+        self.authors = authors
+        self.category_vocab = list(category_vocab)
+        self.keyword_vocab = list(keyword_vocab)
+        self.author_vocab = list(author_vocab)
+        self.citations = citations
+        self.publication_days = publication_days
+
+        self.category_columns = {term: i for i, term in enumerate(self.category_vocab)}
+        self.keyword_columns = {term: i for i, term in enumerate(self.keyword_vocab)}
+        self.author_columns = {term: i for i, term in enumerate(self.author_vocab)}
+        self._refresh_counts()
+
+    def _refresh_counts(self):
+        self.category_counts = np.asarray(self.categories.getnnz(axis=1), dtype=np.float32)
+        self.keyword_counts = np.asarray(self.keywords.getnnz(axis=1), dtype=np.float32)
+
+    def __len__(self):
+        return self.categories.shape[0]
+
+    @classmethod
+    def empty(cls):
+        matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        return cls(
+            matrix, matrix.copy(), matrix.copy(), [], [], [],
+            np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32)
+        )
+
+    @classmethod
+    def build(cls, papers):
+        features = cls.empty()
+        features.extend(papers)
+        return features
+
+    def extend(self, papers):
+        """Append one row per paper, in order."""
+        self.extend_batches([papers])
+
+    def extend_batches(self, batches):
+        """
+        Append rows for an iterable of paper batches, consuming one batch at a
+        time and stacking the matrices once at the end.
+        """
+        categories, keywords, authors, citations, publication_days = [], [], [], [], []
+        for papers in batches:
+            categories.append(_encode(
+                [paper_categories(p.get('categories')) for p in papers],
+                self.category_vocab, self.category_columns
+            ))
+            keywords.append(_encode(
+                [paper_keywords(p) for p in papers], self.keyword_vocab, self.keyword_columns
+            ))
+            authors.append(_encode(
+                [paper_authors(p) for p in papers], self.author_vocab, self.author_columns
+            ))
+            citations.append(np.array([p.get('citation_count') or 0 for p in papers], dtype=np.float32))
+            publication_days.append(np.array(
+                [p['publication_date'].toordinal() if p.get('publication_date') else -1 for p in papers],
+                dtype=np.int32
+            ))
+
+        self.categories = _append_rows(self.categories, categories, len(self.category_vocab))
+        self.keywords = _append_rows(self.keywords, keywords, len(self.keyword_vocab))
+        self.authors = _append_rows(self.authors, authors, len(self.author_vocab))
+        self.citations = np.concatenate([self.citations, *citations])
+        self.publication_days = np.concatenate([self.publication_days, *publication_days])
+        self._refresh_counts()
+
+    def append(self, other):
+        """Append the rows of ``other``, whose vocabularies extend these (see ``load_empty``)."""
+        self.category_vocab, self.category_columns = other.category_vocab, other.category_columns
+        self.keyword_vocab, self.keyword_columns = other.keyword_vocab, other.keyword_columns
+        self.author_vocab, self.author_columns = other.author_vocab, other.author_columns
+        self.categories = _append_rows(self.categories, [other.categories], len(self.category_vocab))
+        self.keywords = _append_rows(self.keywords, [other.keywords], len(self.keyword_vocab))
+        self.authors = _append_rows(self.authors, [other.authors], len(self.author_vocab))
+        self.citations = np.concatenate([self.citations, other.citations])
+        self.publication_days = np.concatenate([self.publication_days, other.publication_days])
+        self._refresh_counts()
+
+    def save(self, path):
+        sparse.save_npz(os.path.join(path, CATEGORY_MATRIX_FILE), self.categories)
+        sparse.save_npz(os.path.join(path, KEYWORD_MATRIX_FILE), self.keywords)
+        sparse.save_npz(os.path.join(path, AUTHOR_MATRIX_FILE), self.authors)
+        np.savez(
+            os.path.join(path, ARRAYS_FILE),
+            category_vocab=np.array(self.category_vocab, dtype=str),
+            keyword_vocab=np.array(self.keyword_vocab, dtype=str),
+            author_vocab=np.array(self.author_vocab, dtype=str),
+            citations=self.citations,
+            publication_days=self.publication_days,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(os.path.join(path, ARRAYS_FILE)) as arrays:
+            return cls(
+                sparse.load_npz(os.path.join(path, CATEGORY_MATRIX_FILE)).tocsr(),
+                sparse.load_npz(os.path.join(path, KEYWORD_MATRIX_FILE)).tocsr(),
+                sparse.load_npz(os.path.join(path, AUTHOR_MATRIX_FILE)).tocsr(),
+                arrays['category_vocab'].tolist(),
+                arrays['keyword_vocab'].tolist(),
+                arrays['author_vocab'].tolist(),
+                arrays['citations'],
+                arrays['publication_days'],
+            )
+
+    @classmethod
+    def load_empty(cls, path):
+        """No rows, but the vocabularies saved at ``path``, so new rows share its columns."""
+        with np.load(os.path.join(path, ARRAYS_FILE)) as arrays:
+            matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+            return cls(
+                matrix, matrix.copy(), matrix.copy(),
+                arrays['category_vocab'].tolist(),
+                arrays['keyword_vocab'].tolist(),
+                arrays['author_vocab'].tolist(),
+                np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32)
+            )
+
+    def weights(self, columns, values):
+        """Dense weight vector over a vocabulary from a ``{term: weight}`` mapping."""
+        vector = np.zeros(len(columns), dtype=np.float32)
+        for term, weight in values.items():
+            column = columns.get(term)
+            if column is not None:
+                vector[column] = weight
+        return vector
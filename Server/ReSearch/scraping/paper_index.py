@@ -0,0 +1,542 @@
+"""
+On-disk, versioned paper index used by the recommendation engine.
+
+Each build is written to its own directory under ``settings.PAPER_INDEX_DIR`` and
+published by atomically replacing a ``CURRENT`` pointer file. Processes load
+the current version once, memory-map the faiss index so workers share the
+same pages, and hot-swap when the pointer or the version's generation changes.
+
+Vectors are keyed by ``paper_rowid`` in an ``IndexIDMap2``. A version's
+base files never change after publishing. ``sync_paper_index`` adds the
+papers changed since the base was built to the same version directory as a
+small delta (their vectors, feature rows and the base rows they replace or
+delete) and bumps ``generation`` in its ``meta.json``; readers keep the base
+mapped and load only the new delta, searching both. Changed papers are found
+by ``updated_at`` and deleted ones by their DeletedPaper tombstones, so each
+sync costs the changes since the last build, not the corpus. Once the delta holds
+DELTA_REBUILD_RATIO of the base, or nightly from CELERY_BEAT_SCHEDULE,
+``rebuild_paper_index`` builds a new version from scratch, which also
+re-weights every vector with current IDF statistics.
+
+``settings.PAPER_INDEX_VECTORIZER`` selects how text becomes vectors:
+``'hashing'`` (default) uses the stateless HashingTfidfVectorizer, whose IDF
+statistics are updated as papers are added and whose rebuild streams the
+corpus in batches; ``'tfidf'`` fits a TfidfVectorizer vocabulary on the whole
+corpus in memory and keeps it fixed until the next rebuild.
+"""
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import faiss
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .paper_features import ARRAYS_FILE, PaperFeatures
+from .search import paper_rowid
+from .text_vectorizer import HashingTfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+INDEX_DIMENSIONS = 200
+KEEP_VERSIONS = 2
+INDEX_PAPER_FIELDS = (
+    'id', 'title', 'abstract', 'categories', 'authors', 'citation_count',
+    'publication_date', 'updated_at'
+)
+# A save touching any of these makes the paper's index entry stale
+INDEX_SYNC_FIELDS = {
+    'title', 'abstract', 'categories', 'authors', 'citation_count', 'publication_date'
+}
+# How often a process re-reads CURRENT to pick up a new build
+CHECK_INTERVAL = 5.0
+# Rebuild instead of syncing once the delta reaches this share of the base rows
+DELTA_REBUILD_RATIO = 0.2
+# Delta directories kept, so readers that have not reloaded can still open theirs
+KEEP_DELTAS = 2
+
+INDEX_FILE = 'index.faiss'
+IDS_FILE = 'paper_ids.npy'
+VECTORS_FILE = 'vectors.npy'
+REMOVED_FILE = 'removed_ids.npy'
+DELTA_PREFIX = 'delta'
+VECTORIZER_FILE = 'vectorizer.pkl'
+POINTER_FILE = 'CURRENT'
+META_FILE = 'meta.json'
+
+# IO_FLAG_MMAP covers inverted lists; IO_FLAG_MMAP_IFC (newer faiss) maps flat codes in place
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, 'IO_FLAG_MMAP_IFC', 0) | faiss.IO_FLAG_READ_ONLY
+
+
+def vectorizer_mode():
+    return getattr(settings, 'PAPER_INDEX_VECTORIZER', 'hashing')
+
+
+def index_root():
+    return getattr(settings, 'PAPER_INDEX_DIR', os.path.join(settings.BASE_DIR, 'fissIndex', 'paper_index'))
+
+
+def process_categories(categories):
+    if not categories:
+        return ''
+    try:
+        return ','.join(str(cat).strip().lower() for cat in categories)
+    except Exception:
+        return ''
+
+
+def paper_text(paper: Dict) -> str:
+    return (
+        f"{str(paper.get('title', '')).lower()} {str(paper.get('abstract', '')).lower()} "
+        f"{process_categories(paper.get('categories', []))} "
+        f"{' '.join(str(author).lower() for author in paper.get('authors', []))}"
+    )
+
+
+def paper_labels(paper_ids):
+    """faiss ids for paper UUIDs (or their string form)."""
+    return np.array(
+        [paper_rowid(pid if isinstance(pid, uuid.UUID) else uuid.UUID(str(pid))) for pid in paper_ids],
+        dtype='int64'
+    )
+
+
+def current_version():
+    try:
+        with open(os.path.join(index_root(), POINTER_FILE), encoding='utf-8') as pointer:
+            return pointer.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_meta(version):
+    """``meta.json`` of a version; empty for versions built by an older release."""
+    try:
+        with open(os.path.join(index_root(), version, META_FILE), encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, f'.{META_FILE}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as handle:
+        json.dump(meta, handle)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+
+class PaperIndexManager:
+    """
+    A published version of the paper index plus its delta, or a build in progress.
+
+    Rows are the base rows followed by the delta rows; base rows of papers
+    re-indexed or deleted since the build are dead and never returned.
+    """
+
+    def __init__(self, index=None, paper_ids=None, vectorizer=None, version=None,
+                 features=None, watermark=None, generation=0):
+        self.index = index
+        self.paper_ids = paper_ids if paper_ids is not None else []
+        self.vectorizer = vectorizer
+        self.version = version
+        self.features = features
+        self.watermark = watermark
+        self.generation = generation
+        self.base_rows = len(self.paper_ids)
+        self.delta_index = None
+        self.dead = np.zeros(self.base_rows, dtype=bool)
+        self._positions = None
+        self._label_rows = None
+
+    @classmethod
+    def load(cls, version):
+        """Memory-map a published version and load its current delta."""
+        path = os.path.join(index_root(), version)
+        meta = read_meta(version)
+        index = faiss.read_index(os.path.join(path, INDEX_FILE), MMAP_FLAGS)
+        paper_ids = np.load(os.path.join(path, IDS_FILE), mmap_mode='r')
+        with open(os.path.join(path, VECTORIZER_FILE), 'rb') as handle:
+            vectorizer = pickle.load(handle)
+        try:
+            features = PaperFeatures.load(path)
+        except FileNotFoundError:
+            # Built by an older release; the next full rebuild adds these
+            features = None
+        manager = cls(
+            index=index, paper_ids=paper_ids, vectorizer=vectorizer, version=version,
+            features=features, watermark=parse_datetime(meta.get('watermark') or ''),
+            generation=meta.get('generation', 0)
+        )
+        if meta.get('delta') and features is not None:
+            manager._load_delta(os.path.join(path, meta['delta']))
+        return manager
+
+    def _load_delta(self, path):
+        paper_ids = np.load(os.path.join(path, IDS_FILE))
+        removed = np.load(os.path.join(path, REMOVED_FILE))
+        self.delta_index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.index.d))
+        if len(paper_ids):
+            self.delta_index.add_with_ids(np.load(os.path.join(path, VECTORS_FILE)), paper_labels(paper_ids))
+        # Carries the IDF statistics of the changed papers too
+        with open(os.path.join(path, VECTORIZER_FILE), 'rb') as handle:
+            self.vectorizer = pickle.load(handle)
+        self.features.append(PaperFeatures.load(path))
+        self.dead = np.isin(self.paper_ids, removed)
+        self.paper_ids = np.concatenate([self.paper_ids, paper_ids])
+
+    def __len__(self):
+        """Number of papers indexed, not counting dead rows."""
+        return len(self.paper_ids) - int(self.dead.sum())
+
+    def live_rows(self):
+        """Rows of the papers in the index."""
+        return np.concatenate([
+            np.flatnonzero(~self.dead), np.arange(self.base_rows, len(self.paper_ids))
+        ]).astype('int64')
+
+    def indexed_ids(self):
+        """Ids of the papers in the index."""
+        return [str(self.paper_ids[row]) for row in self.live_rows()]
+    def position(self, paper_id):
+        """Row of ``paper_id`` in the index, or None."""
+        if self._positions is None:
+            self._positions = {str(self.paper_ids[row]): int(row) for row in self.live_rows()}
+        return self._positions.get(str(paper_id))
+
+    def rows_for_labels(self, labels):
+        """Rows for faiss ids returned by a search; -1 where unknown."""
+        if self._label_rows is None:
+            base = faiss.vector_to_array(self.index.id_map)
+            self._label_rows = {int(label): row for row, label in enumerate(base) if not self.dead[row]}
+            if self.delta_index is not None:
+                delta = faiss.vector_to_array(self.delta_index.id_map)
+                self._label_rows.update((int(label), self.base_rows + row) for row, label in enumerate(delta))
+        return np.array([self._label_rows.get(int(label), -1) for label in labels], dtype='int64')
+
+    def search(self, vector, k):
+        """Rows of the ``k`` live papers nearest ``vector`` and their similarities, best first."""
+        # Dead base rows may take up to that many of the base hits
+        base_k = min(k + int(self.dead.sum()), self.index.ntotal)
+        similarities, rows = np.empty(0, dtype='float32'), np.empty(0, dtype='int64')
+        if base_k > 0:
+            found, labels = self.index.search(vector, base_k)
+            found_rows = self.rows_for_labels(labels[0])
+            # A re-indexed paper's label now maps to its delta row; its base hit is stale
+            keep = (found_rows >= 0) & (found_rows < self.base_rows)
+            similarities, rows = found[0][keep], found_rows[keep]
+        if self.delta_index is not None and self.delta_index.ntotal:
+            found, labels = self.delta_index.search(vector, min(k, self.delta_index.ntotal))
+            similarities = np.concatenate([similarities, found[0]])
+            rows = np.concatenate([rows, self.rows_for_labels(labels[0])])
+        order = np.argsort(-similarities, kind='stable')[:k]
+        return rows[order], similarities[order]
+
+    def vectors(self, paper_ids):
+        """Stored vectors of ``paper_ids``, which must all be indexed."""
+        labels = paper_labels(paper_ids)
+        in_delta = np.array([self.position(pid) >= self.base_rows for pid in paper_ids], dtype=bool)
+        vectors = np.empty((len(labels), self.index.d), dtype='float32')
+        if (~in_delta).any():
+            vectors[~in_delta] = self.index.reconstruct_batch(labels[~in_delta])
+        if in_delta.any():
+            vectors[in_delta] = self.delta_index.reconstruct_batch(labels[in_delta])
+        return vectors
+
+    @property
+    def streaming(self):
+        return isinstance(self.vectorizer, HashingTfidfVectorizer)
+
+    def fit_vectorizer(self, papers: List[Dict]):
+        if vectorizer_mode() == 'tfidf':
+            self.vectorizer = TfidfVectorizer(
+                max_features=INDEX_DIMENSIONS,
+                stop_words='english',
+                ngram_range=(1, 3),
+                lowercase=True
+            )
+            self.vectorizer.fit(paper_text(p) for p in papers)
+            # Only kept for introspection; dropping it keeps the pickle small
+            self.vectorizer.stop_words_ = None
+        else:
+            self.vectorizer = HashingTfidfVectorizer(INDEX_DIMENSIONS)
+            self.vectorizer.partial_fit(paper_text(p) for p in papers)
+
+    def build_vectors(self, papers: List[Dict]) -> np.ndarray:
+        if not self.vectorizer:
+            self.fit_vectorizer(papers)
+        vectors = self.vectorizer.transform([paper_text(p) for p in papers])
+        if sparse.issparse(vectors):
+            vectors = vectors.toarray()
+
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if vectors.shape[1] < INDEX_DIMENSIONS:
+            # Small corpora yield fewer TF-IDF features than the index dimension
+            vectors = np.pad(vectors, ((0, 0), (0, INDEX_DIMENSIONS - vectors.shape[1])))
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _add_vectors(self, papers: List[Dict]):
+        self.index.add_with_ids(self.build_vectors(papers), paper_labels(p['id'] for p in papers))
+        self.paper_ids.extend(str(p['id']) for p in papers)
+        self.watermark = latest_update(papers, self.watermark)
+        self._positions = self._label_rows = None
+
+    def _add(self, papers: List[Dict]):
+        for i in range(0, len(papers), CHUNK_SIZE):
+            self._add_vectors(papers[i:i + CHUNK_SIZE])
+        self.features.extend(papers)
+
+    def _reset(self):
+        if self.version is not None:
+            raise ValueError('Published index versions are read-only; build a new manager')
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(INDEX_DIMENSIONS))
+        self.paper_ids = []
+        self.features = PaperFeatures.empty()
+        self.watermark = None
+        # Deletions from here on may not be reflected in the papers read for this build
+        self.built_at = timezone.now()
+
+    def build_index(self, papers: List[Dict]):
+        """Index ``papers`` from scratch and publish the result as a new version."""
+        self._reset()
+        self.fit_vectorizer(papers)
+        self._add(papers)
+        self.publish()
+        return self
+
+    def build_index_streaming(self, batches):
+        """
+        Index the corpus from scratch with the hashing vectorizer in bounded
+        memory. ``batches`` is called twice and must return a fresh iterable of
+        paper batches each time: one pass for IDF statistics, one to index.
+        """
+        self._reset()
+        self.vectorizer = HashingTfidfVectorizer(INDEX_DIMENSIONS)
+        for papers in batches():
+            self.vectorizer.partial_fit(paper_text(p) for p in papers)
+
+        def indexed():
+            for papers in batches():
+                self._add_vectors(papers)
+                yield papers
+
+        self.features.extend_batches(indexed())
+        self.publish()
+        return self
+
+    def publish(self):
+        """Write this build to a fresh version directory and point CURRENT at it."""
+        root = index_root()
+        os.makedirs(root, exist_ok=True)
+        self.base_rows = len(self.paper_ids)
+        self.dead = np.zeros(self.base_rows, dtype=bool)
+        # Sortable by build time, unique across concurrent builders
+        version = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(root, f'.{version}.tmp')
+        os.makedirs(staging)
+        try:
+            faiss.write_index(self.index, os.path.join(staging, INDEX_FILE))
+            np.save(os.path.join(staging, IDS_FILE), np.asarray(self.paper_ids, dtype='U36'))
+            with open(os.path.join(staging, VECTORIZER_FILE), 'wb') as handle:
+                pickle.dump(self.vectorizer, handle, pickle.HIGHEST_PROTOCOL)
+            self.features.save(staging)
+            _write_meta(staging, {
+                'watermark': self.watermark.isoformat() if self.watermark else None,
+                'base_watermark': self.watermark.isoformat() if self.watermark else None,
+                'built_at': self.built_at.isoformat(),
+                'papers': len(self.paper_ids),
+                'generation': 0,
+                'delta': None,
+            })
+            os.replace(staging, os.path.join(root, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer_tmp = os.path.join(root, f'.{POINTER_FILE}.{version}')
+        with open(pointer_tmp, 'w', encoding='utf-8') as pointer:
+            pointer.write(version)
+        os.replace(pointer_tmp, os.path.join(root, POINTER_FILE))
+
+        self.version = version
+        logger.info(f"Published paper index {version} with {len(self.paper_ids)} papers")
+        prune_versions()
+        return version
+
+
+def latest_update(papers, watermark=None):
+    """The latest ``updated_at`` of ``papers`` and ``watermark``."""
+    stamps = [p['updated_at'] for p in papers if p.get('updated_at')]
+    if watermark is not None:
+        stamps.append(watermark)
+    return max(stamps) if stamps else None
+
+
+def prune_versions(keep=KEEP_VERSIONS):
+    """Delete all but the newest ``keep`` versions (mapped files stay valid for open readers)."""
+    root = index_root()
+    current = current_version()
+    versions = sorted(
+        name for name in os.listdir(root)
+        if not name.startswith('.') and os.path.isdir(os.path.join(root, name))
+    )
+    for name in versions[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+_current = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index_manager():
+    """The current index version for this process, reloaded when a new version is published."""
+    global _current, _checked_at
+    manager = _current
+    if manager is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return manager
+
+    with _lock:
+        _checked_at = time.monotonic()
+        version = current_version()
+        if version and (
+                _current is None or _current.version != version
+                or _current.generation != read_meta(version).get('generation', 0)):
+            try:
+                _current = PaperIndexManager.load(version)
+            except (OSError, RuntimeError, ValueError) as e:
+                logger.error(f"Failed to load paper index {version}: {e}")
+        return _current or PaperIndexManager()
+
+
+def _make_current(version):
+    global _current, _checked_at
+    with _lock:
+        _current = PaperIndexManager.load(version)
+        _checked_at = time.monotonic()
+    return _current
+
+
+def iter_batches(queryset, batch_size=CHUNK_SIZE):
+    batch = []
+    for row in queryset.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild_paper_index():
+    """Build a new index version from every paper and make it current in this process."""
+    from .models import DeletedPaper, ResearchPaper
+
+    papers = ResearchPaper.objects.order_by('pk').values(*INDEX_PAPER_FIELDS)
+    if not papers.exists():
+        return PaperIndexManager()
+    if vectorizer_mode() == 'tfidf':
+        manager = PaperIndexManager().build_index(list(papers))
+    else:
+        manager = PaperIndexManager().build_index_streaming(lambda: iter_batches(papers))
+    # The new base no longer holds these papers
+    DeletedPaper.objects.filter(deleted_at__lt=manager.built_at).delete()
+    return _make_current(manager.version)
+
+
+def sync_paper_index():
+    """
+    Bring the current version up to date with papers saved or deleted since
+    it was built by writing a new delta into its directory. Falls back to a
+    full rebuild when there is nothing to update incrementally or the delta
+    has grown too large.
+    """
+    from .models import DeletedPaper, ResearchPaper
+
+    version = current_version()
+    meta = read_meta(version) if version else {}
+    base_watermark = parse_datetime(meta.get('base_watermark') or meta.get('watermark') or '')
+    built_at = parse_datetime(meta.get('built_at') or '')
+    path = os.path.join(index_root(), version) if version else None
+    if base_watermark is None or built_at is None or not os.path.exists(os.path.join(path, ARRAYS_FILE)):
+        return rebuild_paper_index()
+
+    changed = list(
+        ResearchPaper.objects.filter(updated_at__gt=base_watermark).order_by('pk').values(*INDEX_PAPER_FIELDS)
+    )
+    deleted_ids = {
+        str(pid) for pid in DeletedPaper.objects.filter(deleted_at__gte=built_at).values_list('paper_id', flat=True)
+    }
+    if len(changed) + len(deleted_ids) > DELTA_REBUILD_RATIO * meta.get('papers', 0):
+        return rebuild_paper_index()
+    watermark = parse_datetime(meta.get('watermark') or '')
+    deleted = len(deleted_ids)
+    if (latest_update(changed, watermark) == watermark and len(changed) == meta.get('changed', 0)
+            and deleted == meta.get('deleted', 0)):
+        return get_index_manager()
+    # Base rows to drop; ids that are not in the base (papers added since) are ignored on load
+    removed = sorted({str(p['id']) for p in changed} | deleted_ids)
+
+    with open(os.path.join(path, VECTORIZER_FILE), 'rb') as handle:
+        manager = PaperIndexManager(vectorizer=pickle.load(handle))
+    if manager.streaming and changed:
+        # Streamed IDF: the changed papers update the statistics without a refit
+        manager.vectorizer.partial_fit(paper_text(p) for p in changed)
+    vectors = [manager.build_vectors(changed[i:i + CHUNK_SIZE]) for i in range(0, len(changed), CHUNK_SIZE)]
+    features = PaperFeatures.load_empty(path)
+    features.extend(changed)
+
+    generation = meta.get('generation', 0) + 1
+    name = f'{DELTA_PREFIX}.{generation}'
+    staging = os.path.join(path, f'.{name}.tmp')
+    os.makedirs(staging)
+    try:
+        np.save(os.path.join(staging, IDS_FILE), np.array([str(p['id']) for p in changed], dtype='U36'))
+        np.save(
+            os.path.join(staging, VECTORS_FILE),
+            np.vstack(vectors) if vectors else np.zeros((0, INDEX_DIMENSIONS), dtype='float32')
+        )
+        np.save(os.path.join(staging, REMOVED_FILE), np.array(removed, dtype='U36'))
+        with open(os.path.join(staging, VECTORIZER_FILE), 'wb') as handle:
+            pickle.dump(manager.vectorizer, handle, pickle.HIGHEST_PROTOCOL)
+        features.save(staging)
+        os.replace(staging, os.path.join(path, name))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    meta.update({
+        'watermark': latest_update(changed, watermark).isoformat(),
+        'base_watermark': base_watermark.isoformat(),
+        'generation': generation,
+        'delta': name,
+        'changed': len(changed),
+        'deleted': deleted,
+    })
+    _write_meta(path, meta)
+    prune_deltas(path, generation)
+    logger.info(
+        f"Synced paper index {version} to generation {generation}: "
+        f"{len(changed)} papers re-indexed, {deleted} removed since the build"
+    )
+    return _make_current(version)
+
+
+def prune_deltas(path, generation, keep=KEEP_DELTAS):
+    """Delete the delta directories of a version older than the newest ``keep``."""
+    for name in os.listdir(path):
+        if name.startswith(f'{DELTA_PREFIX}.') and int(name.split('.')[1]) <= generation - keep:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
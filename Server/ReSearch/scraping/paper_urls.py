@@ -0,0 +1,50 @@
+"""
+Canonical paper URLs used to recognize the same paper scraped more than once.
+
+The key ignores scheme, ``www.``, letter case of the host, fragments,
+tracking query parameters and trailing slashes. arXiv abstract and PDF links
+of any version map to the same ``arxiv.org/abs/<id>`` key, so a paper's page
+URL and its PDF URL deduplicate against each other.
+"""
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+ARXIV_HOSTS = {'arxiv.org', 'export.arxiv.org'}
+ARXIV_PATH_RE = re.compile(r'^/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$', re.IGNORECASE)
+TRACKING_PARAMS_RE = re.compile(r'^(utm_\w+|fbclid|gclid|ref|source)$', re.IGNORECASE)
+
+# ResearchPaper.normalized_url length
+MAX_KEY_LENGTH = 500
+
+
+def normalize_url(url):
+    """Canonical form of ``url``, or None when it is empty or not an http(s) URL."""
+    if not url:
+        return None
+    parts = urlsplit(str(url).strip())
+    if parts.scheme.lower() not in ('http', 'https', '') or not parts.netloc:
+        return None
+
+    host = parts.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+
+    if host in ARXIV_HOSTS:
+        match = ARXIV_PATH_RE.match(parts.path)
+        if match:
+            return f'arxiv.org/abs/{match.group(1).lower()}'
+
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS_RE.match(key)
+    ))
+    key = f'{host}{path}?{query}' if query else f'{host}{path}'
+    return key[:MAX_KEY_LENGTH]
+
+
+def paper_url_key(url, pdf_url=None):
+    """Deduplication key of a paper: its normalized page URL, else its normalized PDF URL."""
+    return normalize_url(url) or normalize_url(pdf_url)
@@ -0,0 +1,118 @@
+"""
+Incremental maintenance of the MonthlyReadingStats rollup.
+
+Only active reads by a known user are counted. A read adds its paper's
+citation count and reading time as they are when it starts counting, and
+keeps those values on the row (``counted_citations``/``counted_reading_time``)
+so that removing or moving it later takes out exactly what it added, however
+the paper has changed since. Every change applies a signed delta with F()
+expressions, so concurrent reads for the same user and month never lose
+updates.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import MonthlyReadingStats, ReadPaper, ResearchPaper
+
+
+def month_start(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def counts(read):
+    return bool(read.is_active and read.user_id)
+
+
+def snapshot_read(read, previous=None):
+    """
+    Before ``read`` is saved over ``previous``, record the paper values it
+    counts with: those it already counted with, or the paper's current ones
+    when it starts counting or moves to another paper.
+    """
+    if not counts(read):
+        return
+    if previous is not None and counts(previous) and previous.paper_id == read.paper_id:
+        read.counted_citations = previous.counted_citations
+        read.counted_reading_time = previous.counted_reading_time
+        return
+    paper = ResearchPaper.objects.filter(pk=read.paper_id).values(
+        'citation_count', 'average_reading_time'
+    ).first() or {}
+    read.counted_citations = paper.get('citation_count') or 0
+    read.counted_reading_time = paper.get('average_reading_time')
+
+
+def read_contribution(read):
+    """
+    The (user_id, month, paper_id, citations, reading_time) a ReadPaper
+    counts towards the rollup, or None.
+    """
+    if not counts(read) or not read.read_at:
+        return None
+    return (
+        read.user_id, month_start(read.read_at), read.paper_id,
+        read.counted_citations, read.counted_reading_time,
+    )
+
+
+def apply_read(contribution, sign):
+    user_id, month, _, citations, reading_time = contribution
+    with transaction.atomic():
+        stats, _ = MonthlyReadingStats.objects.get_or_create(user_id=user_id, month=month)
+        MonthlyReadingStats.objects.filter(pk=stats.pk).update(
+            papers_read=F('papers_read') + sign,
+            total_citations=F('total_citations') + sign * citations,
+            total_reading_time=F('total_reading_time') + sign * (reading_time or 0),
+            reading_time_count=F('reading_time_count') + (sign if reading_time is not None else 0),
+        )
+
+
+def move_read(before, after):
+    """Apply the rollup change for a ReadPaper going from ``before`` to ``after``."""
+    if before == after:
+        return
+    if before:
+        apply_read(before, -1)
+    if after:
+        apply_read(after, 1)
+
+
+def rebuild_monthly_stats(user_ids=None):
+    """Recompute the rollup from the values counted on ReadPaper rows, optionally for a subset of users."""
+    reads = ReadPaper.objects.filter(is_active=True, user__isnull=False)
+    stats = MonthlyReadingStats.objects.all()
+    if user_ids is not None:
+        reads = reads.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+
+    monthly = (
+        reads
+        .annotate(month=TruncMonth('read_at'))
+        .order_by()
+        .values('user_id', 'month')
+        .annotate(
+            papers_read=Count('id'),
+            total_citations=Sum('counted_citations'),
+            total_reading_time=Sum('counted_reading_time'),
+            reading_time_count=Count('counted_reading_time'),
+        )
+    )
+    rows = [
+        MonthlyReadingStats(
+            user_id=row['user_id'],
+            month=row['month'].date(),
+            papers_read=row['papers_read'],
+            total_citations=row['total_citations'] or 0,
+            total_reading_time=row['total_reading_time'] or 0,
+            reading_time_count=row['reading_time_count'],
+        )
+        for row in monthly
+    ]
+    with transaction.atomic():
+        stats.delete()
+        MonthlyReadingStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,190 @@
+"""
+Content-based paper recommendations.
+
+Retrieval: the user's profile vector, a weighted centroid of the index vectors
+of their bookmarked/read papers and liked categories, is searched against the
+paper index for the top candidates.
+
+Rerank: only those candidates are scored, with sparse matrix-vector products
+over the precomputed PaperFeatures and the retrieval similarity as the
+content term, so cost grows with the candidate count rather than the corpus.
+"""
+import logging
+from collections import defaultdict
+from typing import List, Tuple
+
+import faiss
+import numpy as np
+from django.db.models import Q
+
+from .categories import normalize_category
+from .models import CategoryLike, ResearchPaper
+from .paper_features import (
+    citation_score, diversity_citation_weight, paper_authors, paper_keywords, recency_score
+)
+from .paper_index import get_index_manager
+from .tasks import schedule_index_rebuild
+
+logger = logging.getLogger(__name__)
+
+BOOKMARK_CATEGORY_WEIGHT = 0.4
+LIKED_CATEGORY_WEIGHT = 0.6
+
+# Profile vector centroid weights
+PROFILE_PAPER_WEIGHT = 1.0
+PROFILE_CATEGORY_WEIGHT = 0.6
+
+# Papers retrieved from the index and reranked per user
+CANDIDATE_COUNT = 500
+
+# Interest score components
+CATEGORY_WEIGHT = 0.3
+KEYWORD_WEIGHT = 0.25
+CONTENT_WEIGHT = 0.25
+CITATION_WEIGHT = 0.1
+RECENCY_WEIGHT = 0.1
+AUTHOR_BONUS = 1.2
+
+# Final blend
+INTEREST_WEIGHT = 0.7
+DIVERSITY_WEIGHT = 0.3
+
+
+def build_user_profile(user_papers, liked_categories):
+    """Category interests, keyword counts and authors from a user's papers and liked categories."""
+    interests = defaultdict(float)
+    keywords = defaultdict(float)
+    authors = set()
+
+    for paper in user_papers:
+        for word in paper_keywords(paper):
+            keywords[word] += 1
+        for category in paper.get('categories') or []:
+            interests[normalize_category(category)] += BOOKMARK_CATEGORY_WEIGHT
+        authors.update(paper_authors(paper))
+
+    for category in liked_categories:
+        interests[normalize_category(category)] += LIKED_CATEGORY_WEIGHT
+
+    return {'interests': interests, 'keywords': keywords, 'authors': authors}
+
+
+def profile_vector(index_manager, user_papers, liked_categories):
+    """Unit-length weighted centroid of the user's papers and liked categories, or None."""
+    parts, weights = [], []
+
+    positions = [index_manager.position(paper['id']) for paper in user_papers]
+    indexed = [paper['id'] for paper, position in zip(user_papers, positions) if position is not None]
+    if indexed:
+        parts.append(index_manager.vectors(indexed))
+        weights.extend([PROFILE_PAPER_WEIGHT] * len(indexed))
+
+    # Papers added since the last build are embedded on the fly
+    unindexed = [paper for paper, position in zip(user_papers, positions) if position is None]
+    if unindexed:
+        parts.append(index_manager.build_vectors(unindexed))
+        weights.extend([PROFILE_PAPER_WEIGHT] * len(unindexed))
+
+    if liked_categories:
+        parts.append(index_manager.build_vectors([{'categories': [c]} for c in liked_categories]))
+        weights.extend([PROFILE_CATEGORY_WEIGHT] * len(liked_categories))
+
+    if not parts:
+        return None
+    centroid = np.average(np.vstack(parts), axis=0, weights=weights)
+    centroid = np.ascontiguousarray(centroid.reshape(1, -1), dtype='float32')
+    if not centroid.any():
+        return None
+    faiss.normalize_L2(centroid)
+    return centroid
+
+
+def retrieve_candidates(index_manager, vector, k, exclude_rows):
+    """Rows of the ``k`` papers nearest ``vector`` (minus ``exclude_rows``) and their similarity."""
+    rows, similarities = index_manager.search(vector, k + len(exclude_rows))
+    keep = ~np.isin(rows, list(exclude_rows))
+    return rows[keep][:k], similarities[keep][:k]
+
+
+def score_papers(features, profile, rows, similarity, today=None):
+    """Final score of the papers at ``rows``, given their similarity to the profile vector."""
+    interests = features.weights(features.category_columns, profile['interests'])
+    keywords = features.weights(features.keyword_columns, profile['keywords'])
+    authors = features.weights(features.author_columns, dict.fromkeys(profile['authors'], 1.0))
+
+    categories = features.categories[rows]
+    category_counts = features.category_counts[rows]
+    citations = features.citations[rows]
+
+    interest = CATEGORY_WEIGHT * (categories @ interests)
+    interest += KEYWORD_WEIGHT * (features.keywords[rows] @ keywords) / np.maximum(features.keyword_counts[rows], 1)
+    interest += CONTENT_WEIGHT * similarity
+    interest += CITATION_WEIGHT * citation_score(citations)
+    interest += RECENCY_WEIGHT * recency_score(features.publication_days[rows], today)
+    interest = np.where(features.authors[rows] @ authors > 0, interest * AUTHOR_BONUS, interest)
+
+    unexplored = (interests == 0).astype(np.float32)
+    matches = categories @ unexplored
+    diversity = np.divide(
+        matches, category_counts,
+        out=np.zeros_like(matches), where=category_counts > 0
+    ) * diversity_citation_weight(citations)
+
+    return INTEREST_WEIGHT * interest + DIVERSITY_WEIGHT * diversity
+
+
+def rank_papers(index_manager, rows, scores, k):
+    """Up to ``k`` ``(paper_id, score)`` pairs with a positive score, best first."""
+    scores = np.round(np.asarray(scores, dtype=np.float64), 4)
+    positive = np.flatnonzero(scores > 0)
+    order = positive[np.argsort(-scores[positive], kind='stable')][:k]
+    return [(str(index_manager.paper_ids[rows[i]]), float(scores[i])) for i in order]
+
+
+class IndexUnavailable(Exception):
+    """No paper index version with feature matrices has been published yet."""
+
+
+def compute_recommendations(user_id: str, k: int = CANDIDATE_COUNT) -> List[Tuple[str, float]]:
+    index_manager = get_index_manager()
+    if index_manager.features is None:
+        # Build it in the background rather than in the caller
+        schedule_index_rebuild()
+        raise IndexUnavailable()
+
+    user_papers = list(
+        ResearchPaper.objects.filter(
+            Q(paper_bookmarks__user_id=user_id, paper_bookmarks__is_active=True) |
+            Q(paper_readers__user_id=user_id, paper_readers__is_active=True)
+        ).distinct().values('id', 'title', 'abstract', 'categories', 'authors')
+    )
+    liked_categories = list(CategoryLike.objects.filter(
+        user_id=user_id,
+        is_active=True
+    ).values_list('category__name', flat=True))
+
+    profile = build_user_profile(user_papers, liked_categories)
+    seen_rows = {
+        position for position in (index_manager.position(p['id']) for p in user_papers)
+        if position is not None
+    }
+    vector = profile_vector(index_manager, user_papers, liked_categories)
+    if vector is not None:
+        rows, similarity = retrieve_candidates(index_manager, vector, k, seen_rows)
+    else:
+        # Cold start: nothing to search with, so rank everything on the profile-free terms
+        rows = np.setdiff1d(index_manager.live_rows(), list(seen_rows))
+        similarity = np.zeros(len(rows), dtype='float32')
+
+    scores = score_papers(index_manager.features, profile, rows, similarity)
+    return rank_papers(index_manager, rows, scores, k)
+
+
+def get_enhanced_content_recommendations(user_id: str, k: int = CANDIDATE_COUNT) -> List[Tuple[str, float]]:
+    try:
+        return compute_recommendations(user_id, k)
+    except IndexUnavailable:
+        return []
+    except Exception as e:
+        logger.error(f"Recommendation error: {str(e)}")
+        return []
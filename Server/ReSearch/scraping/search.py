@@ -0,0 +1,152 @@
+"""
+Full-text search over ResearchPaper backed by an SQLite FTS5 table.
+
+The FTS table keeps its own copy of the searchable text and is keyed by a
+stable integer rowid derived from the paper UUID, so single-paper updates
+and deletes are O(log n) lookups instead of scans. Other database vendors
+fall back to the previous ``icontains`` filtering.
+"""
+import re
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'scraping_researchpaper_fts'
+PAPER_TABLE = 'scraping_researchpaper'
+
+# Column weights for bm25(): title, abstract, authors
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+REBUILD_BATCH_SIZE = 2000
+INDEXED_FIELDS = {'title', 'abstract', 'authors'}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def paper_rowid(paper_id):
+    """Map a paper UUID onto a positive 63-bit integer usable as a rowid."""
+    return paper_id.int >> 65
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(search_text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every term is quoted so user input can never be parsed as FTS syntax, and
+    the last term is a prefix match so keystroke-driven searches work.
+    """
+    tokens = TOKEN_RE.findall(search_text or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def icontains_query(search_text, prefix=''):
+    return (
+        Q(**{f'{prefix}title__icontains': search_text}) |
+        Q(**{f'{prefix}abstract__icontains': search_text}) |
+        Q(**{f'{prefix}authors__icontains': search_text})
+    )
+
+
+def apply_search(queryset, search_text):
+    """
+    Restrict a ResearchPaper queryset to papers matching ``search_text``.
+
+    On SQLite the queryset is joined against the FTS index and annotated with
+    ``search_rank`` (BM25, lower is better) so callers can order by it.
+    """
+    match_query = build_match_query(search_text)
+    if not fts_enabled() or match_query is None:
+        return queryset.filter(icontains_query(search_text))
+
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    return queryset.extra(
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE} MATCH %s',
+            f'{FTS_TABLE}.paper_id = {PAPER_TABLE}.id',
+        ],
+        params=[match_query],
+    )
+
+
+def is_ranked(queryset):
+    return 'search_rank' in queryset.query.extra
+
+
+def _document(paper):
+    authors = paper.authors
+    if isinstance(authors, (list, tuple)):
+        authors = ' '.join(str(author) for author in authors)
+    return (
+        paper_rowid(paper.pk),
+        paper.pk.hex,
+        paper.title or '',
+        paper.abstract or '',
+        str(authors or ''),
+    )
+
+
+def index_papers(papers):
+    """Insert or refresh the FTS rows for the given papers."""
+    if not fts_enabled():
+        return
+    rows = [_document(paper) for paper in papers]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, paper_id, title, abstract, authors) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def remove_papers(paper_ids):
+    """Drop the FTS rows for the given paper ids."""
+    if not fts_enabled():
+        return
+    rowids = [(paper_rowid(paper_id),) for paper_id in paper_ids]
+    if not rowids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', rowids)
+
+
+def rebuild_index(batch_size=REBUILD_BATCH_SIZE):
+    """Rebuild the whole FTS index from ResearchPaper in bounded batches."""
+    from .models import ResearchPaper
+
+    if not fts_enabled():
+        return 0
+    indexed = 0
+    papers = ResearchPaper.objects.only('id', 'title', 'abstract', 'authors').order_by()
+    # Rebuild in one transaction so searches never observe a half-empty index
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+        batch = []
+        for paper in papers.iterator(chunk_size=batch_size):
+            batch.append(paper)
+            if len(batch) >= batch_size:
+                index_papers(batch)
+                indexed += len(batch)
+                batch = []
+        index_papers(batch)
+        indexed += len(batch)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    logger.info(f"Rebuilt search index with {indexed} papers")
+    return indexed
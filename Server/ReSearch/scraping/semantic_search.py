@@ -0,0 +1,161 @@
+"""
+Hybrid paper search: BM25 keyword ranking from the FTS index fused with
+dense-vector similarity from the shared embedding store.
+
+Both rankings are computed over the same filtered queryset and combined with
+reciprocal rank fusion, which only needs ranks, so the unrelated BM25 and
+cosine scales never have to be calibrated against each other.
+
+Filters are applied before the vector search. When they leave few enough
+papers, those papers' vectors are scored exactly; otherwise the HNSW index
+is searched with a widening beam and its hits are checked against the
+filter, which for a filter that broad soon keeps enough of them.
+"""
+import logging
+from functools import lru_cache
+
+import faiss
+import numpy as np
+
+from . import search
+from .embeddings import TOMBSTONE, encode_texts, get_embedding_store
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant: keeps one list's top hit from dominating
+RRF_K = 60
+# Candidates taken from each ranking before fusion
+CANDIDATE_COUNT = 100
+MAX_RESULTS = 100
+# Filtered sets up to this size are scored exactly instead of through the ANN index
+EXACT_SEARCH_LIMIT = 5000
+# ANN hits fetched per wanted result when they still have to pass a filter, doubled
+# until enough pass or MAX_FILTERED_ANN_HITS is reached
+FILTER_OVERSAMPLE = 10
+MAX_FILTERED_ANN_HITS = 4000
+HNSW_EF_SEARCH = 128
+
+
+@lru_cache(maxsize=1024)
+def _query_vector(text):
+    vector = encode_texts([text])[0].astype(np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+def query_vector(text):
+    """float32 embedding of a search query, or None when the encoder is unavailable."""
+    try:
+        return _query_vector(' '.join(text.split()))
+    except ImportError as e:
+        logger.warning(f"Semantic search disabled, no sentence encoder: {e}")
+    except Exception as e:
+        logger.error(f"Failed to encode search query: {e}")
+    return None
+
+
+def embedding_store():
+    """The embedding store when it holds any vectors, else None (also when it cannot be opened)."""
+    try:
+        store = get_embedding_store()
+    except Exception as e:
+        logger.error(f"Semantic search disabled, embedding store unavailable: {e}")
+        return None
+    return store if store is not None and len(store) else None
+
+
+def keyword_ranking(queryset, text, limit=CANDIDATE_COUNT):
+    """Paper ids from the BM25 ranking of ``text`` over ``queryset``, best first."""
+    matches = search.apply_search(queryset, text)
+    if search.is_ranked(matches):
+        matches = matches.order_by('search_rank')
+    else:
+        matches = matches.order_by('-publication_date')
+    return [str(pid) for pid in matches.values_list('id', flat=True)[:limit]]
+
+
+def _ann_search(store, vector, k):
+    """Rows and similarities of the ``k`` nearest live rows, including any rows not yet in the index."""
+    rows = np.empty(0, dtype='int64')
+    covered = 0
+    if store.ann is not None:
+        covered = min(store.ann.ntotal, len(store))
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = max(HNSW_EF_SEARCH, k)
+        _, labels = store.ann.search(vector.reshape(1, -1), min(k, store.ann.ntotal), params=params)
+        rows = labels[0][(labels[0] >= 0) & (labels[0] < covered)]
+    # Rows appended after the index was written are few; scan them exactly
+    rows = np.concatenate([rows, np.arange(covered, len(store))])
+    rows = rows[store.paper_ids[rows] != TOMBSTONE]
+    # Rerank on the stored vectors, which are current even where the graph is stale
+    similarities = store.similarities(rows, vector)
+    order = np.argsort(-similarities, kind='stable')[:k]
+    return rows[order], similarities[order]
+
+
+def vector_ranking(store, queryset, vector, filtered, limit=CANDIDATE_COUNT):
+    """Paper ids of ``queryset`` nearest ``vector`` in ``store``, best first."""
+    if filtered:
+        allowed = [str(pid) for pid in queryset.values_list('id', flat=True)[:EXACT_SEARCH_LIMIT + 1]]
+        if len(allowed) <= EXACT_SEARCH_LIMIT:
+            rows = store.rows(allowed)
+            rows = rows[rows >= 0]
+            similarities = store.similarities(rows, vector)
+            top = np.argsort(-similarities, kind='stable')[:limit]
+            return [store.paper_ids[row] for row in rows[top]]
+
+        k = limit * FILTER_OVERSAMPLE
+        while True:
+            rows, _ = _ann_search(store, vector, k)
+            candidates = [store.paper_ids[row] for row in rows]
+            kept = {str(pid) for pid in queryset.filter(id__in=candidates).values_list('id', flat=True)}
+            if len(kept) >= limit or len(rows) < k or k >= MAX_FILTERED_ANN_HITS:
+                return [pid for pid in candidates if pid in kept][:limit]
+            k *= 2
+
+    rows, _ = _ann_search(store, vector, limit)
+    return [store.paper_ids[row] for row in rows]
+
+
+def semantic_ranking(queryset, text, filtered, limit=CANDIDATE_COUNT):
+    """
+    Vector ranking of ``text`` over ``queryset``; empty when there is no
+    usable store or encoder, so search falls back to keywords only.
+    """
+    # The store is checked first so a server without embeddings never loads the model
+    store = embedding_store()
+    if store is None:
+        return []
+    vector = query_vector(text)
+    if vector is None:
+        return []
+    try:
+        return vector_ranking(store, queryset, vector, filtered, limit)
+    except Exception as e:
+        logger.error(f"Vector ranking failed, using keyword ranking only: {e}")
+        return []
+
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K):
+    """``[(paper_id, score)]`` best first, scoring each id by the sum of ``1 / (k + rank)``."""
+    scores = {}
+    for ranking in rankings:
+        for rank, paper_id in enumerate(ranking, start=1):
+            scores[paper_id] = scores.get(paper_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(queryset, text, filtered=False, limit=10):
+    """
+    Fused ``[(paper_id, score)]`` for ``text`` over ``queryset`` and the mode
+    used: ``'hybrid'``, or ``'keyword'`` when there are no embeddings to search.
+    """
+    limit = min(limit, MAX_RESULTS)
+    candidates = max(limit, CANDIDATE_COUNT)
+    rankings = [keyword_ranking(queryset, text, candidates)]
+
+    semantic = semantic_ranking(queryset, text, filtered, candidates)
+    if semantic:
+        rankings.append(semantic)
+    mode = 'hybrid' if semantic else 'keyword'
+    return reciprocal_rank_fusion(*rankings)[:limit], mode
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from .paper_urls import paper_url_key
 
 class CategoryBriefSerializer(serializers.ModelSerializer):
     """Simplified version of Category serializer"""
@@ -129,7 +130,6 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
     is_bookmarked = serializers.SerializerMethodField()
     is_paper_read = serializers.SerializerMethodField()
     bookmark_id = serializers.SerializerMethodField()
-    active_bookmarks_count = serializers.SerializerMethodField()
 
     class Meta:
         model = ResearchPaper
@@ -174,9 +174,6 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
             return str(bookmarks[0].id) if bookmarks else None
         return None
 
-    def get_active_bookmarks_count(self, obj):
-        return BookmarkedPaper.objects.filter(paper=obj, is_active=True).count()
-        
     def get_is_paper_read(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -192,6 +189,17 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
             
         if data.get('average_reading_time') is not None and data['average_reading_time'] < 0:
             raise serializers.ValidationError({"average_reading_time": "Average reading time cannot be negative"})
+
+        # Bulk ingestion upserts duplicates instead of rejecting them
+        if not self.context.get('upsert'):
+            url = data.get('url', getattr(self.instance, 'url', None))
+            pdf_url = data.get('pdf_url', getattr(self.instance, 'pdf_url', None))
+            key = paper_url_key(url, pdf_url)
+            duplicates = ResearchPaper.objects.filter(normalized_url=key) if key else ResearchPaper.objects.none()
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({"url": "A paper with this URL already exists"})
             
         return data
 
@@ -1,30 +1,112 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from django.db import transaction
 from django.core.cache import cache
-from .models import ResearchPaper, BookmarkedPaper, ReadPaper, CategoryLike
+from .models import ResearchPaper, BookmarkedPaper, ReadPaper, CategoryLike, DeletedPaper
+from . import near_duplicates, search
+from .categories import sync_paper_categories, remove_paper_categories, SYNC_FIELDS as CATEGORY_SYNC_FIELDS
+from .reading_stats import read_contribution, move_read, snapshot_read
+from .cache_utils import PAPER_LIST_NAMESPACE, bump_generation
+from .paper_index import INDEX_SYNC_FIELDS
+from .embeddings import EMBEDDING_SYNC_FIELDS
+from .tasks import schedule_index_sync, schedule_embedding_update
+from .user_recommendations import mark_dirty
 
 @receiver([post_save, post_delete], sender=ResearchPaper)
 def clear_research_paper_cache(sender, instance, **kwargs):
-    related_keys = cache.get("research_paper_cache_keys", set())
-    for key in related_keys:
-        cache.delete(key)
+    bump_generation(PAPER_LIST_NAMESPACE)
+
+@receiver(post_save, sender=ResearchPaper)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & search.INDEXED_FIELDS:
+        return
+    search.index_papers([instance])
+
+@receiver(post_save, sender=ResearchPaper)
+def update_paper_categories(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & CATEGORY_SYNC_FIELDS:
+        return
+    sync_paper_categories([instance])
+
+@receiver(pre_delete, sender=ResearchPaper)
+def update_category_counts(sender, instance, **kwargs):
+    remove_paper_categories([instance])
+
+@receiver(post_delete, sender=ResearchPaper)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_papers([instance.pk])
+
+@receiver(post_save, sender=ResearchPaper)
+def update_paper_signature(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & near_duplicates.SIGNATURE_FIELDS:
+        return
+    near_duplicates.index_papers([instance])
+
+@receiver(post_save, sender=ResearchPaper)
+def queue_paper_index_sync(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & INDEX_SYNC_FIELDS:
+        return
+    transaction.on_commit(schedule_index_sync)
+
+@receiver(post_delete, sender=ResearchPaper)
+def queue_paper_index_removal(sender, instance, **kwargs):
+    # The tombstone tells the index sync what to drop without listing every live id
+    DeletedPaper.objects.create(paper_id=instance.pk)
+    transaction.on_commit(schedule_index_sync)
+
+@receiver(post_save, sender=ResearchPaper)
+def queue_paper_embedding(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & EMBEDDING_SYNC_FIELDS:
+        return
+    transaction.on_commit(schedule_embedding_update)
+
+def papers_saved(papers):
+    """
+    Run the ResearchPaper post_save work once for a batch written without
+    signals (``bulk_create``/``bulk_update``).
+    """
+    if not papers:
+        return
+    bump_generation(PAPER_LIST_NAMESPACE)
+    search.index_papers(papers)
+    sync_paper_categories(papers)
+    near_duplicates.index_papers(papers)
+    transaction.on_commit(schedule_index_sync)
+    transaction.on_commit(schedule_embedding_update)
 
 @receiver([post_save, post_delete], sender=BookmarkedPaper)
 def clear_user_bookmark_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
+        mark_dirty(instance.user_id)
         cache.delete(f'user_bookmarks_{instance.user.id}')
 
 @receiver([post_save, post_delete], sender=ReadPaper)
 def clear_user_read_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
+        mark_dirty(instance.user_id)
         cache.delete(f'user_read_papers_{instance.user.id}')
 
+@receiver(pre_save, sender=ReadPaper)
+def remember_read_contribution(sender, instance, **kwargs):
+    previous = None
+    if not instance._state.adding:
+        previous = ReadPaper.objects.filter(pk=instance.pk).first()
+    instance._previous_read_contribution = read_contribution(previous) if previous else None
+    snapshot_read(instance, previous)
+
+@receiver(post_save, sender=ReadPaper)
+def update_reading_stats(sender, instance, **kwargs):
+    before = getattr(instance, '_previous_read_contribution', None)
+    move_read(before, read_contribution(instance))
+
+@receiver(post_delete, sender=ReadPaper)
+def remove_from_reading_stats(sender, instance, **kwargs):
+    move_read(read_contribution(instance), None)
+
 @receiver([post_save, post_delete], sender=CategoryLike)
 def clear_user_interests_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
+        mark_dirty(instance.user_id)
         cache.delete(f'user_interests_{instance.user.id}')
         
 def get_user_cache_keys(user_id):
@@ -0,0 +1,166 @@
+"""
+Celery tasks that keep the recommendation paper index, the paper embedding
+store and the precomputed per-user recommendation lists up to date, and
+that harvest new papers or prune the HTTP response cache.
+
+Paper saves schedule a debounced incremental sync; a full rebuild runs
+nightly from CELERY_BEAT_SCHEDULE (or on demand when no index exists).
+User interactions schedule a debounced refresh of dirty recommendation
+lists. Each kind of write is serialized with a lock in the shared cache.
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+
+from celery import shared_task
+from django.core.cache import cache
+
+from . import paper_index
+
+logger = logging.getLogger(__name__)
+
+# Saves within this many seconds are folded into one sync
+SYNC_DELAY = 60
+LOCK_TIMEOUT = 60 * 60
+
+RECOMMENDATION_DELAY = 30
+# Every embedding run hashes the whole corpus, so coalesce over a longer window
+EMBEDDING_DELAY = 5 * 60
+
+SYNC_SCHEDULED_KEY = 'paper_index:sync_scheduled'
+REBUILD_SCHEDULED_KEY = 'paper_index:rebuild_scheduled'
+INDEX_LOCK_KEY = 'paper_index:lock'
+RECOMMENDATION_SCHEDULED_KEY = 'recommendations:refresh_scheduled'
+RECOMMENDATION_LOCK_KEY = 'recommendations:lock'
+EMBEDDING_SCHEDULED_KEY = 'embeddings:update_scheduled'
+EMBEDDING_LOCK_KEY = 'embeddings:lock'
+OAI_HARVEST_LOCK_KEY = 'harvest:oai:lock'
+HTTP_CACHE_PRUNE_LOCK_KEY = 'http_cache:prune:lock'
+
+
+class TaskBusy(Exception):
+    pass
+
+
+@contextmanager
+def task_lock(key):
+    if not cache.add(key, 1, timeout=LOCK_TIMEOUT):
+        raise TaskBusy()
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _schedule(task, flag_key, countdown):
+    # The flag debounces: only the first caller in a window enqueues the task
+    if not cache.add(flag_key, 1, timeout=max(countdown, SYNC_DELAY)):
+        return
+    try:
+        # Fail fast instead of stalling the committing request when the broker is down
+        with task.app.connection_for_write(transport_options={'max_retries': 0}) as connection:
+            task.apply_async(countdown=countdown, retry=False, connection=connection)
+    except Exception as e:
+        logger.warning(f"Could not schedule {task.name}: {e}")
+
+
+def schedule_index_sync():
+    """Queue an incremental index sync, coalescing bursts of paper writes."""
+    _schedule(sync_paper_index, SYNC_SCHEDULED_KEY, SYNC_DELAY)
+
+
+def schedule_index_rebuild():
+    """Queue a full index rebuild unless one is already queued."""
+    _schedule(rebuild_paper_index, REBUILD_SCHEDULED_KEY, 0)
+
+
+def schedule_recommendation_refresh(countdown=RECOMMENDATION_DELAY):
+    """Queue a refresh of dirty recommendation lists unless one is already queued."""
+    _schedule(refresh_user_recommendations, RECOMMENDATION_SCHEDULED_KEY, countdown)
+
+
+def schedule_embedding_update():
+    """Queue an embedding update, coalescing bursts of title/abstract changes."""
+    _schedule(update_paper_embeddings, EMBEDDING_SCHEDULED_KEY, EMBEDDING_DELAY)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def sync_paper_index(self):
+    # Clear the flag first so writes committed from now on schedule another sync
+    cache.delete(SYNC_SCHEDULED_KEY)
+    try:
+        with task_lock(INDEX_LOCK_KEY):
+            paper_index.sync_paper_index()
+    except TaskBusy:
+        raise self.retry(countdown=SYNC_DELAY)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def rebuild_paper_index(self):
+    cache.delete(REBUILD_SCHEDULED_KEY)
+    try:
+        with task_lock(INDEX_LOCK_KEY):
+            paper_index.rebuild_paper_index()
+    except TaskBusy:
+        raise self.retry(countdown=SYNC_DELAY)
+    # Lists postponed while there was no index can be computed now
+    schedule_recommendation_refresh(countdown=0)
+
+
+@shared_task(ignore_result=True)
+def refresh_user_recommendations():
+    # Imported here: user_recommendations depends on recommendations, which schedules tasks
+    from .user_recommendations import refresh_due_recommendations
+
+    cache.delete(RECOMMENDATION_SCHEDULED_KEY)
+    try:
+        with task_lock(RECOMMENDATION_LOCK_KEY):
+            refreshed, more_due, still_dirty = refresh_due_recommendations()
+    except TaskBusy:
+        # The running refresh reschedules itself while work remains
+        return
+    logger.info(f"Refreshed {refreshed} recommendation lists")
+    if more_due:
+        schedule_recommendation_refresh(countdown=0)
+    elif still_dirty:
+        # Users still inside the debounce window
+        schedule_recommendation_refresh()
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def update_paper_embeddings(self):
+    # Imported here so only workers that encode pay for loading the embedding stack
+    from .embeddings import update_embeddings
+
+    cache.delete(EMBEDDING_SCHEDULED_KEY)
+    try:
+        with task_lock(EMBEDDING_LOCK_KEY):
+            update_embeddings()
+    except TaskBusy:
+        raise self.retry(countdown=EMBEDDING_DELAY)
+
+
+@shared_task(ignore_result=True)
+def harvest_arxiv_oai():
+    # Imported here so only workers that harvest load httpx and lxml
+    from .oai_harvester import harvest_oai
+
+    try:
+        with task_lock(OAI_HARVEST_LOCK_KEY):
+            stored = asyncio.run(harvest_oai())
+    except TaskBusy:
+        logger.info("arXiv OAI harvest already running")
+        return
+    logger.info(f"arXiv OAI harvest stored {stored} papers")
+
+
+@shared_task(ignore_result=True)
+def prune_http_cache():
+    from .http_cache import prune_response_cache
+
+    try:
+        with task_lock(HTTP_CACHE_PRUNE_LOCK_KEY):
+            removed, remaining = prune_response_cache()
+    except TaskBusy:
+        return
+    logger.info(f"Pruned {removed} HTTP cache entries; {remaining} bytes left")
@@ -1,3 +1,1088 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import httpx
+
+import numpy as np
+from lxml import etree
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ReSearch import cache_backends
+
+from . import embeddings, fetching, http_cache, near_duplicates, paper_index, semantic_search, views
+from .arxiv_feed import AtomFeedParser
+from .arxiv_harvester import api_url, harvest_arxiv, window_query
+from .categories import rebuild_category_counts, sync_paper_categories
+from .oai_harvester import harvest_oai, oai_url
+from .http_cache import ResponseCache
+from .ingest import upsert_papers
+from .models import (
+    BookmarkedPaper, CategoryPaperCount, DeletedPaper, HarvestCheckpoint, MonthlyReadingStats, PaperCategory,
+    ReadPaper, ResearchPaper,
+)
+from .pagination import PaperCursorPagination
+from .paper_urls import paper_url_key
+from .reading_stats import month_start, rebuild_monthly_stats
+from .recommendations import compute_recommendations
+
+
+def make_paper(n, title, abstract, categories=('cs.LG',)):
+    return ResearchPaper.objects.create(
+        title=title,
+        abstract=abstract,
+        authors=[f'Author {n}'],
+        source='arXiv',
+        url=f'https://arxiv.org/abs/2401.{n:05d}',
+        categories=list(categories),
+        publication_date=date(2024, 1, 1 + n % 28),
+    )
+
+
+class IndexDirTestCase(TestCase):
+    """Points the on-disk indexes at a temporary directory and resets per-process singletons."""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        settings_override = override_settings(
+            PAPER_INDEX_DIR=f'{self.index_dir}/paper_index',
+            PAPER_EMBEDDINGS_DIR=f'{self.index_dir}/embeddings',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        paper_index._current = None
+        self.addCleanup(setattr, paper_index, '_current', None)
+        embeddings._current = None
+        self.addCleanup(setattr, embeddings, '_current', None)
+
+
+class PaperIndexTests(IndexDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.papers = [
+            make_paper(1, 'Deep learning for echocardiography', 'Segmenting the left ventricle with neural networks'),
+            make_paper(2, 'Neural networks for cardiac imaging', 'Deep learning on echocardiogram videos'),
+            make_paper(3, 'Protein folding with transformers', 'Structure prediction from sequences', ['q-bio']),
+        ]
+
+    def test_rebuild_publishes_a_loadable_version(self):
+        manager = paper_index.rebuild_paper_index()
+
+        self.assertIsNotNone(manager.version)
+        self.assertEqual(paper_index.current_version(), manager.version)
+        self.assertEqual(sorted(manager.indexed_ids()), sorted(str(p.pk) for p in self.papers))
+        self.assertEqual(manager.index.ntotal, 3)
+
+    def test_recommendations_come_from_the_built_index(self):
+        paper_index.rebuild_paper_index()
+        user = get_user_model().objects.create_user(email='reader@example.com', username='reader', password='x')
+        BookmarkedPaper.objects.create(user=user, paper=self.papers[0])
+
+        recommended = [paper_id for paper_id, _ in compute_recommendations(str(user.pk))]
+
+        self.assertTrue(recommended)
+        self.assertNotIn(str(self.papers[0].pk), recommended)
+        self.assertEqual(recommended[0], str(self.papers[1].pk))
+
+    def test_sync_adds_and_removes_papers_in_place(self):
+        built = paper_index.rebuild_paper_index()
+        added = make_paper(4, 'Graph neural networks', 'Message passing on molecules')
+        self.papers[2].delete()
+
+        with mock.patch.object(paper_index, 'DELTA_REBUILD_RATIO', 1.0):
+            manager = paper_index.sync_paper_index()
+
+        self.assertEqual(manager.version, built.version)
+        self.assertEqual(manager.generation, 1)
+        self.assertEqual(
+            sorted(manager.indexed_ids()), sorted(str(p.pk) for p in (self.papers[0], self.papers[1], added))
+        )
+        self.assertEqual(len(manager.features), 4)
+        rows, _ = manager.search(manager.vectors([added.pk]), 10)
+        self.assertEqual(str(manager.paper_ids[rows[0]]), str(added.pk))
+        self.assertNotIn(manager.position(self.papers[2].pk), rows.tolist())
+
+    def test_sync_replaces_the_base_row_of_an_edited_paper(self):
+        paper_index.rebuild_paper_index()
+        paper = self.papers[2]
+        paper.title, paper.abstract = 'Graph neural networks', 'Message passing on molecules'
+        paper.save()
+
+        with mock.patch.object(paper_index, 'DELTA_REBUILD_RATIO', 1.0):
+            manager = paper_index.sync_paper_index()
+
+        self.assertEqual(len(manager), 3)
+        self.assertGreaterEqual(manager.position(paper.pk), manager.base_rows)
+        query = manager.build_vectors(
+            list(ResearchPaper.objects.filter(pk=paper.pk).values(*paper_index.INDEX_PAPER_FIELDS))
+        )
+        rows, similarities = manager.search(query, 10)
+        self.assertEqual([str(manager.paper_ids[row]) for row in rows].count(str(paper.pk)), 1)
+        self.assertEqual(str(manager.paper_ids[rows[0]]), str(paper.pk))
+        self.assertAlmostEqual(float(similarities[0]), 1.0, places=5)
+
+    def test_other_processes_pick_up_a_new_delta(self):
+        paper_index.rebuild_paper_index()
+        reader = paper_index.get_index_manager()
+        make_paper(4, 'Graph neural networks', 'Message passing on molecules')
+        with mock.patch.object(paper_index, 'DELTA_REBUILD_RATIO', 1.0):
+            paper_index.sync_paper_index()
+        paper_index._current = reader
+        paper_index._checked_at = 0.0
+
+        self.assertEqual(len(paper_index.get_index_manager()), 4)
+
+    def test_a_large_delta_triggers_a_rebuild(self):
+        built = paper_index.rebuild_paper_index()
+        make_paper(4, 'Graph neural networks', 'Message passing on molecules')
+
+        manager = paper_index.sync_paper_index()
+
+        self.assertNotEqual(manager.version, built.version)
+        self.assertEqual(manager.generation, 0)
+        self.assertEqual(len(manager), 4)
+
+    def test_deletions_reach_the_sync_through_tombstones(self):
+        paper_index.rebuild_paper_index()
+        deleted_id = self.papers[2].pk
+        self.papers[2].delete()
+        self.assertTrue(DeletedPaper.objects.filter(paper_id=deleted_id).exists())
+
+        with mock.patch.object(paper_index, 'DELTA_REBUILD_RATIO', 1.0), CaptureQueriesContext(connection) as queries:
+            manager = paper_index.sync_paper_index()
+
+        self.assertIsNone(manager.position(deleted_id))
+        self.assertEqual(len(manager), 2)
+        # Only the changed rows are read, never the whole id list
+        paper_reads = [q['sql'] for q in queries if 'FROM "scraping_researchpaper"' in q['sql']]
+        self.assertTrue(paper_reads)
+        self.assertTrue(all('"updated_at" >' in sql for sql in paper_reads), paper_reads)
+
+        paper_index.rebuild_paper_index()
+        self.assertFalse(DeletedPaper.objects.exists())
+
+    def test_sync_without_changes_keeps_the_generation(self):
+        paper_index.rebuild_paper_index()
+        with mock.patch.object(paper_index, 'DELTA_REBUILD_RATIO', 1.0):
+            self.assertEqual(paper_index.sync_paper_index().generation, 0)
+
+class BookmarkCounterTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(email=f'reader{n}@example.com', username=f'reader{n}', password='x')
+            for n in range(3)
+        ]
+        self.paper = make_paper(1, 'Echocardiography', 'Segmentation of echocardiography videos')
+        self.other = make_paper(2, 'Protein folding', 'Residue distances')
+
+    def counts(self):
+        return [
+            ResearchPaper.objects.get(pk=paper.pk).active_bookmarks_count for paper in (self.paper, self.other)
+        ]
+
+    def bookmark(self, user, paper=None):
+        return BookmarkedPaper.objects.create(user=user, paper=paper or self.paper)
+
+    def test_toggling_a_bookmark_moves_the_counter_once(self):
+        bookmark = self.bookmark(self.users[0])
+        self.bookmark(self.users[1])
+        self.assertEqual(self.counts(), [2, 0])
+
+        bookmark.soft_delete()
+        BookmarkedPaper.objects.get(pk=bookmark.pk).soft_delete()
+        self.assertEqual(self.counts(), [1, 0])
+
+        bookmark.is_active = True
+        bookmark.save()
+        bookmark.save()
+        self.assertEqual(self.counts(), [2, 0])
+
+        bookmark.paper = self.other
+        bookmark.save()
+        self.assertEqual(self.counts(), [1, 1])
+
+    def test_deleting_a_bookmark_twice_decrements_once(self):
+        bookmark = self.bookmark(self.users[0])
+        self.bookmark(self.users[1])
+        stale = BookmarkedPaper.objects.get(pk=bookmark.pk)
+
+        bookmark.hard_delete()
+        stale.hard_delete()
+
+        self.assertEqual(self.counts(), [1, 0])
+        self.assertFalse(BookmarkedPaper.objects.filter(pk=stale.pk).exists())
+
+    def test_deleting_an_inactive_bookmark_leaves_the_counter(self):
+        bookmark = self.bookmark(self.users[0])
+        self.bookmark(self.users[1])
+        bookmark.soft_delete()
+
+        bookmark.hard_delete()
+
+        self.assertEqual(self.counts(), [1, 0])
+        self.assertEqual(BookmarkedPaper.objects.count(), 1)
+
+    def test_admin_actions_only_count_bookmarks_that_change(self):
+        model_admin = admin.site._registry[BookmarkedPaper]
+        for user in self.users:
+            self.bookmark(user)
+        self.bookmark(self.users[0], self.other)
+        BookmarkedPaper.objects.get(user=self.users[2], paper=self.paper).soft_delete()
+        self.assertEqual(self.counts(), [2, 1])
+
+        self.assertEqual(model_admin._set_active(BookmarkedPaper.objects.all(), False), 3)
+        self.assertEqual(self.counts(), [0, 0])
+        self.assertEqual(model_admin._set_active(BookmarkedPaper.objects.filter(paper=self.paper), True), 3)
+        self.assertEqual(self.counts(), [3, 0])
+
+        model_admin.delete_queryset(None, BookmarkedPaper.objects.filter(user=self.users[0]))
+        self.assertEqual(self.counts(), [2, 0])
+
+    def test_reconcile_repairs_drifted_counters(self):
+        self.bookmark(self.users[0])
+        self.bookmark(self.users[1])
+        BookmarkedPaper.objects.create(user=self.users[2], paper=self.other, is_active=False)
+        ResearchPaper.objects.filter(pk=self.paper.pk).update(active_bookmarks_count=7)
+        ResearchPaper.objects.filter(pk=self.other.pk).update(active_bookmarks_count=1)
+
+        out = StringIO()
+        call_command('reconcile_bookmark_counts', stdout=out)
+
+        self.assertIn('2 papers', out.getvalue())
+        self.assertEqual(self.counts(), [2, 0])
+
+
+class CategoryCountTests(TestCase):
+    def counts(self):
+        return dict(CategoryPaperCount.objects.filter(paper_count__gt=0).values_list('category', 'paper_count'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.counts()
+        rebuild_category_counts()
+        self.assertEqual(maintained, self.counts())
+        return maintained
+
+    def test_counts_follow_paper_writes(self):
+        first = make_paper(1, 'Echocardiography', 'Segmentation', categories=('cs.CV', 'eess.IV'))
+        second = make_paper(2, 'Protein folding', 'Residue distances', categories=('q-bio', 'cs.CV'))
+        self.assertEqual(self.assertMatchesRebuild(), {'cs.cv': 2, 'eess.iv': 1, 'q-bio': 1})
+
+        first.categories = ['cs.LG', 'CS.CV ']
+        first.save()
+        second.save()
+        self.assertEqual(self.assertMatchesRebuild(), {'cs.cv': 2, 'cs.lg': 1, 'q-bio': 1})
+
+        second.delete()
+        self.assertEqual(self.assertMatchesRebuild(), {'cs.cv': 1, 'cs.lg': 1})
+
+    def test_a_link_the_sync_did_not_see_fails_instead_of_skewing_the_counts(self):
+        paper = make_paper(1, 'Echocardiography', 'Segmentation', categories=())
+        PaperCategory.objects.create(paper=paper, category='cs.cv', publication_date=paper.publication_date)
+        paper.categories = ['cs.CV']
+
+        # As if a concurrent save inserted the link after this one read the links
+        with mock.patch.object(PaperCategory.objects, 'filter', return_value=PaperCategory.objects.none()):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                sync_paper_categories([paper])
+
+    def test_rebuild_category_counts_repairs_drift(self):
+        make_paper(1, 'Echocardiography', 'Segmentation', categories=('cs.CV',))
+        CategoryPaperCount.objects.update(paper_count=5)
+        CategoryPaperCount.objects.create(category='stale', paper_count=2)
+
+        out = StringIO()
+        call_command('rebuild_category_counts', stdout=out)
+
+        self.assertIn('1 categories', out.getvalue())
+        self.assertEqual(self.counts(), {'cs.cv': 1})
+
+    def test_research_focus_reads_the_histogram(self):
+        make_paper(1, 'Echocardiography', 'Segmentation', categories=('cs.CV',))
+        make_paper(2, 'Protein folding', 'Residue distances', categories=('cs.CV', 'q-bio'))
+
+        focus = APIClient().get('/scraping/papers/research_focus/').json()['research_focus']
+
+        self.assertEqual(focus['total_papers'], 2)
+        self.assertEqual(
+            [(row['category'], row['count'], row['percentage']) for row in focus['topic_distribution']],
+            [('Cs.cv', 2, 100.0), ('Q-bio', 1, 50.0)]
+        )
+
+
+class ReadingStatsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='reader@example.com', username='reader', password='x')
+        self.paper = make_paper(1, 'Echocardiography', 'Segmentation of echocardiography videos')
+        self.other = make_paper(2, 'Protein folding', 'Residue distances')
+        ResearchPaper.objects.filter(pk=self.paper.pk).update(citation_count=10, average_reading_time=30)
+        ResearchPaper.objects.filter(pk=self.other.pk).update(citation_count=4, average_reading_time=None)
+
+    def stats(self):
+        return sorted(MonthlyReadingStats.objects.filter(papers_read__gt=0).values_list(
+            'user_id', 'month', 'papers_read', 'total_citations', 'total_reading_time', 'reading_time_count'
+        ))
+
+    def assertMatchesRebuild(self):
+        maintained = self.stats()
+        rebuild_monthly_stats()
+        self.assertEqual(maintained, self.stats())
+        return maintained
+
+    def cite(self, paper, citations):
+        # The way upserts and merges change a paper: without a ReadPaper signal
+        ResearchPaper.objects.filter(pk=paper.pk).update(citation_count=citations)
+
+    def test_a_read_counts_the_paper_as_it_was_when_read(self):
+        read = ReadPaper.objects.create(user=self.user, paper=self.paper)
+        self.cite(self.paper, 50)
+        ReadPaper.objects.create(user=self.user, paper=self.other)
+
+        stats = self.assertMatchesRebuild()
+
+        self.assertEqual(stats, [(self.user.pk, month_start(read.read_at), 2, 14, 30, 1)])
+
+    def test_toggling_a_read_takes_out_what_it_added(self):
+        read = ReadPaper.objects.create(user=self.user, paper=self.paper)
+        self.cite(self.paper, 50)
+        read.soft_delete()
+        self.assertEqual(self.assertMatchesRebuild(), [])
+
+        read.is_active = True
+        read.save()
+        self.cite(self.paper, 70)
+
+        self.assertEqual(self.assertMatchesRebuild()[0][2:], (1, 50, 30, 1))
+
+    def test_deleting_a_read_takes_out_what_it_added(self):
+        ReadPaper.objects.create(user=self.user, paper=self.other)
+        read = ReadPaper.objects.create(user=self.user, paper=self.paper)
+        self.cite(self.paper, 3)
+
+        read.hard_delete()
+
+        self.assertEqual(self.assertMatchesRebuild()[0][2:], (1, 4, 0, 0))
+
+    def test_moving_a_read_to_another_month_carries_its_values(self):
+        read = ReadPaper.objects.create(user=self.user, paper=self.paper)
+        self.cite(self.paper, 50)
+
+        read.read_at = read.read_at.replace(year=read.read_at.year - 1)
+        read.save()
+
+        self.assertEqual(self.assertMatchesRebuild(), [(self.user.pk, month_start(read.read_at), 1, 10, 30, 1)])
+
+    def test_a_read_moved_to_another_paper_counts_that_paper(self):
+        read = ReadPaper.objects.create(user=self.user, paper=self.paper)
+
+        read.paper = self.other
+        read.save()
+
+        self.assertEqual(self.assertMatchesRebuild()[0][2:], (1, 4, 0, 0))
+
+
+class FakeEncoder:
+    """Deterministic unit vectors derived from the text, in place of a SentenceTransformer."""
+
+    dimensions = 8
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimensions
+
+    def encode(self, texts, **kwargs):
+        vectors = np.array([
+            np.frombuffer(hashlib.sha256(text.encode('utf-8')).digest()[:self.dimensions], dtype=np.uint8)
+            for text in texts
+        ], dtype=np.float32) + 1
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class EmbeddingStoreTests(IndexDirTestCase):
+    def setUp(self):
+        super().setUp()
+        encoder = mock.patch.object(embeddings, 'get_encoder', return_value=FakeEncoder())
+        encoder.start()
+        self.addCleanup(encoder.stop)
+        self.papers = [
+            make_paper(1, 'Deep learning for echocardiography', 'Segmenting the left ventricle'),
+            make_paper(2, 'Protein folding with transformers', 'Structure prediction from sequences'),
+        ]
+
+    def assertStoredVectors(self, papers):
+        store = embeddings.EmbeddingStore.open()
+        vectors, found = store.get([str(p.pk) for p in papers])
+        self.assertTrue(found.all())
+        expected = embeddings.encode_papers([{'title': p.title, 'abstract': p.abstract} for p in papers])
+        np.testing.assert_array_equal(vectors, expected.astype(np.float32))
+
+    def test_update_creates_the_store_under_the_configured_directory(self):
+        self.assertEqual(embeddings.update_embeddings(), (2, 0))
+
+        self.assertTrue(os.path.exists(f'{self.index_dir}/embeddings/{embeddings.META_FILE}'))
+        self.assertEqual(len(embeddings.EmbeddingStore.open()), 2)
+        self.assertStoredVectors(self.papers)
+
+    def test_append_after_an_interrupted_run_stays_aligned_with_the_ids(self):
+        embeddings.update_embeddings()
+        # A run that wrote its vectors but died before saving the ids
+        with open(f'{self.index_dir}/embeddings/{embeddings.VECTORS_FILE}', 'ab') as handle:
+            handle.write(np.ones((3, FakeEncoder.dimensions), dtype=np.float16).tobytes())
+        added = make_paper(3, 'Graph neural networks', 'Message passing on molecules')
+
+        self.assertEqual(embeddings.update_embeddings(), (1, 0))
+
+        self.assertStoredVectors([*self.papers, added])
+        self.assertEqual(
+            os.path.getsize(f'{self.index_dir}/embeddings/{embeddings.VECTORS_FILE}'),
+            3 * FakeEncoder.dimensions * np.dtype(np.float16).itemsize,
+        )
+
+
+class SemanticSearchFallbackTests(IndexDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.echo = make_paper(1, 'Deep learning for echocardiography', 'Segmenting the left ventricle')
+        make_paper(2, 'Protein folding with transformers', 'Structure prediction from sequences')
+        self.addCleanup(semantic_search._query_vector.cache_clear)
+
+    def search(self):
+        response = APIClient().get('/scraping/papers/semantic_search/', {'search': 'echocardiography'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_without_an_embedding_store_results_come_from_keyword_search(self):
+        with mock.patch.object(embeddings, 'get_encoder', side_effect=AssertionError('encoder loaded')):
+            data = self.search()
+
+        self.assertEqual(data['mode'], 'keyword')
+        self.assertEqual([paper['id'] for paper in data['results']], [str(self.echo.pk)])
+
+    def test_a_failing_embedding_store_falls_back_to_keyword_search(self):
+        with mock.patch.object(embeddings, 'get_encoder', return_value=FakeEncoder()), \
+                mock.patch.object(semantic_search, 'get_embedding_store', side_effect=RuntimeError('corrupt')):
+            data = self.search()
+
+        self.assertEqual(data['mode'], 'keyword')
+        self.assertEqual([paper['id'] for paper in data['results']], [str(self.echo.pk)])
+
+
+class NormalizedUrlTests(TestCase):
+    def setUp(self):
+        self.paper = make_paper(1, 'Deep learning for echocardiography', 'Segmenting the left ventricle')
+
+    def test_saving_a_legacy_duplicate_keeps_its_key_empty(self):
+        # Left behind by migration 0010: same URL, no key of its own
+        legacy = make_paper(2, 'Deep learning for echocardiography', 'Segmenting the left ventricle')
+        ResearchPaper.objects.filter(pk=legacy.pk).update(url=self.paper.url, normalized_url=None)
+        legacy.refresh_from_db()
+
+        legacy.citation_count = 3
+        legacy.save()
+
+        legacy.refresh_from_db()
+        self.assertIsNone(legacy.normalized_url)
+        self.assertEqual(legacy.citation_count, 3)
+
+    def test_a_legacy_row_gets_its_key_once_it_is_free(self):
+        ResearchPaper.objects.filter(pk=self.paper.pk).update(normalized_url=None)
+        self.paper.refresh_from_db()
+
+        self.paper.save()
+
+        self.paper.refresh_from_db()
+        self.assertEqual(self.paper.normalized_url, paper_url_key(self.paper.url, None))
+
+    def test_a_new_paper_with_a_taken_url_is_still_rejected(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_paper(1, 'Another copy', 'Of the same paper')
+
+
+def paper_data(n, title, abstract, source='arXiv'):
+    return {
+        'title': title,
+        'abstract': abstract,
+        'authors': [f'Author {n}'],
+        'source': source,
+        'url': f'https://example.org/{source}/{n}',
+        'categories': ['cs.LG'],
+        'publication_date': date(2024, 1, 1),
+    }
+
+
+class NearDuplicateTests(TestCase):
+    abstract = (
+        'We segment the left ventricle in echocardiogram videos with a convolutional '
+        'network trained on thousands of annotated clinical recordings.'
+    )
+
+    def test_signature_matches_exact_universal_hashing(self):
+        text_shingles = near_duplicates.shingles('Deep learning for echocardiography', self.abstract)
+        hashed = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little')
+            for shingle in text_shingles
+        ]
+        p = (1 << 61) - 1
+        expected = [
+            min((int(a) * x + int(b)) % p & 0xFFFFFFFF for x in hashed)
+            for a, b in zip(near_duplicates._A, near_duplicates._B)
+        ]
+
+        signature = near_duplicates.paper_signature('Deep learning for echocardiography', self.abstract)
+
+        self.assertEqual(signature.tolist(), expected)
+
+    def test_short_texts_get_no_signature(self):
+        self.assertIsNone(near_duplicates.paper_signature('Editorial', ''))
+        self.assertIsNone(near_duplicates.paper_signature('Editorial.', None))
+
+    def test_near_duplicate_from_another_source_is_merged(self):
+        upsert_papers([paper_data(1, 'Deep learning for echocardiography', self.abstract)])
+
+        result = upsert_papers([paper_data(2, 'Deep Learning for Echocardiography.', self.abstract, 'IEEE')])
+
+        self.assertEqual(result['merged'], 1)
+        self.assertEqual(ResearchPaper.objects.count(), 1)
+
+    def test_short_generic_records_are_not_merged(self):
+        upsert_papers([paper_data(1, 'Editorial', '')])
+
+        result = upsert_papers([paper_data(2, 'Editorial.', '', 'IEEE')])
+
+        self.assertEqual(result['merged'], 0)
+        self.assertEqual(ResearchPaper.objects.count(), 2)
+
+
+class ResponseCachePruneTests(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.cache.root, ignore_errors=True)
+
+    def store(self, url, body, age):
+        writer = self.cache.writer(url, None, {'Content-Type': 'application/pdf'})
+        writer.write(body)
+        entry = writer.commit()
+        confirmed = time.time() - age
+        os.utime(entry.path, (confirmed, confirmed))
+        return entry
+
+    def test_prune_drops_expired_entries(self):
+        self.store('https://example.org/old.pdf', b'old', age=3600)
+        self.store('https://example.org/new.pdf', b'new', age=0)
+
+        removed, _ = self.cache.prune(max_age=60, max_bytes=10 ** 6)
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.cache.lookup('https://example.org/old.pdf'))
+        self.assertEqual(self.cache.lookup('https://example.org/new.pdf').content, b'new')
+
+    def test_prune_evicts_least_recently_confirmed_entries_over_the_size_limit(self):
+        for n, age in enumerate((300, 200, 100)):
+            self.store(f'https://example.org/{n}.pdf', b'x' * 1000, age=age)
+        entry_size = os.path.getsize(self.cache.path('https://example.org/2.pdf'))
+
+        removed, remaining = self.cache.prune(max_age=3600, max_bytes=2 * entry_size)
+
+        self.assertEqual((removed, remaining), (1, 2 * entry_size))
+        self.assertIsNone(self.cache.lookup('https://example.org/0.pdf'))
+        self.assertIsNotNone(self.cache.lookup('https://example.org/1.pdf'))
+
+
+class ResponseCacheKeyTests(TestCase):
+    def test_credentials_are_left_out_of_keys_and_stored_entries(self):
+        cache = ResponseCache(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, cache.root, ignore_errors=True)
+        url = 'https://ieeexploreapi.ieee.org/api/v1/search/articles?querytext=heart&apikey=SECRET'
+
+        writer = cache.writer(url, {'apiKey': 'OTHER-SECRET', 'start_record': 1}, {'Content-Type': 'application/json'})
+        writer.write(b'{}')
+        entry = writer.commit()
+
+        key = 'https://ieeexploreapi.ieee.org/api/v1/search/articles?querytext=heart&start_record=1'
+        self.assertEqual(entry.url, key)
+        with open(entry.path, 'rb') as handle:
+            self.assertNotIn(b'SECRET', handle.read())
+        self.assertEqual(cache.lookup(key).content, b'{}')
+        self.assertEqual(http_cache.request_key('https://export.arxiv.org/api/query?resumptionToken=abc'),
+                         'https://export.arxiv.org/api/query?resumptionToken=abc')
+
+
+class PaperPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.mentioned = make_paper(1, 'Protein folding', 'Echocardiography appears once here')
+        self.focused = make_paper(2, 'Echocardiography', 'Echocardiography segmentation of echocardiography videos')
+        self.other = make_paper(3, 'Graph neural networks', 'Message passing on molecules')
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [paper['title'] for paper in response.json()['results']]
+
+    def test_cursor_pages_walk_the_newest_first_order(self):
+        first = self.client.get('/scraping/papers/', {'pagination': 'cursor', 'limit': 2})
+        second = self.client.get(first.json()['next'])
+
+        self.assertEqual(self.titles(first) + self.titles(second), [
+            'Graph neural networks', 'Echocardiography', 'Protein folding'
+        ])
+
+    def test_previous_cursors_walk_back_to_the_first_page(self):
+        pages = [self.client.get('/scraping/papers/', {'pagination': 'cursor', 'limit': 1})]
+        while pages[-1].json()['next']:
+            pages.append(self.client.get(pages[-1].json()['next']))
+        back = [pages[-1]]
+        while back[-1].json()['previous']:
+            back.append(self.client.get(back[-1].json()['previous']))
+
+        forward_titles = [self.titles(page) for page in pages]
+        self.assertEqual(forward_titles, [['Graph neural networks'], ['Echocardiography'], ['Protein folding']])
+        self.assertEqual([self.titles(page) for page in back], forward_titles[::-1])
+        self.assertIsNone(back[-1].json()['previous'])
+
+    def test_cursor_pages_range_scan_the_keyset_index(self):
+        paginator = PaperCursorPagination()
+        index = next(index.name for index in ResearchPaper._meta.indexes
+                     if index.fields == list(paginator.ordering))
+        key = (self.focused.publication_date, self.focused.created_at, self.focused.pk)
+        for reverse in (False, True):
+            ordering = [field.lstrip('-') for field in paginator.ordering] if reverse else paginator.ordering
+            queryset = ResearchPaper.objects.order_by(*ordering).filter(paginator.keyset_filter(key, reverse))
+
+            plan = queryset[:11].explain()
+
+            # SEARCH is a range scan starting at the cursor; SCAN would read every newer row first
+            self.assertIn(f'SEARCH scraping_researchpaper USING INDEX {index}', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertNotIn('MULTI-INDEX OR', plan)
+
+    def test_a_search_keeps_its_relevance_order_when_cursors_are_requested(self):
+        response = self.client.get('/scraping/papers/', {'pagination': 'cursor', 'search': 'echocardiography'})
+
+        self.assertEqual(self.titles(response), ['Echocardiography', 'Protein folding'])
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_a_custom_sort_is_kept_when_cursors_are_requested(self):
+        response = self.client.get('/scraping/papers/dynamic/', {
+            'Table': 'ResearchPaper', 'pagginated': 'True', 'pagination': 'cursor', 'sort': 'title',
+        })
+
+        self.assertEqual(self.titles(response), ['Echocardiography', 'Graph neural networks', 'Protein folding'])
+
+
+# Distinct enough that no two fixture papers are near-duplicates of each other
+FIXTURE_TOPICS = [
+    ('Echocardiogram segmentation with convolutional networks',
+     'We segment the left ventricle in ultrasound videos of the heart.'),
+    ('Protein structure prediction from amino acid sequences',
+     'A transformer predicts residue distances and folds the backbone.'),
+    ('Message passing neural networks for molecular property regression',
+     'Graph networks learn quantum chemistry targets from atom types and bonds.'),
+    ('Reinforcement learning for robotic grasping in clutter',
+     'A policy trained in simulation picks unseen objects from cluttered bins.'),
+    ('Sparse attention for long document summarization',
+     'Block-sparse attention scales abstractive summarizers to book-length inputs.'),
+]
+
+
+def atom_entry(n):
+    title, abstract = FIXTURE_TOPICS[n]
+    return (
+        f'<entry><id>http://arxiv.org/abs/2401.{n:05d}v1</id>'
+        f'<published>2024-01-{n + 1:02d}T00:00:00Z</published>'
+        f'<title>{title}</title><summary>{abstract}</summary>'
+        f'<author><name>Author {n}</name></author><category term="cs.LG"/>'
+        f'<link title="pdf" href="http://arxiv.org/pdf/2401.{n:05d}v1" type="application/pdf"/></entry>'
+    )
+
+
+def atom_feed(total, numbers):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        f'<opensearch:totalResults>{total}</opensearch:totalResults>'
+        + ''.join(atom_entry(n) for n in numbers) + '</feed>'
+    )
+
+
+class RecordedResponsesTestCase(TestCase):
+    """Answers every harvester request from responses recorded in an offline cache."""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(HTTP_CACHE_DIR=root, HTTP_CACHE_OFFLINE=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        http_cache._cache = None
+        self.addCleanup(setattr, http_cache, '_cache', None)
+
+    def record(self, url, params, body):
+        writer = http_cache.get_response_cache().writer(url, params, {'Content-Type': 'application/xml'})
+        writer.write(body.encode('utf-8'))
+        writer.commit()
+
+
+class ArxivHarvesterTests(RecordedResponsesTestCase):
+    query = 'cat:cs.LG'
+    window = (date(2024, 1, 1), date(2024, 1, 7))
+
+    def record_page(self, offset, total, numbers):
+        self.record(api_url(), {
+            'search_query': window_query(self.query, *self.window),
+            'start': offset,
+            'max_results': 2,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'ascending',
+        }, atom_feed(total, numbers))
+
+    async def harvest(self):
+        return await harvest_arxiv(self.query, *self.window, page_size=2, concurrency=2)
+
+    async def test_pages_through_the_result_set_and_completes_the_checkpoint(self):
+        self.record_page(0, 5, [0, 1])
+        self.record_page(2, 5, [2, 3])
+        self.record_page(4, 5, [4])
+
+        self.assertEqual(await self.harvest(), 5)
+
+        self.assertEqual(await ResearchPaper.objects.acount(), 5)
+        checkpoint = await HarvestCheckpoint.objects.aget(source='arxiv-api', query=self.query)
+        self.assertIsNotNone(checkpoint.completed_at)
+        self.assertEqual(checkpoint.window_start, date(2024, 1, 8))
+        self.assertEqual(checkpoint.harvested_count, 5)
+
+    async def test_resumes_at_the_first_page_that_was_not_stored(self):
+        # Only the last page is recorded: asking for an earlier one raises CacheMiss
+        self.record_page(4, 5, [4])
+        await HarvestCheckpoint.objects.acreate(
+            source='arxiv-api', query=self.query, window_start=self.window[0], window_end=self.window[1],
+            next_offset=4, total_results=5, harvested_count=4,
+        )
+
+        self.assertEqual(await self.harvest(), 1)
+
+        self.assertEqual(await ResearchPaper.objects.acount(), 1)
+        checkpoint = await HarvestCheckpoint.objects.aget(source='arxiv-api', query=self.query)
+        self.assertEqual(checkpoint.harvested_count, 5)
+
+
+class PoliteClientRetryTests(TestCase):
+    def setUp(self):
+        self.cache = http_cache.ResponseCache(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.cache.root, ignore_errors=True)
+        self.responses = []
+        self.requests = []
+
+    def polite_client(self):
+        def handler(request):
+            self.requests.append(request)
+            return self.responses.pop(0)
+        transport = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return fetching.PoliteClient(interval=0, max_retries=2, client=transport, cache=self.cache)
+
+    async def test_retries_after_the_delay_the_server_asks_for(self):
+        self.responses = [
+            httpx.Response(503, headers={'Retry-After': '7'}),
+            httpx.Response(429, headers={'Retry-After': '3'}),
+            httpx.Response(200, content=b'<ok/>'),
+        ]
+        with mock.patch.object(fetching.asyncio, 'sleep', mock.AsyncMock()) as sleep, \
+                self.assertLogs('scraping.fetching', 'WARNING'):
+            async with self.polite_client() as client:
+                body = await client.get('https://export.arxiv.org/api/query', {'start': 0})
+
+        self.assertEqual(body, b'<ok/>')
+        self.assertEqual([call.args[0] for call in sleep.await_args_list], [7.0, 3.0])
+        self.assertEqual(self.cache.lookup('https://export.arxiv.org/api/query', {'start': 0}).content, b'<ok/>')
+
+    async def test_gives_up_after_the_last_retry(self):
+        self.responses = [httpx.Response(503, headers={'Retry-After': '1'}) for _ in range(3)]
+        with mock.patch.object(fetching.asyncio, 'sleep', mock.AsyncMock()), \
+                self.assertLogs('scraping.fetching', 'WARNING'):
+            async with self.polite_client() as client:
+                with self.assertRaises(httpx.HTTPStatusError):
+                    await client.get('https://export.arxiv.org/api/query')
+
+        self.assertEqual(len(self.requests), 3)
+        self.assertIsNone(self.cache.lookup('https://export.arxiv.org/api/query'))
+
+    async def test_a_fresh_cached_response_costs_no_request(self):
+        self.responses = [httpx.Response(200, content=b'<ok/>')]
+        async with self.polite_client() as client:
+            await client.get('https://export.arxiv.org/api/query')
+            body = await client.get('https://export.arxiv.org/api/query')
+
+        self.assertEqual(body, b'<ok/>')
+        self.assertEqual(len(self.requests), 1)
+
+
+def oai_record(n, datestamp):
+    title, abstract = FIXTURE_TOPICS[n]
+    return (
+        f'<record><header><identifier>oai:arXiv.org:2401.{n:05d}</identifier>'
+        f'<datestamp>{datestamp}</datestamp></header>'
+        '<metadata><arXiv xmlns="http://arxiv.org/OAI/arXiv/">'
+        f'<id>2401.{n:05d}</id><created>2024-01-{n + 1:02d}</created>'
+        f'<authors><author><keyname>Author</keyname><forenames>{n}</forenames></author></authors>'
+        f'<title>{title}</title><categories>cs.LG</categories><abstract>{abstract}</abstract>'
+        '</arXiv></metadata></record>'
+    )
+
+
+def oai_response(body):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">{body}</OAI-PMH>'
+    )
+
+
+def oai_page(records, token=''):
+    return oai_response(
+        '<ListRecords>' + ''.join(oai_record(n, stamp) for n, stamp in records)
+        + f'<resumptionToken>{token}</resumptionToken></ListRecords>'
+    )
+
+
+class OaiHarvesterTests(RecordedResponsesTestCase):
+    def list_params(self, start):
+        return {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': 'cs', 'from': start}
+
+    def token_params(self, token):
+        return {'verb': 'ListRecords', 'resumptionToken': token}
+
+    async def checkpoint(self):
+        return await HarvestCheckpoint.objects.aget(source='arxiv-oai', query='cs')
+
+    async def test_follows_resumption_tokens_and_advances_the_watermark(self):
+        self.record(
+            oai_url(), self.list_params('2024-01-01'), oai_page([(0, '2024-01-02'), (1, '2024-01-03')], 'page-2')
+        )
+        self.record(oai_url(), self.token_params('page-2'), oai_page([(2, '2024-01-05')]))
+
+        self.assertEqual(await harvest_oai(sets=['cs'], start=date(2024, 1, 1)), 3)
+
+        self.assertEqual(await ResearchPaper.objects.acount(), 3)
+        checkpoint = await self.checkpoint()
+        self.assertEqual(checkpoint.watermark, date(2024, 1, 5))
+        self.assertEqual(checkpoint.resumption_token, '')
+
+    async def test_the_next_run_starts_at_the_watermark(self):
+        self.record(oai_url(), self.list_params('2024-01-01'), oai_page([(0, '2024-01-02')]))
+        self.record(oai_url(), self.list_params('2024-01-02'), oai_page([(0, '2024-01-02'), (1, '2024-01-04')]))
+        await harvest_oai(sets=['cs'], start=date(2024, 1, 1))
+
+        self.assertEqual(await harvest_oai(sets=['cs']), 2)
+
+        self.assertEqual(await ResearchPaper.objects.acount(), 2)
+        self.assertEqual((await self.checkpoint()).watermark, date(2024, 1, 4))
+
+    async def test_an_empty_list_keeps_the_watermark(self):
+        self.record(oai_url(), self.list_params('2024-01-05'), oai_response(
+            '<error code="noRecordsMatch">No matching records</error>'
+        ))
+        await HarvestCheckpoint.objects.acreate(source='arxiv-oai', query='cs', watermark=date(2024, 1, 5))
+
+        self.assertEqual(await harvest_oai(sets=['cs']), 0)
+
+        self.assertEqual((await self.checkpoint()).watermark, date(2024, 1, 5))
+
+    async def test_an_interrupted_list_resumes_from_its_token(self):
+        self.record(oai_url(), self.token_params('page-2'), oai_page([(2, '2024-01-05')]))
+        await HarvestCheckpoint.objects.acreate(
+            source='arxiv-oai', query='cs', resumption_token='page-2',
+            window_start=date(2024, 1, 1), window_end=date(2024, 1, 3),
+        )
+
+        self.assertEqual(await harvest_oai(sets=['cs']), 1)
+
+        self.assertEqual((await self.checkpoint()).watermark, date(2024, 1, 5))
+
+    async def test_an_expired_token_restarts_the_list_from_the_watermark(self):
+        self.record(oai_url(), self.token_params('expired'), oai_response(
+            '<error code="badResumptionToken">The token has expired</error>'
+        ))
+        self.record(oai_url(), self.list_params('2024-01-03'), oai_page([(1, '2024-01-03'), (2, '2024-01-05')]))
+        await HarvestCheckpoint.objects.acreate(
+            source='arxiv-oai', query='cs', resumption_token='expired', watermark=date(2024, 1, 3),
+            window_start=date(2024, 1, 3),
+        )
+
+        with self.assertLogs('scraping.oai_harvester', 'WARNING'):
+            self.assertEqual(await harvest_oai(sets=['cs']), 2)
+
+        checkpoint = await self.checkpoint()
+        self.assertEqual(checkpoint.watermark, date(2024, 1, 5))
+        self.assertEqual(checkpoint.resumption_token, '')
+
+
+class TruncatedFeedTests(RecordedResponsesTestCase):
+    def test_entries_before_the_cut_are_parsed_and_closing_fails(self):
+        feed = atom_feed(3, [0, 1, 2]).encode('utf-8')
+        cut = feed.index(b'<entry>', feed.index(b'</entry>')) + 40
+        parser = AtomFeedParser()
+
+        papers = []
+        for start in range(0, cut, 64):
+            papers.extend(parser.feed(feed[start:min(start + 64, cut)]))
+
+        self.assertEqual([paper['url'] for paper in papers], ['http://arxiv.org/abs/2401.00000v1'])
+        self.assertEqual(parser.total_results, 3)
+        with self.assertRaises(etree.XMLSyntaxError):
+            parser.close()
+
+    async def test_a_truncated_body_is_not_cached(self):
+        feed = atom_feed(2, [0, 1]).encode('utf-8')
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=feed[:-200]))
+        cache = http_cache.ResponseCache(http_cache.get_response_cache().root)
+        client = fetching.PoliteClient(interval=0, client=httpx.AsyncClient(transport=transport), cache=cache)
+
+        async with client:
+            with self.assertRaises(etree.XMLSyntaxError):
+                await client.parse(api_url(), {'start': 0}, AtomFeedParser)
+
+        self.assertIsNone(cache.lookup(api_url(), {'start': 0}))
+
+    async def test_an_oai_list_cut_off_mid_page_resumes_from_its_token(self):
+        self.record(
+            oai_url(), {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': 'cs', 'from': '2024-01-01'},
+            oai_page([(0, '2024-01-02')], 'page-2')
+        )
+        # Cut inside the second record of the second page
+        page = oai_page([(1, '2024-01-03'), (2, '2024-01-04')])
+        self.record(
+            oai_url(), {'verb': 'ListRecords', 'resumptionToken': 'page-2'}, page[:page.index('</record>') + 20]
+        )
+
+        with self.assertRaises(etree.XMLSyntaxError):
+            await harvest_oai(sets=['cs'], start=date(2024, 1, 1))
+
+        self.assertEqual(await ResearchPaper.objects.acount(), 1)
+        checkpoint = await HarvestCheckpoint.objects.aget(source='arxiv-oai', query='cs')
+        self.assertEqual(checkpoint.resumption_token, 'page-2')
+        self.assertIsNone(checkpoint.completed_at)
+
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'ReSearch.cache_backends.TieredCache',
+        'LOCATION': 'tiered-test-shared',
+        'OPTIONS': {'LOCAL_MAX_ENTRIES': 2, 'LOCK_POLL_INTERVAL': 0.01},
+    },
+    'tiered-test-shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-test-shared',
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.shared = caches['tiered-test-shared']
+        # Clears the local tier as well as the shared one
+        self.addCleanup(self.cache.clear)
+
+    def other_process(self):
+        """A second cache on the same shared tier but with its own local tier."""
+        other = cache_backends.TieredCache('tiered-test-shared', TIERED_CACHES['default'])
+        other._local = cache_backends._LocalTier(2, 1024 * 1024)
+        return other
+
+    def held_locally(self, key):
+        return self.cache._local.get(self.cache._local_key(key, None))[0]
+
+    def test_the_local_tier_evicts_the_least_recently_used_key(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual([self.held_locally(key) for key in 'abc'], [True, False, True])
+        # Evicted keys are still read from the shared tier
+        self.assertEqual(self.cache.get('b'), 2)
+
+    def test_concurrent_misses_compute_once_across_threads_and_processes(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'papers'
+
+        caches_ = [self.cache, self.other_process()]
+        results = []
+        threads = [
+            threading.Thread(target=lambda c=caches_[n % 2]: results.append(c.get_or_set('list', compute, 60)))
+            for n in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['papers'] * 6)
+
+    def test_an_entry_near_expiry_is_refreshed_early(self):
+        # Expires in a second and took ten to compute: XFetch refreshes it now
+        self.shared.set('list', cache_backends._Entry('old', time.time() + 1, 10.0), 60)
+
+        with mock.patch.object(cache_backends.random, 'random', return_value=0.5):
+            self.assertEqual(self.cache.get_or_set('list', lambda: 'new', 60), 'new')
+
+        self.assertEqual(self.shared.get('list').value, 'new')
+
+    def test_an_entry_far_from_expiry_is_served_as_is(self):
+        self.shared.set('list', cache_backends._Entry('old', time.time() + 3600, 10.0), 3600)
+
+        with mock.patch.object(cache_backends.random, 'random', return_value=0.5):
+            self.assertEqual(self.cache.get_or_set('list', lambda: 'new', 60), 'old')
+
+    def test_a_stale_entry_is_served_while_another_process_refreshes_it(self):
+        self.shared.set('list', cache_backends._Entry('old', time.time() + 1, 10.0), 60)
+        self.shared.add('list:refresh-lock', 1, 30)
+
+        with mock.patch.object(cache_backends.random, 'random', return_value=0.5):
+            self.assertEqual(self.cache.get_or_set('list', lambda: 'new', 60), 'old')
+
+    def test_incr_and_add_go_to_the_shared_tier(self):
+        other = self.other_process()
+        self.cache.set('generation', 1)
+        self.cache.get('generation')
+        other.incr('generation')
+
+        self.assertEqual(self.cache.incr('generation'), 3)
+        self.assertEqual(self.cache.get('generation'), 3)
+
+        self.cache.set('lock', 'mine')
+        other.delete('lock')
+        self.assertTrue(self.cache.add('lock', 'again'))
+        self.assertFalse(other.add('lock', 'theirs'))
+
+    def test_the_paper_list_is_computed_once_per_generation(self):
+        make_paper(1, 'Echocardiography', 'Segmentation of echocardiography videos')
+        client = APIClient()
+
+        with mock.patch.object(views, 'serialize_paper_list', wraps=views.serialize_paper_list) as compute:
+            first = client.get('/scraping/papers/withoutpage/')
+            second = client.get('/scraping/papers/withoutpage/')
+            make_paper(2, 'Protein folding', 'Residue distances')
+            third = client.get('/scraping/papers/withoutpage/')
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(third.json()), 2)
+        self.assertEqual(compute.call_count, 2)
@@ -0,0 +1,60 @@
+"""
+Stateless text vectorizer for the paper index.
+
+Terms are feature-hashed instead of looked up in a fitted vocabulary, and
+IDF comes from document-frequency counts that can be updated one batch at a
+time (``partial_fit``). The weighted, L2-normalized hashed vectors are then
+mapped to the index dimension with a fixed sparse random projection, which
+approximately preserves cosine similarity. Nothing ever needs a full refit,
+and memory is bounded by the hash space rather than the corpus.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.random_projection import SparseRandomProjection
+
+HASH_FEATURES = 2 ** 18
+
+
+class HashingTfidfVectorizer:
+
+    def __init__(self, n_components, n_features=HASH_FEATURES, ngram_range=(1, 3), random_state=0):
+        self.n_features = n_features
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            stop_words='english',
+            lowercase=True,
+            alternate_sign=False,
+            norm=None
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        # Only the input width matters for fitting; the matrix depends on the seed alone
+        self.projection = SparseRandomProjection(
+            n_components=n_components,
+            dense_output=True,
+            random_state=random_state
+        ).fit(sparse.csr_matrix((1, n_features), dtype=np.float32))
+
+    def partial_fit(self, texts):
+        """Add a batch of documents to the document-frequency statistics."""
+        counts = self.hasher.transform(texts)
+        # Hashed rows have summed duplicates, so each column index is one document hit
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += counts.shape[0]
+        return self
+
+    @property
+    def idf(self):
+        # Same smoothing as sklearn's TfidfTransformer
+        return np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+
+    def transform(self, texts):
+        weighted = sparse.csr_matrix(self.hasher.transform(texts).multiply(self.idf))
+        return self.projection.transform(normalize(weighted))
+
+    def fit_transform(self, texts):
+        texts = list(texts)
+        return self.partial_fit(texts).transform(texts)
@@ -8,7 +8,9 @@ urlpatterns = [
     path('papers/', views.research_paper_list_withPage),
     path('papers/withoutpage/', views.research_paper_list_withoutPage),
     path('papers/dynamic/', views.dynamic_paper_list),
-    path('papers/<int:pk>/', views.research_paper_detail),
+    path('papers/semantic_search/', views.semantic_paper_search),
+    path('papers/bulk/', views.bulk_ingest_papers),
+    path('papers/<uuid:pk>/', views.research_paper_detail),
     path('papers/bookmarked/', views.bookmarked_papers),
     path('papers/<str:pk>/bookmark/', views.toggle_bookmark),
     path('papers/summarization/<str:url>/', views.summarization_paper),
@@ -0,0 +1,83 @@
+"""
+Precomputed per-user recommendation lists.
+
+Bookmarks, reads and category likes mark a user's UserRecommendation dirty.
+A background task recomputes dirty users in batches once their activity
+has been quiet for REFRESH_DEBOUNCE, so a burst of interactions costs one
+recomputation, and the endpoint always serves the last stored list.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import UserRecommendation
+from .recommendations import IndexUnavailable, compute_recommendations
+from .tasks import schedule_recommendation_refresh
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 200
+REFRESH_DEBOUNCE = timedelta(seconds=30)
+# Lists older than this are refreshed even without new interactions
+MAX_AGE = timedelta(days=1)
+BATCH_SIZE = 100
+
+
+def mark_dirty(user_id):
+    """Flag a user's list for recomputation and queue a refresh after commit."""
+    now = timezone.now()
+    updated = UserRecommendation.objects.filter(user_id=user_id).update(is_dirty=True, dirtied_at=now)
+    if not updated:
+        UserRecommendation.objects.get_or_create(user_id=user_id, defaults={'dirtied_at': now})
+    transaction.on_commit(schedule_recommendation_refresh)
+
+
+def due_recommendations(now=None):
+    now = now or timezone.now()
+    return UserRecommendation.objects.filter(
+        Q(is_dirty=True, dirtied_at__isnull=True) |
+        Q(is_dirty=True, dirtied_at__lte=now - REFRESH_DEBOUNCE) |
+        Q(computed_at__lt=now - MAX_AGE)
+    )
+
+
+def refresh_recommendation(recommendation):
+    scores = compute_recommendations(str(recommendation.user_id), k=TOP_N)
+    now = timezone.now()
+    with transaction.atomic():
+        UserRecommendation.objects.filter(pk=recommendation.pk).update(
+            paper_scores=[[paper_id, score] for paper_id, score in scores],
+            computed_at=now
+        )
+        # Interactions during the computation keep the list dirty for the next run
+        UserRecommendation.objects.filter(
+            pk=recommendation.pk,
+            dirtied_at=recommendation.dirtied_at
+        ).update(is_dirty=False)
+
+
+def refresh_due_recommendations(batch_size=BATCH_SIZE):
+    """
+    Recompute one batch of due users. Returns ``(refreshed, more_due, still_dirty)``
+    so the caller can decide when to run again.
+    """
+    batch = list(due_recommendations().order_by(F('computed_at').asc(nulls_first=True))[:batch_size])
+    refreshed = 0
+    for recommendation in batch:
+        try:
+            refresh_recommendation(recommendation)
+            refreshed += 1
+        except IndexUnavailable:
+            # The rebuild it triggered schedules the next refresh when done
+            logger.info("Paper index not built yet; postponing recommendation refresh")
+            return refreshed, False, False
+        except Exception as e:
+            logger.error(f"Failed to refresh recommendations for {recommendation.user_id}: {e}")
+
+    # A batch that failed entirely is not retried straight away
+    more_due = refreshed > 0 and len(batch) == batch_size and due_recommendations().exists()
+    still_dirty = UserRecommendation.objects.filter(is_dirty=True).exists()
+    return refreshed, more_due, still_dirty
@@ -0,0 +1,49 @@
+"""
+Per-user paper state (bookmarked / read) resolved for a whole page at once.
+
+Both helpers cost two set-based queries regardless of page size, instead
+of one or more queries per serialized paper.
+"""
+from django.db.models import Prefetch
+
+from .models import BookmarkedPaper, ReadPaper
+
+
+def prefetch_user_state(queryset, user):
+    """
+    Attach ``user_bookmarks`` and ``user_reads`` to every paper in ``queryset``.
+
+    ResearchPaperSerializer reads these attributes for ``is_bookmarked``,
+    ``bookmark_id`` and ``is_paper_read``.
+    """
+    if not user or not user.is_authenticated:
+        return queryset
+    return queryset.prefetch_related(
+        Prefetch(
+            'paper_bookmarks',
+            queryset=BookmarkedPaper.objects.filter(user=user, is_active=True),
+            to_attr='user_bookmarks'
+        ),
+        Prefetch(
+            'paper_readers',
+            queryset=ReadPaper.objects.filter(user=user, is_active=True),
+            to_attr='user_reads'
+        )
+    )
+
+
+def load_user_state(user, paper_ids):
+    """Return ``({paper_id: bookmark_id}, {read paper_id})`` for the given papers."""
+    if not user or not user.is_authenticated or not paper_ids:
+        return {}, set()
+    bookmarks = dict(
+        BookmarkedPaper.objects
+        .filter(user=user, is_active=True, paper_id__in=paper_ids)
+        .values_list('paper_id', 'id')
+    )
+    reads = set(
+        ReadPaper.objects
+        .filter(user=user, is_active=True, paper_id__in=paper_ids)
+        .values_list('paper_id', flat=True)
+    )
+    return bookmarks, reads
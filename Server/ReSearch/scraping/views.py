@@ -3,20 +3,25 @@ import json
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from rest_framework.pagination import LimitOffsetPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-import pandas as pd
 import asyncio
 from django.core.cache import cache
 from django.db import models
 from django.db.models import Q,Case, When, Value, IntegerField
-from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper, MonthlyReadingStats, CategoryPaperCount, UserRecommendation
+from . import ingest, search, semantic_search
+from .categories import filter_by_categories
+from .pagination import PaperCursorPagination
+from .export import STREAMERS, STREAM_CONTENT_TYPES
+from .user_state import prefetch_user_state
+from .reading_stats import month_start
+from .cache_utils import PAPER_LIST_NAMESPACE, namespaced_key, query_params_digest
+from .tasks import schedule_recommendation_refresh
 from .serializers import (
     ResearchPaperSerializer, 
     BookmarkedPaperSerializer,
@@ -30,10 +35,8 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from django.db.models import Count, Avg
 from django.db.models.functions import TruncMonth, ExtractMonth, Lower
-from django.db.models import Prefetch, Func, F
-from concurrent.futures import ThreadPoolExecutor
+from django.db.models import Func, F
 from functools import partial
-import faiss
 from collections import defaultdict
 from functools import lru_cache
 from typing import List, Dict, Set
@@ -48,32 +51,29 @@ def statsData(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    # Dates for current and previous month
-    now = datetime.now()
-    first_day_this_month = datetime(now.year, now.month, 1)
-    last_day_last_month = first_day_this_month - timedelta(days=1)
-    first_day_last_month = datetime(last_day_last_month.year, last_day_last_month.month, 1)
-
-    # Filter papers for this month and last month
-    readPapersThisMonth = ReadPaper.objects.filter(
-        user=request.user, 
-        read_at__gte=first_day_this_month
-    )
-    readPapersLastMonth = ReadPaper.objects.filter(
-        user=request.user, 
-        read_at__gte=first_day_last_month,
-        read_at__lt=first_day_this_month
-    )
+    # Current and previous month buckets from the per-user rollup (at most two rows)
+    first_day_this_month = month_start(timezone.now())
+    first_day_last_month = (first_day_this_month - timedelta(days=1)).replace(day=1)
+    monthly = {
+        stats.month: stats
+        for stats in MonthlyReadingStats.objects.filter(
+            user=request.user,
+            month__in=[first_day_this_month, first_day_last_month]
+        )
+    }
+    empty = MonthlyReadingStats()
+    thisMonth = monthly.get(first_day_this_month, empty)
+    lastMonth = monthly.get(first_day_last_month, empty)
 
     # Metrics for this month
-    readPapersCountThisMonth = readPapersThisMonth.count()
-    totalCitationCountThisMonth = readPapersThisMonth.aggregate(total=Sum('paper__citation_count'))['total'] or 0
-    avgReadingTimeThisMonth = readPapersThisMonth.aggregate(avg=Avg('paper__average_reading_time'))['avg'] or 0
+    readPapersCountThisMonth = thisMonth.papers_read
+    totalCitationCountThisMonth = thisMonth.total_citations
+    avgReadingTimeThisMonth = thisMonth.average_reading_time
 
     # Metrics for last month
-    readPapersCountLastMonth = readPapersLastMonth.count()
-    totalCitationCountLastMonth = readPapersLastMonth.aggregate(total=Sum('paper__citation_count'))['total'] or 0
-    avgReadingTimeLastMonth = readPapersLastMonth.aggregate(avg=Avg('paper__average_reading_time'))['avg'] or 0
+    readPapersCountLastMonth = lastMonth.papers_read
+    totalCitationCountLastMonth = lastMonth.total_citations
+    avgReadingTimeLastMonth = lastMonth.average_reading_time
 
     # Calculate Impact Score
     impactScoreThisMonth = (
@@ -190,20 +190,14 @@ def toggle_readPaper(request, pk):
     
 
 
-def apply_filters(queryset, request):
-    """Apply filters to queryset based on request parameters."""
+def filter_papers(queryset, request):
+    """
+    Apply the date, source, category and bookmark filters from the request.
+
+    Returns the filtered queryset and whether any filter was applied.
+    """
     filters = {}
     
-    # Text search across multiple fields
-    if search_text := request.query_params.get('search'):
-        # Handle JSON field search for authors
-        queryset = queryset.filter(
-            Q(title__icontains=search_text) |
-            Q(abstract__icontains=search_text) |
-            # Search within the JSON array of authors
-            Q(authors__icontains=search_text)
-        )
-    
     # Publication date filters
     if date_gte := request.query_params.get('publication_date__gte'):
         filters['publication_date__gte'] = date_gte
@@ -216,14 +210,13 @@ def apply_filters(queryset, request):
     if source := request.query_params.get('source'):
         filters['source__iexact'] = source
     
-    # Categories filter (JSON field)
-    if category := request.query_params.get('category'):
-        # Search for the category name in the JSON array
-        category_filters = Q()
-        category_filters |= Q(categories__icontains=category)
-        queryset = queryset.filter(category_filters)
+    # Categories filter through the indexed paper/category junction table
+    category = request.query_params.get('category')
+    if category:
+        queryset = filter_by_categories(queryset, [category])
     
     # Bookmark filter (if user is authenticated)
+    bookmarked = None
     if request.user.is_authenticated:
         if bookmarked := request.query_params.get('bookmarked'):
             if bookmarked.lower() == 'true':
@@ -233,9 +226,25 @@ def apply_filters(queryset, request):
     
     # Apply remaining filters
     queryset = queryset.filter(**filters)
+    return queryset, bool(filters or category or bookmarked)
+
+
+def apply_filters(queryset, request):
+    """Apply filters to queryset based on request parameters."""
+    # Full-text search across title, abstract and authors
+    if search_text := request.query_params.get('search'):
+        queryset = search.apply_search(queryset, search_text)
+    
+    queryset, _ = filter_papers(queryset, request)
     
-    # Order by most recent first
-    queryset = queryset.order_by('-publication_date', '-created_at')
+    # Order by search relevance when searching, otherwise most recent first
+    if search.is_ranked(queryset):
+        queryset = queryset.order_by('search_rank', '-publication_date', '-created_at')
+    elif request.query_params.get('category'):
+        # Walk the (category, -publication_date) index instead of sorting papers
+        queryset = queryset.order_by('-category_links__publication_date', '-created_at')
+    else:
+        queryset = queryset.order_by('-publication_date', '-created_at')
     
     return queryset.distinct()
 
@@ -244,14 +253,26 @@ class ResearchPaperPagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 5000
 
+def get_paper_paginator(request):
+    """
+    Keyset pagination when the client opts in with ?pagination=cursor,
+    limit/offset otherwise. Cursors walk the fixed newest-first order, so a
+    search (ranked by relevance) or a custom sort always pages by offset.
+    """
+    params = request.query_params
+    if params.get('pagination') == 'cursor' and not params.get('search') and not params.get('sort'):
+        return PaperCursorPagination()
+    return ResearchPaperPagination()
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_paper_list_withPage(request):
     if request.method == 'GET':
         queryset = ResearchPaper.objects.all()
         filtered_queryset = apply_filters(queryset, request)
+        filtered_queryset = prefetch_user_state(filtered_queryset, request.user)
        
-        paginator = ResearchPaperPagination()
+        paginator = get_paper_paginator(request)
         
         paginated_queryset = paginator.paginate_queryset(filtered_queryset, request)
         
@@ -272,6 +293,46 @@ def research_paper_list_withPage(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def semantic_paper_search(request):
+    """Hybrid BM25 + embedding search, with the same filters as the paper list."""
+    search_text = request.query_params.get('search', '').strip()
+    if not search_text:
+        return Response({'error': 'search is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, int(request.query_params.get('limit', 10)))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset, filtered = filter_papers(ResearchPaper.objects.all(), request)
+    results, mode = semantic_search.hybrid_search(queryset, search_text, filtered, limit)
+
+    scores = dict(results)
+    papers = prefetch_user_state(ResearchPaper.objects.filter(id__in=scores), request.user)
+    by_id = {str(paper.pk): paper for paper in papers}
+    ordered = [by_id[paper_id] for paper_id, _ in results if paper_id in by_id]
+    data = ResearchPaperSerializer(ordered, many=True, context={'request': request}).data
+    for paper in data:
+        paper['score'] = round(scores[str(paper['id'])], 6)
+    return Response({'mode': mode, 'results': data})
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_ingest_papers(request):
+    """Upsert up to ingest.MAX_BATCH_SIZE papers sent as a JSON array or JSON Lines."""
+    try:
+        if request.content_type.split(';')[0].strip() in ingest.JSONL_CONTENT_TYPES:
+            items = ingest.parse_jsonl(request.body)
+        else:
+            items = request.data
+        result = ingest.ingest_papers(items)
+    except ingest.IngestError as e:
+        return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result, status=status.HTTP_200_OK)
+
+
 def apply_dynamic_filters(queryset, request):
     filters = {}
     params = request.query_params
@@ -279,11 +340,7 @@ def apply_dynamic_filters(queryset, request):
 
     if model_name == 'ResearchPaper':
         if params.get('search'):
-            queryset = queryset.filter(
-                Q(title__icontains=params['search']) |
-                Q(abstract__icontains=params['search']) |
-                Q(authors__icontains=params['search'])
-            )
+            queryset = search.apply_search(queryset, params['search'])
         
         # Basic filters
         if params.get('title'):
@@ -291,14 +348,9 @@ def apply_dynamic_filters(queryset, request):
         if params.get('source'):
             filters['source'] = params['source']
             
-        # Category filter with case-insensitive JSON handling
+        # Category filter through the indexed paper/category junction table
         if params.get('category'):
-            category = params['category']
-            categories = [category] if isinstance(category, str) else category
-            q_objects = Q()
-            for cat in categories:
-                q_objects |= Q(categories__contains=f'"{cat}"')
-            queryset = queryset.filter(q_objects)
+            queryset = filter_by_categories(queryset, params.getlist('category'))
                 
         # Date filters
         if params.get('date_from'):
@@ -342,6 +394,8 @@ def apply_dynamic_filters(queryset, request):
         sort_field = params['sort'].lstrip('-')
         if hasattr(queryset.model, sort_field):
             queryset = queryset.order_by(params['sort'])
+    elif model_name == 'ResearchPaper' and search.is_ranked(queryset):
+        queryset = queryset.order_by('search_rank')
             
     return queryset
 
@@ -369,10 +423,15 @@ def dynamic_paper_list(request):
         return Response({"error": "Table not found"}, status=status.HTTP_404_NOT_FOUND)
     
     filtered_queryset = apply_dynamic_filters(queryset, request)
+    if Table == 'ResearchPaper':
+        filtered_queryset = prefetch_user_state(filtered_queryset, request.user)
 
     if pagginated == 'True':
-        paginator = ResearchPaperPagination()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        if Table == 'ResearchPaper':
+            paginator = get_paper_paginator(request)
+        else:
+            paginator = ResearchPaperPagination()
+        paginated_queryset = paginator.paginate_queryset(filtered_queryset, request)
         if Table == 'ResearchPaper':
             serializer = ResearchPaperSerializer(
                 paginated_queryset, 
@@ -458,23 +517,35 @@ def dynamic_paper_list(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_paper_list_withoutPage(request):
-   cache_key = f"research_papers_{request.query_params}"
-   cached_data = cache.get(cache_key)
-   
-   if cached_data:
-       return Response(cached_data)
-   
-   # Track cache key
-   related_keys = cache.get("research_paper_cache_keys", set())
-   related_keys.add(cache_key)
-   cache.set("research_paper_cache_keys", related_keys)
-   
+   # Streaming export: ?stream=ndjson (one paper per line) or ?stream=json (chunked array)
+   stream_format = request.query_params.get('stream')
+   if stream_format:
+       if stream_format not in STREAMERS:
+           return Response(
+               {'error': f"Unsupported stream format. Use one of: {', '.join(STREAMERS)}"},
+               status=status.HTTP_400_BAD_REQUEST
+           )
+       queryset = apply_filters(ResearchPaper.objects.all(), request)
+       return StreamingHttpResponse(
+           STREAMERS[stream_format](queryset, user=request.user),
+           content_type=STREAM_CONTENT_TYPES[stream_format]
+       )
+
+   # Keys live in a generation-numbered namespace that paper writes invalidate in O(1).
+   # get_or_set computes a missing list once while concurrent requests wait for it,
+   # and refreshes a hot one shortly before it expires.
+   cache_key = namespaced_key(PAPER_LIST_NAMESPACE, query_params_digest(request.query_params))
+   return Response(cache.get_or_set(cache_key, partial(serialize_paper_list, request), timeout=604800))
+
+def serialize_paper_list(request):
+   """Every paper matching the request's filters, serialized for the list cache."""
    queryset = ResearchPaper.objects.all()
    queryset = apply_filters(queryset, request)
    
    queryset = queryset.only(
        'id', 'title', 'abstract', 'authors', 'source', 'url',
-       'pdf_url', 'categories', 'publication_date', 'created_at'
+       'pdf_url', 'categories', 'publication_date', 'created_at',
+       'updated_at', 'citation_count', 'average_reading_time', 'active_bookmarks_count'
    )
    
    # More efficient chunking using iterator()
@@ -485,8 +556,7 @@ def research_paper_list_withoutPage(request):
        serializer = ResearchPaperSerializer([chunk], many=True)
        all_data.extend(serializer.data)
    
-   cache.set(cache_key, all_data, timeout=604800)
-   return Response(all_data)
+   return all_data
 
 def capitalize_categories(category):
    words = category.lower().split()
@@ -495,45 +565,28 @@ def capitalize_categories(category):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_focus(request):
-   cache_key = "research_focus_stats"
-   cached_data = cache.get(cache_key)
-
-   if cached_data:
-       return Response(cached_data)
-
-   papers = ResearchPaper.objects.all()
-   total_papers = len(papers)
-   
-   category_counts = {}
-   for paper in papers:
-       for category in paper.categories:
-           formatted_category = capitalize_categories(category)
-           category_counts[formatted_category] = category_counts.get(formatted_category, 0) + 1
+   # The distribution is an O(#categories) read from the incrementally maintained
+   # histogram; the total is still a COUNT(*), which SQLite answers by scanning an index
+   total_papers = ResearchPaper.objects.count()
+   category_counts = CategoryPaperCount.objects.filter(paper_count__gt=0).order_by('-paper_count')
 
    distribution = [
        {
-           "category": cat,
-           "count": count,
-           "percentage": round((count / total_papers) * 100, 1)
+           "category": capitalize_categories(row.category),
+           "count": row.paper_count,
+           "percentage": round((row.paper_count / total_papers) * 100, 1) if total_papers else 0
        }
-       for cat, count in sorted(category_counts.items(), 
-                              key=lambda x: x[1], 
-                              reverse=True)
+       for row in category_counts
    ]
 
    response_data = {
        "research_focus": {
            "topic_distribution": distribution,
            "total_papers": total_papers,
-           "total_categories": len(category_counts)
+           "total_categories": len(distribution)
        }
    }
 
-   cache.set(cache_key, response_data, timeout=604800)
-   related_keys = cache.get("research_focus_cache_keys", set())
-   related_keys.add(cache_key)
-   cache.set("research_focus_cache_keys", related_keys)
-
    return Response(response_data)
 
 
@@ -549,23 +602,10 @@ def reading_stats(request):
     # Get the current year or specified year from query params
     year = request.query_params.get('year', timezone.now().year)
     
-    # Get reading stats for the user
-    monthly_stats = (
-        ReadPaper.objects
-        .filter(
-            user=request.user,
-            is_active=True,
-            read_at__year=year
-        )
-        .annotate(
-            month=TruncMonth('read_at')
-        )
-        .values('month')
-        .annotate(
-            papers=Count('id'),
-            avgTime=Avg('paper__average_reading_time')
-        )
-        .order_by('month')
+    # Read the user's rollup rows for the year (at most twelve)
+    monthly_stats = MonthlyReadingStats.objects.filter(
+        user=request.user,
+        month__year=year
     )
 
     # Format the data to match the required structure
@@ -575,9 +615,9 @@ def reading_stats(request):
     
     # Create a dictionary of existing data
     stats_dict = {
-        stat['month'].month: {
-            'papers': stat['papers'],
-            'avgTime': round(stat['avgTime'], 1) if stat['avgTime'] else 0
+        stat.month.month: {
+            'papers': stat.papers_read,
+            'avgTime': round(stat.average_reading_time, 1)
         }
         for stat in monthly_stats
     }
@@ -596,7 +636,7 @@ def reading_stats(request):
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_paper_detail(request, pk):
-    paper = get_object_or_404(ResearchPaper, pk=pk)
+    paper = get_object_or_404(prefetch_user_state(ResearchPaper.objects.all(), request.user), pk=pk)
     
     if request.method == 'GET':
         serializer = ResearchPaperSerializer(paper, context={'request': request})
@@ -950,234 +990,6 @@ def summarization_paper(request, pdf_url=None):
     return Response({"error": "Invalid request method"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-import numpy as np
-import faiss
-from typing import List, Dict, Tuple
-from collections import defaultdict
-import math
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from django.db.models import Q, Count, F, Prefetch
-from django.core.cache import cache
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-from functools import reduce
-import operator
-CHUNK_SIZE = 2000
-CACHE_TIMEOUT = 86400  # 24 hours
-INDEX_DIMENSIONS = 200
-MIN_INTERACTIONS = 5
-MAX_WORKERS = 4
-
-def process_categories(categories):
-    if not categories:
-        return ''
-    try:
-        return ','.join(str(cat).strip().lower() for cat in categories)
-    except:
-        return ''
-
-def chunks(queryset, size):
-    """Process queryset in chunks"""
-    start = 0
-    while True:
-        chunk = list(queryset[start:start + size])
-        if not chunk:
-            break
-        yield chunk
-        start += size
-
-class PaperIndexManager:
-    def __init__(self):
-        self.index = None
-        self.paper_ids = []
-        self.vectorizer = None
-        self.load_from_cache()
-    
-    def load_from_cache(self):
-        try:
-            cached_data = cache.get('paper_index_data')
-            if cached_data and isinstance(cached_data, dict):
-                self.index = cached_data.get('index')
-                self.paper_ids = cached_data.get('paper_ids', [])
-                self.vectorizer = cached_data.get('vectorizer')
-        except Exception as e:
-            print(f"Cache loading error: {str(e)}")
-    
-    def save_to_cache(self):
-        try:
-            if self.index and self.vectorizer:
-                cache.set('paper_index_data', {
-                    'index': self.index,
-                    'paper_ids': self.paper_ids,
-                    'vectorizer': self.vectorizer
-                }, CACHE_TIMEOUT)
-        except Exception as e:
-            print(f"Cache saving error: {str(e)}")
-
-    def build_vectors(self, papers: List[Dict]) -> np.ndarray:
-        texts = [
-            f"{str(p.get('title', '')).lower()} {str(p.get('abstract', '')).lower()} "
-            f"{process_categories(p.get('categories', []))} "
-            f"{' '.join(str(author).lower() for author in p.get('authors', []))}"
-            for p in papers
-        ]
-        
-        try:
-            if not self.vectorizer:
-                self.vectorizer = TfidfVectorizer(
-                    max_features=INDEX_DIMENSIONS,
-                    stop_words='english',
-                    ngram_range=(1, 3),
-                    lowercase=True
-                )
-                vectors = self.vectorizer.fit_transform(texts).toarray()
-            else:
-                vectors = self.vectorizer.transform(texts).toarray()
-                
-            vectors = vectors.astype('float32')
-            faiss.normalize_L2(vectors)
-            return vectors
-        except Exception as e:
-            print(f"Vector building error: {str(e)}")
-            raise
-
-    def build_index(self, papers: List[Dict]):
-        try:
-            if not self.index:
-                self.index = faiss.IndexFlatIP(INDEX_DIMENSIONS)
-                self.paper_ids = []
-            
-            for i in range(0, len(papers), CHUNK_SIZE):
-                chunk = papers[i:i + CHUNK_SIZE]
-                vectors = self.build_vectors(chunk)
-                self.index.add(vectors)
-                self.paper_ids.extend(str(p.get('id')) for p in chunk)
-            
-            self.save_to_cache()
-        except Exception as e:
-            print(f"Index building error: {str(e)}")
-
-def get_enhanced_content_recommendations(user_id: str) -> List[Tuple[str, float]]:
-    index_manager = PaperIndexManager()
-    
-    try:
-        # Get user interactions
-        user_papers = ResearchPaper.objects.filter(
-            Q(paper_bookmarks__user_id=user_id, paper_bookmarks__is_active=True) |
-            Q(paper_readers__user_id=user_id, paper_readers__is_active=True)
-        ).distinct()
-        
-        liked_categories = list(CategoryLike.objects.filter(
-            user_id=user_id, 
-            is_active=True
-        ).values_list('category__name', flat=True))
-        
-        # Build user profile
-        user_interests = defaultdict(float)
-        user_keywords = defaultdict(float)
-        user_authors = set()
-        
-        for paper in user_papers:
-            text = f"{paper.title} {paper.abstract}"
-            words = set(word.lower() for word in text.split() if len(word) > 3)
-            user_keywords.update({word: user_keywords.get(word, 0) + 1 for word in words})
-            
-            for category in paper.categories:
-                user_interests[category.lower()] += 0.4
-            user_authors.update(paper.authors)
-        
-        for category in liked_categories:
-            user_interests[category.lower()] += 0.6
-        
-        # Get unexplored categories
-        all_categories = set(
-            cat.lower() 
-            for cats in ResearchPaper.objects.values_list('categories', flat=True)
-            for cat in cats if cats
-        )
-        unexplored_categories = all_categories - set(user_interests.keys())
-        
-        # Initialize vectorizer if needed
-        if not index_manager.index or not index_manager.vectorizer:
-            papers = list(ResearchPaper.objects.values('id', 'title', 'abstract', 'categories', 'authors'))
-            if papers:
-                index_manager.build_index(papers)
-        
-        # Process recommendations with scores
-        paper_scores = []
-        seen_papers = {str(p.id) for p in user_papers}
-        
-        for papers in chunks(ResearchPaper.objects.exclude(id__in=seen_papers), 1000):
-            for paper in papers:
-                # Calculate interest-based score (70%)
-                interest_score = calculate_interest_score(
-                    paper, user_interests, user_keywords, 
-                    user_authors, index_manager
-                )
-                
-                # Calculate diversity score (30%)
-                diversity_score = calculate_diversity_score(
-                    paper, unexplored_categories
-                )
-                
-                final_score = (interest_score * 0.7) + (diversity_score * 0.3)
-                if final_score > 0:
-                    paper_scores.append((str(paper.id), round(final_score, 4)))
-        
-        # Sort recommendations
-        return sorted(paper_scores, key=lambda x: x[1], reverse=True)
-        
-    except Exception as e:
-        print(f"Recommendation error: {str(e)}")
-        return []
-def calculate_interest_score(paper, user_interests, user_keywords, user_authors, index_manager):
-    score = 0
-    
-    # Category match (30%)
-    paper_categories = [cat.lower() for cat in paper.categories]
-    category_score = sum(user_interests.get(cat, 0) for cat in paper_categories)
-    score += category_score * 0.3
-    
-    # Keyword similarity (25%)
-    text = f"{paper.title.lower()} {paper.abstract.lower()}"
-    words = set(word for word in text.split() if len(word) > 3)
-    keyword_score = sum(user_keywords.get(word, 0) for word in words) / (len(words) or 1)
-    score += keyword_score * 0.25
-    
-    # Content similarity (25%)
-    if str(paper.id) in index_manager.paper_ids:
-        try:
-            idx = index_manager.paper_ids.index(str(paper.id))
-            similarity_score = index_manager.index.reconstruct(idx).mean()
-            score += similarity_score * 0.25
-        except:
-            pass
-    
-    # Citation impact (10%)
-    citation_score = min(math.log(paper.citation_count + 1) / 10, 1) if paper.citation_count else 0
-    score += citation_score * 0.1
-    
-    # Recency (10%)
-    days_old = (datetime.now().date() - paper.publication_date).days
-    recency_score = math.exp(-days_old / 365) if days_old >= 0 else 0
-    score += recency_score * 0.1
-    
-    # Author overlap bonus
-    if any(author in paper.authors for author in user_authors):
-        score *= 1.2
-        
-    return score
-
-def calculate_diversity_score(paper, unexplored_categories):
-    paper_categories = set(cat.lower() for cat in paper.categories)
-    unexplored_matches = len(paper_categories & unexplored_categories)
-    
-    if unexplored_matches:
-        citation_weight = min(math.log(paper.citation_count + 1) / 10, 1) if paper.citation_count else 0.1
-        return (unexplored_matches / len(paper_categories)) * citation_weight
-    return 0
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def recommendation_paper(request):
@@ -1190,19 +1002,21 @@ def recommendation_paper(request):
     search_query = request.GET.get('search', '').strip().lower()
     categories = [cat.lower() for cat in request.GET.getlist('categories', [])]
     
-    cache_key = f'recommendations_{request.user.id}'
-    recommended_data = cache.get(cache_key)
-    
-    if recommended_data is None:
-        recommended_data = get_enhanced_content_recommendations(str(request.user.id))
-        if recommended_data:
-            cache.set(cache_key, recommended_data, CACHE_TIMEOUT)
+    # Lists are precomputed in the background; serve the last one and refresh if needed
+    stored, created = UserRecommendation.objects.get_or_create(user=request.user)
+    if created or stored.is_dirty:
+        schedule_recommendation_refresh()
+    freshness = {
+        'computed_at': stored.computed_at,
+        'is_stale': stored.is_dirty or stored.computed_at is None,
+    }
+    recommended_data = [tuple(item) for item in stored.paper_scores]
     
     if not recommended_data:
-        return Response([])
+        return Response({'results': [], **freshness})
 
     # Split IDs and scores
-    recommended_ids, scores = zip(*recommended_data) if recommended_data else ([], [])
+    recommended_ids, scores = zip(*recommended_data)
     recommendations = ResearchPaper.objects.filter(id__in=recommended_ids)
     
     if search_query:
@@ -1212,29 +1026,9 @@ def recommendation_paper(request):
         )
     
     if categories:
-        recommendations = recommendations.filter(
-            reduce(operator.or_, 
-                  [Q(categories__icontains=cat) for cat in categories])
-        )
+        recommendations = filter_by_categories(recommendations, categories)
     
-    recommendations = recommendations.prefetch_related(
-        Prefetch(
-            'paper_bookmarks',
-            queryset=BookmarkedPaper.objects.filter(
-                user=request.user,
-                is_active=True
-            ),
-            to_attr='user_bookmarks'
-        ),
-        Prefetch(
-            'paper_readers',
-            queryset=ReadPaper.objects.filter(
-                user=request.user,
-                is_active=True
-            ),
-            to_attr='user_reads'
-        )
-    )
+    recommendations = prefetch_user_state(recommendations, request.user)
     
     # Create a mapping of paper IDs to their scores
     score_map = dict(recommended_data)
@@ -1254,4 +1048,6 @@ def recommendation_paper(request):
     for paper in serialized_papers:
         paper['recommendation_score'] = score_map.get(paper['id'], 0)
     
-    return paginator.get_paginated_response(serialized_papers)
\ No newline at end of file
+    response = paginator.get_paginated_response(serialized_papers)
+    response.data.update(freshness)
+    return response
\ No newline at end of file